@@ -2,7 +2,9 @@ import atexit
 from fastapi import FastAPI
 
 from services.redis_scheduler import start_scheduler, stop_scheduler
-from api.routes import recommendations_router, tasks_router
+from services.catalog_service import warm_catalog
+from services.database_service import warm_schema_cache
+from api.routes import recommendations_router, tasks_router, metrics_router
 
 def create_app() -> FastAPI:
     """FastAPI 애플리케이션을 생성하고 설정합니다."""
@@ -17,6 +19,11 @@ def create_app() -> FastAPI:
     # 라우터 등록
     app.include_router(recommendations_router)
     app.include_router(tasks_router)
+    app.include_router(metrics_router)
+    
+    # 스키마 캐시 / 곡 카탈로그 스냅샷 미리 적재
+    app.on_event("startup")(warm_schema_cache)
+    app.on_event("startup")(warm_catalog)
     
     # 스케줄러 시작
     scheduler = start_scheduler()
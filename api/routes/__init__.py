@@ -1,7 +1,9 @@
 from .recommendations import router as recommendations_router
 from .tasks import router as tasks_router
+from .metrics import router as metrics_router
 
 __all__ = [
     "recommendations_router",
-    "tasks_router"
+    "tasks_router",
+    "metrics_router"
 ]
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException
+
+from services.db_pool import get_pool_stats
+from services.tagline_cache import get_tagline_cache_stats
+from services.cache_service import get_cache_stats, get_recommendation_cache_tier_stats
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/db-pool")
+async def db_pool_metrics():
+    """DB 커넥션 풀 사용 지표를 반환합니다."""
+    try:
+        return get_pool_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Metrics error: {e}")
+
+
+@router.get("/tagline-cache")
+async def tagline_cache_metrics():
+    """태그라인 캐시 적중률(로컬/Redis)과 저장 횟수를 반환합니다."""
+    try:
+        return get_tagline_cache_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Metrics error: {e}")
+
+
+@router.get("/cache")
+async def cache_metrics():
+    """취향/추천 캐시 항목 수를 반환합니다. (캐시 인덱스 조회, 키스페이스를 훑지 않음)"""
+    try:
+        return get_cache_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Metrics error: {e}")
+
+
+@router.get("/recommend-cache")
+async def recommend_cache_metrics():
+    """추천 캐시 조회의 티어별(프로세스 내 / Redis) 적중률과 로컬 캐시 사용량을 반환합니다. (이 프로세스 기준)"""
+    try:
+        return get_recommendation_cache_tier_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Metrics error: {e}")
@@ -1,67 +1,175 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 
-from core.recommendation_service import recommend_songs
+from core.recommendation_service import recommend_songs_async, recommend_songs_stream
 from models.api_models import (
     RecommendationRequest, 
     RecommendationResponse,
     CachedRecommendationRequest,
     CachedRecommendationResponse
 )
-from services.cache_service import load_recommendation_cache, save_recommendation_cache
+from services.cache_service import (
+    load_recommendation_cache_async, save_recommendation_cache_async, build_recommendation_cache_data
+)
+from services.single_flight import run_single_flight_async, recommendation_flight_key
 
 router = APIRouter(prefix="/recommend", tags=["recommendations"])
 
+def _is_cache_valid(cached_data: dict, favorite_song_ids: list[int]) -> bool:
+    """캐시된 데이터의 favorite_song_ids와 현재 요청이 동일한지 확인 (순서 무관)"""
+    return bool(cached_data) and sorted(cached_data.get("favorite_song_ids", [])) == sorted(favorite_song_ids or [])
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
 @router.post("", response_model=RecommendationResponse)
 async def recommend(req: RecommendationRequest):
     """사용자의 좋아하는 곡을 기반으로 추천을 생성합니다."""
     try:
         # 먼저 Redis 캐시에서 기존 추천 결과 확인
-        cached_data = load_recommendation_cache(req.memberId)
+        cached_data = await load_recommendation_cache_async(req.memberId)
         
-        if cached_data:
-            # 캐시된 데이터의 favorite_song_ids와 현재 요청이 동일한지 확인
-            cached_favorites = cached_data.get("favorite_song_ids", [])
-            current_favorites = req.favorite_song_ids or []
-            
-            # 정렬하여 비교 (순서 무관)
-            if sorted(cached_favorites) == sorted(current_favorites):
-                # 캐시된 데이터가 유효하면 바로 반환
-                return RecommendationResponse(
-                    status="completed",
-                    message="캐시된 추천 결과를 반환합니다.",
-                    generated_date=cached_data.get("generated_date", datetime.now().strftime("%Y-%m-%d"))
-                )
+        if _is_cache_valid(cached_data, req.favorite_song_ids):
+            # 캐시된 데이터가 유효하면 바로 반환
+            return RecommendationResponse(
+                status="completed",
+                message="캐시된 추천 결과를 반환합니다.",
+                generated_date=cached_data.get("generated_date", datetime.now().strftime("%Y-%m-%d"))
+            )
         
         # 캐시된 데이터가 없으면 새로 분석 수행
-        result = recommend_songs(req.favorite_song_ids)
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        cache_data = {
-            "favorite_song_ids": result.get("favorite_song_ids", []),
-            "groups": result.get("groups", []),
-            "candidates": result.get("candidates", []),
-            "generated_date": today,
-        }
-        
-        # 새로 생성한 결과를 캐시에 저장
-        save_recommendation_cache(req.memberId, cache_data)
+        # 같은 회원 + 같은 좋아요 목록으로 동시에 들어온 요청은 계산 한 번을 공유 (single-flight)
+        async def _compute() -> dict:
+            result = await recommend_songs_async(req.favorite_song_ids, member_id=req.memberId)
+            cache_data = build_recommendation_cache_data(result)
+            # 새로 생성한 결과를 캐시에 저장 (리더만 저장)
+            await save_recommendation_cache_async(req.memberId, cache_data)
+            return cache_data
+
+        cache_data = await run_single_flight_async(
+            recommendation_flight_key(req.memberId, req.favorite_song_ids), _compute
+        )
         
         return RecommendationResponse(
             status="completed",
             message="추천 분석 및 생성이 완료되었습니다.",
-            generated_date=today
+            generated_date=cache_data.get("generated_date", datetime.now().strftime("%Y-%m-%d"))
         )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommend error: {e}")
 
+async def _stream_cached(cached_data: dict, cached: bool = True):
+    yield _ndjson({"event": "candidates", "candidates": cached_data.get("candidates", [])})
+    groups = cached_data.get("groups", [])
+    for i, group in enumerate(groups):
+        yield _ndjson({"event": "group", "index": i, "group": group})
+    yield _ndjson({
+        "event": "done",
+        "favorite_song_ids": cached_data.get("favorite_song_ids", []),
+        "group_count": len(groups),
+        "generated_date": cached_data.get("generated_date", ""),
+        "cached": cached,
+    })
+
+class _StreamFailed(Exception):
+    """추천 스트림이 error 이벤트로 끝남 (single-flight 팔로워에게도 같은 이벤트 전달)"""
+
+    def __init__(self, event: dict):
+        super().__init__(event.get("detail"))
+        self.event = event
+
+# 클라이언트가 끊겨도 끝까지 도는 리더 계산 (GC 방지용 참조)
+_leader_tasks: set = set()
+_STREAM_END = object()
+
+def _forget_task(task: asyncio.Task) -> None:
+    _leader_tasks.discard(task)
+    if not task.cancelled():
+        task.exception()  # 아무도 기다리지 않을 때 "exception was never retrieved" 경고 방지
+
+async def _stream_generated(member_id: str, favorite_song_ids: list[int]):
+    """
+    /recommend와 같은 single-flight 키로 계산을 공유합니다.
+    리더면 이벤트를 생성되는 대로 보내고, 팔로워면(다른 요청이 계산 중) 끝난 결과를 같은 형식으로 보냅니다.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _compute() -> dict:
+        candidates, groups = [], {}
+        async for event in recommend_songs_stream(favorite_song_ids, member_id=member_id):
+            if event["event"] == "error":
+                raise _StreamFailed(event)
+            if event["event"] == "candidates":
+                candidates = event["candidates"]
+            elif event["event"] == "group":
+                groups[event["index"]] = event["group"]
+            elif event["event"] == "done":
+                cache_data = build_recommendation_cache_data({
+                    "favorite_song_ids": event.get("favorite_song_ids", []),
+                    "groups": [groups[i] for i in sorted(groups)],
+                    "candidates": candidates,
+                })
+                # 스트림이 끝까지 간 결과만 캐시 (/recommend/cached에서 같은 결과 조회)
+                await save_recommendation_cache_async(member_id, cache_data)
+                queue.put_nowait({**event, "generated_date": cache_data["generated_date"], "cached": False})
+                return cache_data
+            queue.put_nowait(event)
+        raise _StreamFailed({"event": "error", "detail": "Recommend stream ended without result"})
+
+    async def _run() -> dict:
+        try:
+            return await run_single_flight_async(recommendation_flight_key(member_id, favorite_song_ids), _compute)
+        finally:
+            queue.put_nowait(_STREAM_END)
+
+    task = asyncio.create_task(_run())
+    _leader_tasks.add(task)
+    task.add_done_callback(_forget_task)
+
+    streamed = False
+    try:
+        while (event := await queue.get()) is not _STREAM_END:
+            streamed = True
+            yield _ndjson(event)
+        cache_data = await task
+        if not streamed:
+            # 팔로워: 리더가 만든 결과를 그대로 전송
+            async for line in _stream_cached(cache_data, cached=False):
+                yield line
+    except _StreamFailed as e:
+        yield _ndjson(e.event)
+    except Exception as e:
+        # 이미 200으로 응답을 시작했으므로 오류도 이벤트로 전달
+        yield _ndjson({"event": "error", "detail": f"Recommend stream error: {e}"})
+
+@router.post("/stream")
+async def recommend_stream(req: RecommendationRequest):
+    """
+    추천 결과를 NDJSON(한 줄에 이벤트 하나)으로 단계별 전송합니다.
+    candidates → group(태그라인 준비되는 순서, index = 최종 그룹 순서) → done (실패 시 error)
+    좋아요가 그대로인 캐시가 있으면 캐시 내용을 같은 형식으로 바로 보냅니다.
+    """
+    try:
+        cached_data = await load_recommendation_cache_async(req.memberId)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Recommend stream error: {e}")
+
+    if _is_cache_valid(cached_data, req.favorite_song_ids):
+        body = _stream_cached(cached_data)
+    else:
+        body = _stream_generated(req.memberId, req.favorite_song_ids)
+    return StreamingResponse(body, media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
 @router.post("/cached", response_model=CachedRecommendationResponse)
 async def get_cached_recommendation(req: CachedRecommendationRequest):
     """캐시된 추천 결과를 조회합니다."""
     try:
-        cached_data = load_recommendation_cache(req.memberId)
+        cached_data = await load_recommendation_cache_async(req.memberId)
         if not cached_data:
             raise HTTPException(
                 status_code=404, 
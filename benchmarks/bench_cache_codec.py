@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+추천 캐시 값 코덱 벤치마크: 기존 json.dumps(ensure_ascii=False) vs services.cache_codec 형식들.
+
+    python -m benchmarks.bench_cache_codec --candidates 100 --groups 5 --repeat 2000
+    python -m benchmarks.bench_cache_codec --compact      # 형식 2(곡 ID + 사용자별 필드) 항목으로 비교
+
+recommend:{member_id}에 저장되는 것과 같은 모양의 항목(그룹 + 후보곡, 제목 변형 포함)을 만들어
+형식별 항목 크기(bytes)와 인코딩/디코딩 1회 시간(µs)을 비교합니다.
+설치되지 않은 의존성(orjson / ormsgpack·msgpack / zstandard)이 필요한 형식은 건너뜁니다.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.recommendation_service import _normalize_candidates_for_cache
+from services.cache_codec import CacheCodec, decode_cache_value
+from services.cache_service import _compact_recommendation_entry
+
+SPECS = ["json", "json+zstd", "orjson", "orjson+zstd", "msgpack", "msgpack+zstd"]
+GENRES = ["J-pop", "팝", "록", "발라드", "힙합", "인디 팝", "R&B", "댄스", "록, 발라드"]
+MOODS = ["신나는", "잔잔", "서정적", "강렬", "감성적", "에너지"]
+ARTISTS = [("아이유", "IU"), ("방탄소년단", "BTS"), ("요아소비", "YOASOBI"), ("에이머", "Aimer"),
+           ("아도", "Ado"), ("뉴진스", "NewJeans"), ("검정치마", "The Black Skirts"), ("킹누", "King Gnu")]
+CRITERIA = ["genre", "mood", "artist"]
+
+
+def build_entry(n_candidates: int, n_groups: int, group_size: int, seed: int) -> dict:
+    """build_recommendation_cache_data 결과와 같은 모양의 캐시 항목"""
+    rnd = random.Random(seed)
+    candidates = []
+    for sid in range(1, n_candidates + 1):
+        artist_kr, artist = rnd.choice(ARTISTS)
+        candidates.append({
+            "song_id": 10_000 + sid,
+            "title_kr": f"노래 제목 {sid}",
+            "title_en": f"Song Title {sid}",
+            "title_jp": f"歌のタイトル {sid}",
+            "title_yomi": f"uta no taitoru {sid}",
+            "artist_kr": artist_kr,
+            "artist": artist,
+            "genre": rnd.choice(GENRES),
+            "mood": rnd.choice(MOODS),
+            "tj_number": 50_000 + sid,
+            "ky_number": 80_000 + sid,
+            "recommendation_type": rnd.choice(["ai", "score"]),
+            "matched_criteria": rnd.sample(CRITERIA, rnd.randint(0, 3)),
+            "match_score": rnd.randint(0, 100),
+            "reason": f"{artist_kr}의 {rnd.choice(MOODS)} 분위기를 좋아하신다면 추천해요",
+        })
+    candidates = _normalize_candidates_for_cache(candidates)
+
+    groups = []
+    for g in range(n_groups):
+        picked = rnd.sample(candidates, min(group_size, len(candidates)))
+        groups.append({
+            "label": f"{rnd.choice(MOODS)} {rnd.choice(GENRES)} 모음 {g + 1}",
+            "songs": [{k: s[k] for k in ("song_id", "title_jp", "title_kr", "title_en", "title_yomi",
+                                         "artist", "artist_kr", "tj_number", "ky_number")}
+                      for s in picked],
+            "tagline": "오늘 밤 노래방에서 부르기 좋은 감성 가득한 선곡 🎤",
+        })
+    return {
+        "favorite_song_ids": rnd.sample(range(1, 50_000), 30),
+        "groups": groups,
+        "candidates": candidates,
+        "generated_date": "2024-01-01",
+    }
+
+
+def time_us(fn, arg, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=5)
+    parser.add_argument("--group-size", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compact", action="store_true", help="코덱에 형식 2 항목을 넣음 (기준은 이전 전체 형식 그대로)")
+    args = parser.parse_args()
+
+    entry = build_entry(args.candidates, args.groups, args.group_size, args.seed)
+    payload = _compact_recommendation_entry(entry) if args.compact else entry
+
+    # 기준: 지금까지의 저장 형식
+    baseline_raw = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+    base_enc = time_us(lambda e: json.dumps(e, ensure_ascii=False), entry, args.repeat)
+    base_dec = time_us(json.loads, baseline_raw, args.repeat)
+    if decode_cache_value(baseline_raw) != entry:
+        raise AssertionError("legacy JSON entry did not round-trip")
+
+    print(f"entry: {args.groups} groups x {args.group_size} songs + {args.candidates} candidates"
+          f"{' (compact song ids)' if args.compact else ''}")
+    print(f"{'codec':<16}{'bytes':>9}{'ratio':>8}{'encode µs':>12}{'decode µs':>12}")
+    print(f"{'legacy json':<16}{len(baseline_raw):>9}{1:>8.2f}{base_enc:>12.1f}{base_dec:>12.1f}")
+
+    for spec in SPECS:
+        codec = CacheCodec(spec)
+        if codec.spec != spec:
+            print(f"{spec:<16}  (skipped: dependency not installed)")
+            continue
+        raw = codec.encode(payload)
+        if CacheCodec.decode(raw) != payload:
+            raise AssertionError(f"{spec} did not round-trip")
+        enc = time_us(codec.encode, payload, args.repeat)
+        dec = time_us(CacheCodec.decode, raw, args.repeat)
+        print(f"{spec:<16}{len(raw):>9}{len(raw) / len(baseline_raw):>8.2f}{enc:>12.1f}{dec:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+후보곡 선곡 프롬프트 벤치마크: full(제목/아티스트 전체를 되받아 매칭) vs compact(번호만 되받아 조회).
+
+    python -m benchmarks.bench_prompt_modes --candidates 100 --target 20 --repeat 5
+    LLM_BACKEND=stub python -m benchmarks.bench_prompt_modes      # API 키 없이 파이프라인만 확인
+
+모드별로 프롬프트 토큰, 출력 토큰, 요청 1건의 end-to-end 지연(LLM 호출 + 파싱 + DB 후보 매칭)과
+선곡이 후보 row로 얼마나 해석됐는지(나머지는 점수순 보충)를 비교합니다.
+토큰 수는 응답의 usage_metadata를 우선 사용하고, 없으면(stub 등) tiktoken으로 셉니다.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ai_service import _recommend_mode
+from core.recommendation_service import _CandidateMatchIndex, _match_ai_recommendations_with_db
+from utils.helpers import _safe_strip
+
+GENRES = ["J-pop", "팝", "록", "발라드", "힙합", "인디 팝", "R&B", "댄스", "록, 발라드"]
+MOODS = ["신나는", "잔잔", "서정적", "강렬", "감성적", "에너지"]
+ARTISTS = [("아이유", "IU"), ("방탄소년단", "BTS"), ("요아소비", "YOASOBI"), ("에이머", "Aimer"),
+           ("아도", "Ado"), ("뉴진스", "NewJeans"), ("검정치마", "The Black Skirts"), ("킹누", "King Gnu")]
+PREFERENCE = {
+    "preferred_genres": ["J-pop", "발라드"],
+    "preferred_moods": ["감성적", "잔잔"],
+    "overall_taste": "감성적인 J-pop과 발라드를 즐겨 부르는 편",
+    "favorite_artists": ["요아소비", "아이유"],
+}
+
+
+def build_candidates(n: int, seed: int) -> list[dict]:
+    rnd = random.Random(seed)
+    songs = []
+    for sid in range(1, n + 1):
+        artist_kr, artist = rnd.choice(ARTISTS)
+        songs.append({
+            "song_id": 10_000 + sid,
+            "title_kr": f"노래 제목 {sid}",
+            "title_en": f"Song Title {sid}",
+            "title_jp": "",
+            "title_yomi": f"uta {sid}",
+            "artist_kr": artist_kr,
+            "artist": artist,
+            "genre": rnd.choice(GENRES),
+            "mood": rnd.choice(MOODS),
+            "tj_number": 50_000 + sid,
+            "ky_number": 80_000 + sid,
+            "match_score": rnd.randint(0, 100),
+        })
+    return songs
+
+
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")  # gpt-4o 계열
+    except Exception:
+        return None
+
+
+def count_tokens(encoder, text: str) -> int:
+    if encoder is None:
+        return len(text) // 2  # tiktoken이 없을 때의 대략치
+    return len(encoder.encode(text))
+
+
+def resolved_count(ai_recs: list[dict], candidates: list[dict]) -> int:
+    """LLM 선곡 중 후보 row로 해석된 수 (id → 완전 일치 → 유사 일치, _match_ai_recommendations_with_db와 같은 순서)"""
+    index, used = _CandidateMatchIndex(candidates), set()
+    hits = 0
+    for rec in ai_recs:
+        title = _safe_strip(rec.get("title")) or _safe_strip(rec.get("title_kr"))
+        artist = _safe_strip(rec.get("artist_kr"))
+        found = index.find_by_id(rec["song_id"], used) if rec.get("song_id") is not None else None
+        found = found or index.find_exact(title, artist, used) or index.find_soft(title, artist, used)
+        if found:
+            used.add(found.get("song_id"))
+            hits += 1
+    return hits
+
+
+def run_mode(mode: str, candidates: list[dict], target: int, repeat: int, encoder) -> dict:
+    chain, make_inputs, parse = _recommend_mode(mode)
+    prompt_tpl, llm = chain.first, chain.last
+    stats = {"prompt_tokens": [], "output_tokens": [], "latency": [], "resolved": [], "returned": []}
+
+    for _ in range(repeat):
+        inputs = make_inputs(candidates, PREFERENCE, target)
+        prompt_text = prompt_tpl.format(**inputs)
+
+        t0 = time.perf_counter()
+        response = llm.invoke(prompt_text)
+        ai_recs = parse(response, candidates, target)
+        matched = _match_ai_recommendations_with_db(ai_recs, [c.copy() for c in candidates])
+        stats["latency"].append(time.perf_counter() - t0)
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        stats["prompt_tokens"].append(usage.get("input_tokens") or count_tokens(encoder, prompt_text))
+        stats["output_tokens"].append(usage.get("output_tokens") or count_tokens(encoder, response.content or ""))
+        stats["resolved"].append(resolved_count(ai_recs, candidates))
+        stats["returned"].append(len(matched))
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--target", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--modes", default="full,compact")
+    args = parser.parse_args()
+
+    candidates = build_candidates(args.candidates, args.seed)
+    encoder = _encoder()
+    print(f"후보 {len(candidates)}곡, 선곡 {args.target}곡, 반복 {args.repeat}회, "
+          f"LLM_BACKEND={os.getenv('LLM_BACKEND', 'openai')}, tokenizer={'tiktoken' if encoder else '근사치'}")
+    print(f"{'mode':<8} {'prompt tok':>10} {'output tok':>10} {'p50 ms':>8} {'max ms':>8} {'resolved':>9}")
+
+    results = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        stats = run_mode(mode, candidates, args.target, args.repeat, encoder)
+        results[mode] = stats
+        print(f"{mode:<8} {statistics.mean(stats['prompt_tokens']):>10.0f} "
+              f"{statistics.mean(stats['output_tokens']):>10.0f} "
+              f"{statistics.median(stats['latency']) * 1000:>8.0f} {max(stats['latency']) * 1000:>8.0f} "
+              f"{statistics.mean(stats['resolved']):>5.1f}/{args.target}")
+
+    if "full" in results and "compact" in results:
+        full, compact = results["full"], results["compact"]
+        for key, name in (("prompt_tokens", "프롬프트 토큰"), ("output_tokens", "출력 토큰"), ("latency", "지연(p50)")):
+            agg = statistics.median if key == "latency" else statistics.mean
+            base = agg(full[key])
+            if base:
+                print(f"{name}: {(1 - agg(compact[key]) / base) * 100:.0f}% 감소")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+후보곡 채점 벤치마크: 기존 행 단위 파이썬 루프 vs services.scoring_engine 벡터화 엔진.
+
+    python -m benchmarks.bench_scoring --songs 100000 --repeat 5
+
+합성 카탈로그 전체에 대해 두 구현의 match_score / matched_criteria가 완전히 같은지 먼저 확인한 뒤
+요청 1건당 소요 시간을 비교합니다. --users N을 주면 N명을 사용자별로 채점할 때와
+score_candidates_batch로 한 번에 채점할 때(야간 재생성 경로)도 비교합니다.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.catalog_service import CatalogSnapshot
+from services.database_service import _score_candidate, _matched_criteria
+from services.scoring_engine import (
+    ScoringIndex, top_k_indices, score_candidates_batch, get_scoring_index, CRITERIA_BITS
+)
+
+GENRES = ["J-pop", "팝", "록", "발라드", "힙합", "인디 팝", "일렉트로 팝", "R&B", "댄스", "트로트",
+          "록, 발라드", "J-pop, 애니메이션", " 발라드", "록 ", None, ""]
+MOODS = ["신나는", "잔잔", "서정적", "강렬", "감성적", "에너지", " 잔잔", None, ""]
+
+
+def build_catalog(n_songs: int, n_artists: int, seed: int) -> CatalogSnapshot:
+    rnd = random.Random(seed)
+    artists = [f"아티스트{i}" for i in range(n_artists)] + [None, ""]
+    songs = {}
+    for sid in range(1, n_songs + 1):
+        songs[sid] = {
+            "song_id": sid,
+            "title_kr": f"제목 {sid}",
+            "title_en": f"Title {sid}",
+            "title_jp": "",
+            "title_yomi": "",
+            "artist_kr": rnd.choice(artists),
+            "artist": f"artist{sid % n_artists}",
+            "genre": rnd.choice(GENRES),
+            "mood": rnd.choice(MOODS),
+            "tj_number": sid,
+            "ky_number": sid,
+        }
+    return CatalogSnapshot(songs, 1, n_songs, None)
+
+
+def legacy_candidates(snapshot, favorite_ids, limit, pg, pm, lg, la):
+    """user-005 이전 get_candidate_songs의 채점 경로 (DB 조회 제외)."""
+    fav = set(favorite_ids)
+    pool = [dict(s) for sid, s in snapshot.songs.items() if sid not in fav]
+    random.shuffle(pool)
+    for s in pool:
+        s["match_score"] = _score_candidate(s, pg, pm, lg, la)
+        s["matched_criteria"] = _matched_criteria(s, pg, pm, lg, la)
+    pool.sort(key=lambda x: x["match_score"], reverse=True)
+    return pool[:limit]
+
+
+def vectorized_candidates(index, favorite_ids, limit, pg, pm, lg, la):
+    scores, bits = index.score_all(pg, pm, lg, la)
+    top = top_k_indices(scores, index.exclusion_mask(favorite_ids), limit)
+    return index.build_rows(top, scores, bits)
+
+
+def verify(snapshot, index, pg, pm, lg, la) -> None:
+    scores, bits = index.score_all(pg, pm, lg, la)
+    for i, row in enumerate(index.rows):
+        expected_score = _score_candidate(row, pg, pm, lg, la)
+        expected_criteria = _matched_criteria(row, pg, pm, lg, la)
+        got_criteria = [name for bit, name in CRITERIA_BITS if int(bits[i]) & bit]
+        if int(scores[i]) != expected_score or got_criteria != expected_criteria:
+            raise AssertionError(f"mismatch at song_id={row['song_id']}: "
+                                 f"{expected_score}/{expected_criteria} != {int(scores[i])}/{got_criteria}")
+
+
+def timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--songs", type=int, default=100_000)
+    parser.add_argument("--artists", type=int, default=5_000)
+    parser.add_argument("--favorites", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--users", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    snapshot = build_catalog(args.songs, args.artists, args.seed)
+    rnd = random.Random(args.seed)
+    favorite_ids = rnd.sample(range(1, args.songs + 1), args.favorites)
+    fav_rows = snapshot.rows(favorite_ids)
+    lg = [s["genre"] for s in fav_rows if s.get("genre")]
+    la = [s["artist_kr"] for s in fav_rows if s.get("artist_kr")]
+    pg, pm = ["발라드", "록"], ["잔잔", "서정적"]
+
+    start = time.perf_counter()
+    index = ScoringIndex(snapshot)
+    build_sec = time.perf_counter() - start
+
+    verify(snapshot, index, pg, pm, lg, la)
+    legacy_top = legacy_candidates(snapshot, favorite_ids, args.limit, pg, pm, lg, la)
+    vector_top = vectorized_candidates(index, favorite_ids, args.limit, pg, pm, lg, la)
+    assert [s["match_score"] for s in legacy_top] == [s["match_score"] for s in vector_top]
+
+    legacy = timed(lambda: legacy_candidates(snapshot, favorite_ids, args.limit, pg, pm, lg, la), args.repeat)
+    vector = timed(lambda: vectorized_candidates(index, favorite_ids, args.limit, pg, pm, lg, la), args.repeat)
+
+    legacy_ms = statistics.median(legacy) * 1000
+    vector_ms = statistics.median(vector) * 1000
+    print(f"catalog: {args.songs} songs, {args.artists} artists, favorites={args.favorites}, limit={args.limit}")
+    print("scores/criteria: identical for every song")
+    print(f"index build (once per catalog version): {build_sec * 1000:.1f} ms")
+    print(f"legacy python loop : median {legacy_ms:8.2f} ms/request")
+    print(f"vectorized engine  : median {vector_ms:8.2f} ms/request")
+    print(f"speedup            : {legacy_ms / vector_ms:.1f}x")
+
+    if args.users:
+        users = []
+        for _ in range(args.users):
+            favs = rnd.sample(range(1, args.songs + 1), args.favorites)
+            rows = snapshot.rows(favs)
+            users.append({
+                "exclude_song_ids": favs,
+                "preferred_genres": rnd.sample(GENRES[:10], 2),
+                "preferred_moods": rnd.sample(MOODS[:6], 2),
+                "like_genres": [s["genre"] for s in rows if s.get("genre")],
+                "like_artists": [s["artist_kr"] for s in rows if s.get("artist_kr")],
+            })
+        get_scoring_index(snapshot)
+
+        def per_user():
+            for u in users:
+                vectorized_candidates(index, u["exclude_song_ids"], args.limit, u["preferred_genres"],
+                                      u["preferred_moods"], u["like_genres"], u["like_artists"])
+
+        batch_results = score_candidates_batch(snapshot, users, args.limit)
+        for u, rows in zip(users, batch_results):
+            expected = vectorized_candidates(index, u["exclude_song_ids"], args.limit, u["preferred_genres"],
+                                             u["preferred_moods"], u["like_genres"], u["like_artists"])
+            assert [r["match_score"] for r in rows] == [r["match_score"] for r in expected]
+
+        per_user_ms = statistics.median(timed(per_user, args.repeat)) * 1000
+        batch_ms = statistics.median(timed(lambda: score_candidates_batch(snapshot, users, args.limit), args.repeat)) * 1000
+        print(f"{args.users} users, one at a time : median {per_user_ms:8.2f} ms")
+        print(f"{args.users} users, batched       : median {batch_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
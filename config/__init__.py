@@ -1,5 +1,5 @@
 from .settings import OPENAI_API_KEY, ELASTICSEARCH_HOSTS, ELASTICSEARCH_INDEX, DB_URI
-from .redis import redis_client, REDIS_TTL, get_redis_client
+from .redis import redis_client, redis_binary_client, REDIS_TTL, get_redis_client
 
 __all__ = [
     "OPENAI_API_KEY",
@@ -7,6 +7,7 @@ __all__ = [
     "ELASTICSEARCH_INDEX",
     "DB_URI",
     "redis_client",
+    "redis_binary_client",
     "REDIS_TTL",
     "get_redis_client"
 ]
@@ -67,6 +67,26 @@ RECOMMEND_PROMPT = PromptTemplate.from_template(
 """
 )
 
+# 추천 프롬프트 (compact): 후보마다 짧은 번호만 주고 번호/분위기/장르만 돌려받음
+RECOMMEND_COMPACT_PROMPT = PromptTemplate.from_template(
+    """역할: 후보 곡 중 사용자에게 맞는 곡을 고르는 추천 엔진.
+
+제약:
+- 곡목록의 번호만 사용. 새로운 곡/번호 생성 금지.
+- 반드시 JSON만 출력. 설명/마크다운 금지.
+- mood/genre는 곡목록에 나온 값만 사용.
+
+취향 요약:
+{user_preference}
+
+곡목록 (번호|제목|아티스트|장르|분위기):
+{song_list}
+
+다음 수를 정확히 선별: {target_count}
+아웃풋 스키마: {{"picks": [[번호, "mood", "genre"]]}}
+"""
+)
+
 GROUP_TAGLINE_PROMPT = PromptTemplate.from_template(
     """
 당신은 노래방 추천 앱의 카피라이터입니다.
@@ -1,5 +1,8 @@
 import os
+import asyncio
+import weakref
 import redis
+import redis.asyncio
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,14 +14,14 @@ REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 REDIS_TTL = 60 * 60 * 24 * 7  # 7일 캐시
 
-def get_redis_client() -> redis.Redis:
-    """Redis 클라이언트를 생성하고 반환합니다."""
+def get_redis_client(decode_responses: bool = True) -> redis.Redis:
+    """Redis 클라이언트를 생성하고 반환합니다. (decode_responses=False면 값을 bytes로 받음)"""
     client = redis.Redis(
         host=REDIS_HOST,
         port=REDIS_PORT,
         password=REDIS_PASSWORD,
         db=REDIS_DB,
-        decode_responses=True,
+        decode_responses=decode_responses,
     )
     
     try:
@@ -30,3 +33,25 @@ def get_redis_client() -> redis.Redis:
 
 # 전역 Redis 클라이언트 인스턴스
 redis_client = get_redis_client()
+# 바이너리 캐시 값(services.cache_codec) 읽기용 클라이언트 - 응답을 str로 디코딩하지 않음
+redis_binary_client = get_redis_client(decode_responses=False)
+
+# 이벤트 루프별 비동기 Redis 클라이언트 (커넥션이 생성된 루프 밖에서는 재사용할 수 없음)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.asyncio.Redis]" = weakref.WeakKeyDictionary()
+_async_binary_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.asyncio.Redis]" = weakref.WeakKeyDictionary()
+
+def get_async_redis_client(decode_responses: bool = True) -> redis.asyncio.Redis:
+    """현재 이벤트 루프용 비동기 Redis 클라이언트를 반환합니다. (FastAPI 라우트 등 async 경로용)"""
+    loop = asyncio.get_running_loop()
+    clients = _async_clients if decode_responses else _async_binary_clients
+    client = clients.get(loop)
+    if client is None:
+        client = redis.asyncio.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD,
+            db=REDIS_DB,
+            decode_responses=decode_responses,
+        )
+        clients[loop] = client
+    return client
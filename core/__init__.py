@@ -1,5 +1,8 @@
-from .recommendation_service import recommend_songs
+from .recommendation_service import recommend_songs, recommend_songs_async, recommend_songs_stream, recommend_songs_batch
 
 __all__ = [
-    "recommend_songs"
+    "recommend_songs",
+    "recommend_songs_async",
+    "recommend_songs_stream",
+    "recommend_songs_batch"
 ]
@@ -0,0 +1,179 @@
+import asyncio
+import os
+from collections import Counter
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from services.ai_service import _analyze_user_preference, _analyze_user_preference_async
+from services.cache_service import (
+    _validated_preference, load_preference_cache, save_preference_cache,
+    load_preference_cache_async, save_preference_cache_async
+)
+from services.catalog_service import get_catalog
+from services.database_service import get_favorite_songs_info
+from utils.helpers import _genre_mood, _safe_strip
+
+load_dotenv()
+
+# 마지막 LLM 분석 시점 대비 장르/분위기/아티스트 분포가 이만큼(total variation distance) 달라지면 다시 분석
+PREFERENCE_DRIFT_THRESHOLD = float(os.getenv("PREFERENCE_DRIFT_THRESHOLD", "0.25"))
+# 좋아요가 이보다 적으면 분포가 불안정하므로 항상 LLM 분석
+PREFERENCE_MIN_FAVORITES = int(os.getenv("PREFERENCE_MIN_FAVORITES", "5"))
+PREFERENCE_TOP_ARTISTS = 5
+
+_DIMENSIONS = ("genres", "moods", "artists")
+# resolve_preference(entry=...) 기본값: 캐시 항목을 직접 조회
+_NOT_LOADED = object()
+
+
+def _song_features(song: dict) -> tuple[str, str, str]:
+    """(대표 장르, 정규화 분위기, 아티스트)"""
+    primary, _, mood = _genre_mood(song)
+    artist = _safe_strip(song.get("artist_kr")) or _safe_strip(song.get("artist"))
+    return primary, mood, artist
+
+
+def build_aggregates(rows: list[dict]) -> dict:
+    """좋아요 곡 row들로 장르/분위기/아티스트 개수를 셉니다."""
+    counters = {dim: Counter() for dim in _DIMENSIONS}
+    for row in rows:
+        for dim, value in zip(_DIMENSIONS, _song_features(row)):
+            if value:
+                counters[dim][value] += 1
+    aggregates = {dim: dict(counter) for dim, counter in counters.items()}
+    aggregates["count"] = len(rows)
+    return aggregates
+
+
+def apply_changes(aggregates: dict, added_rows: list[dict], removed_rows: list[dict]) -> dict:
+    """좋아요 추가/취소분만 반영한 새 집계를 반환합니다. (원본은 수정하지 않음)"""
+    counters = {dim: Counter(aggregates.get(dim) or {}) for dim in _DIMENSIONS}
+    for rows, delta in ((added_rows, 1), (removed_rows, -1)):
+        for row in rows:
+            for dim, value in zip(_DIMENSIONS, _song_features(row)):
+                if value:
+                    counters[dim][value] += delta
+    result = {dim: {k: v for k, v in counter.items() if v > 0} for dim, counter in counters.items()}
+    result["count"] = max(0, aggregates.get("count", 0) + len(added_rows) - len(removed_rows))
+    return result
+
+
+def current_aggregates(entry: Optional[dict], favorite_song_ids: list[int]) -> dict:
+    """
+    캐시 항목의 집계에 좋아요 변경분만 더하고 뺍니다.
+    이전 집계가 없거나 취소된 곡을 카탈로그에서 찾을 수 없으면 전체를 다시 셉니다.
+    """
+    model = (entry or {}).get("model") or {}
+    previous = model.get("aggregates")
+    if previous is not None:
+        old_ids = set(entry.get("favorite_song_ids") or [])
+        new_ids = set(favorite_song_ids)
+        catalog = get_catalog()
+        added = catalog.rows(sorted(new_ids - old_ids))
+        removed_ids = sorted(old_ids - new_ids)
+        removed = catalog.rows(removed_ids)
+        if len(removed) == len(removed_ids):
+            return apply_changes(previous, added, removed)
+    return build_aggregates(get_favorite_songs_info(favorite_song_ids))
+
+
+def _distribution(counts: dict) -> dict:
+    total = sum(counts.values())
+    return {k: v / total for k, v in counts.items()} if total else {}
+
+
+def _total_variation(a: dict, b: dict) -> float:
+    p, q = _distribution(a), _distribution(b)
+    if not p and not q:
+        return 0.0
+    if not p or not q:
+        return 1.0
+    return 0.5 * sum(abs(p.get(k, 0.0) - q.get(k, 0.0)) for k in p.keys() | q.keys())
+
+
+def drift(current: dict, baseline: dict) -> float:
+    """장르/분위기/아티스트 분포 중 가장 많이 변한 쪽의 total variation distance (0~1)"""
+    return max(_total_variation(current.get(dim) or {}, baseline.get(dim) or {}) for dim in _DIMENSIONS)
+
+
+def _top(counts: dict, n: int) -> list[str]:
+    return [k for k, _ in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:n]]
+
+
+def incremental_preference(entry: Optional[dict], aggregates: dict) -> Optional[dict]:
+    """
+    LLM 없이 갱신할 수 있으면 새 취향을 반환하고, 다시 분석해야 하면 None.
+    - 선호 장르/분위기/overall_taste: 마지막 LLM 분석 결과 유지 (분포가 크게 변하지 않았으므로)
+    - favorite_artists: 현재 집계의 빈도순으로 갱신
+    """
+    model = (entry or {}).get("model") or {}
+    baseline = model.get("baseline")
+    preference = (entry or {}).get("preference")
+    if not baseline or not preference or aggregates.get("count", 0) < PREFERENCE_MIN_FAVORITES:
+        return None
+    if drift(aggregates, baseline) > PREFERENCE_DRIFT_THRESHOLD:
+        return None
+
+    updated = dict(preference)
+    artists = _top(aggregates.get("artists") or {}, PREFERENCE_TOP_ARTISTS)
+    if artists:
+        updated["favorite_artists"] = artists
+    return updated
+
+
+def _model_state(aggregates: dict, baseline: dict) -> dict:
+    return {"aggregates": aggregates, "baseline": baseline}
+
+
+def resolve_preference(member_id: Optional[str], favorite_song_ids: list[int], entry: Optional[dict] = _NOT_LOADED,
+                       pipe=None) -> Optional[dict]:
+    """
+    회원의 현재 취향을 구합니다.
+    캐시 적중(좋아요 그대로) → 증분 갱신(분포 변화가 임계값 이하) → LLM 전체 분석 순으로 시도하고 결과를 캐시에 저장합니다.
+    entry: 미리 읽어 둔 취향 캐시 항목 (load_preference_cache_many), pipe: 캐시 저장 명령을 쌓을 파이프라인/배처
+    """
+    if not favorite_song_ids:
+        return None
+    if entry is _NOT_LOADED:
+        entry = load_preference_cache(member_id) if member_id else None
+    cached = _validated_preference(entry, favorite_song_ids)
+    if cached:
+        return cached
+
+    aggregates = current_aggregates(entry, favorite_song_ids)
+    preference = incremental_preference(entry, aggregates)
+    if preference is not None:
+        if member_id:
+            save_preference_cache(member_id, favorite_song_ids, preference,
+                                  _model_state(aggregates, entry["model"]["baseline"]), pipe=pipe)
+        return preference
+
+    preference = _analyze_user_preference(get_favorite_songs_info(favorite_song_ids))
+    if preference and member_id:
+        save_preference_cache(member_id, favorite_song_ids, preference, _model_state(aggregates, aggregates), pipe=pipe)
+    return preference
+
+
+async def resolve_preference_async(member_id: Optional[str], favorite_song_ids: list[int]) -> Optional[dict]:
+    """resolve_preference의 비동기 버전"""
+    if not favorite_song_ids:
+        return None
+    entry = await load_preference_cache_async(member_id) if member_id else None
+    cached = _validated_preference(entry, favorite_song_ids)
+    if cached:
+        return cached
+
+    aggregates = await asyncio.to_thread(current_aggregates, entry, favorite_song_ids)
+    preference = incremental_preference(entry, aggregates)
+    if preference is not None:
+        if member_id:
+            await save_preference_cache_async(member_id, favorite_song_ids, preference,
+                                              _model_state(aggregates, entry["model"]["baseline"]))
+        return preference
+
+    favorite_songs = await asyncio.to_thread(get_favorite_songs_info, favorite_song_ids)
+    preference = await _analyze_user_preference_async(favorite_songs)
+    if preference and member_id:
+        await save_preference_cache_async(member_id, favorite_song_ids, preference, _model_state(aggregates, aggregates))
+    return preference
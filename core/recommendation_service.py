@@ -1,86 +1,104 @@
+import asyncio
+import os
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from random import sample
-import re
-from services.database_service import get_favorite_songs_info, get_candidate_songs, get_songs_by_artists
-from services.ai_service import _analyze_user_preference, _ai_recommend_songs, _make_tagline
-from utils.helpers import _get_title_artist
-
-PRIMARY_GENRES = {"J-pop","팝","록","발라드","힙합","인디 팝","일렉트로 팝"}
-MOOD_MAP = {"에너지":"신나는","강렬":"강렬","감성적":"서정적","잔잔":"잔잔"}
-_PAREN_RE = re.compile(r"\s*[\(\[（【].*?[\)\]）】]\s*")
-
-def _normalize_genre(g: str) -> tuple[str, list[str]]:
-    if not g: return "", []
-    parts = [p.strip() for p in g.split(",") if p.strip()]
-    primary = next((p for p in parts if p in PRIMARY_GENRES), parts[0] if parts else "")
-    return primary, parts
-
-def _normalize_mood(m: str) -> str:
-    return MOOD_MAP.get(m, m or "")
-
-def _norm(s: str) -> str:
-    if not s: return ""
-    s = s.lower().strip()
-    s = _PAREN_RE.sub(" ", s)
-    s = re.sub(r"[^0-9a-z가-힣ぁ-ゔァ-ヴー一-龥\s]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-def _safe_strip(value: str | None) -> str:
-    """Safely strip a string, handling None values"""
-    return (value or "").strip()
+from services.database_service import get_candidate_songs, get_candidate_songs_batch, get_songs_by_artists
+from services.ai_service import (
+    _ai_recommend_songs, _make_taglines, _ai_recommend_songs_async, _make_taglines_async,
+    _iter_taglines_async
+)
+from core.preference_model import resolve_preference, resolve_preference_async
+from utils.helpers import _get_title_artist, _safe_strip, _norm, _match_keys, _genre_mood
+
+# 배치 추천에서 동시에 처리하는 사용자 수 (사용자별 취향 분석/선곡 LLM 호출을 겹쳐서 실행)
+BATCH_USER_CONCURRENCY = int(os.getenv("BATCH_USER_CONCURRENCY", "8"))
 
 def _soft_match(a: str, b: str) -> bool:
     a, b = _norm(a), _norm(b)
     if not a or not b: return False
     return a == b or a in b or b in a or a.startswith(b) or b.startswith(a)
 
+class _CandidateMatchIndex:
+    """
+    후보 리스트당 한 번 만드는 매칭 인덱스.
+    - by_id: song_id → 후보 위치 (compact 선곡 결과는 song_id로 바로 조회)
+    - exact: (제목, 아티스트) 완전 일치 → 후보 위치들 (후보 순서 유지)
+    - soft_titles / soft_artists: 정규화 문자열 → 후보 위치들 (부분 일치는 이 키들만 훑음, 정규식 재실행 없음)
+    """
+
+    def __init__(self, candidate_songs: list[dict]):
+        self.songs = candidate_songs
+        self.by_id: dict[int, int] = {}
+        self.exact: dict[tuple[str, str], list[int]] = {}
+        self.soft_titles: dict[str, set[int]] = {}
+        self.soft_artists: dict[str, set[int]] = {}
+
+        for pos, song in enumerate(candidate_songs):
+            self.by_id.setdefault(song.get("song_id"), pos)
+            titles, artists, norm_titles, norm_artists = _match_keys(song)
+            for t in set(titles):
+                for a in set(artists):
+                    self.exact.setdefault((t, a), []).append(pos)
+            for t in norm_titles:
+                if t:
+                    self.soft_titles.setdefault(t, set()).add(pos)
+            for a in norm_artists:
+                if a:
+                    self.soft_artists.setdefault(a, set()).add(pos)
+
+    def _available(self, pos: int, used_ids: set) -> bool:
+        return self.songs[pos].get("song_id") not in used_ids
+
+    def find_by_id(self, song_id, used_ids: set):
+        pos = self.by_id.get(song_id)
+        if pos is not None and self._available(pos, used_ids):
+            return self.songs[pos]
+        return None
+
+    def find_exact(self, title: str, artist: str, used_ids: set):
+        for pos in self.exact.get((title, artist), ()):
+            if self._available(pos, used_ids):
+                return self.songs[pos]
+        return None
+
+    @staticmethod
+    def _soft_positions(index: dict[str, set[int]], query: str) -> set[int]:
+        # _soft_match와 동일: 같거나, 한쪽이 다른 쪽을 포함
+        hits = set(index.get(query, ()))
+        for key, positions in index.items():
+            if query in key or key in query:
+                hits |= positions
+        return hits
+
+    def find_soft(self, title: str, artist: str, used_ids: set):
+        q_title, q_artist = _norm(title), _norm(artist)
+        if not q_title or not q_artist:
+            return None
+        title_hits = self._soft_positions(self.soft_titles, q_title)
+        if not title_hits:
+            return None
+        hits = title_hits & self._soft_positions(self.soft_artists, q_artist)
+        for pos in sorted(hits):
+            if self._available(pos, used_ids):
+                return self.songs[pos]
+        return None
+
 def _match_ai_recommendations_with_db(ai_recs: list[dict], candidate_songs: list[dict]) -> list[dict]:
-    """AI 추천 결과와 DB의 실제 노래 정보를 매칭 (완전/유사 일치)"""
+    """AI 추천 결과와 DB의 실제 노래 정보를 매칭 (song_id 조회 → 완전/유사 일치)"""
     matched_songs = []
     used_ids = set()
+    index = _CandidateMatchIndex(candidate_songs)
 
     for ai_rec in ai_recs:
         ai_title = _safe_strip(ai_rec.get("title")) or _safe_strip(ai_rec.get("title_kr"))
         ai_artist = _safe_strip(ai_rec.get("artist_kr"))
-        found = None
 
-        for db_song in candidate_songs:
-            if db_song.get("song_id") in used_ids: 
-                continue
-            db_titles = [
-                _safe_strip(db_song.get("title_kr")),
-                _safe_strip(db_song.get("title_en")),
-                _safe_strip(db_song.get("title_jp")),
-                _safe_strip(db_song.get("title_yomi"))
-            ]
-            db_artists = [
-                _safe_strip(db_song.get("artist_kr")),
-                _safe_strip(db_song.get("artist"))
-            ]
-            
-            if ai_title in db_titles and ai_artist in db_artists:
-                found = db_song
-                break
-                
+        found = index.find_by_id(ai_rec["song_id"], used_ids) if ai_rec.get("song_id") is not None else None
         if not found:
-            for db_song in candidate_songs:
-                if db_song.get("song_id") in used_ids: 
-                    continue
-                title_match = any(_soft_match(ai_title, db_title) for db_title in [
-                    db_song.get("title_kr") or "",
-                    db_song.get("title_en") or "",
-                    db_song.get("title_jp") or "",
-                    db_song.get("title_yomi") or ""
-                ])
-                artist_match = any(_soft_match(ai_artist, db_artist) for db_artist in [
-                    db_song.get("artist_kr") or "",
-                    db_song.get("artist") or ""
-                ])
-                
-                if title_match and artist_match:
-                    found = db_song
-                    break
+            found = index.find_exact(ai_title, ai_artist, used_ids)
+        if not found:
+            found = index.find_soft(ai_title, ai_artist, used_ids)
 
         if found:
             used_ids.add(found.get("song_id"))
@@ -185,8 +203,28 @@ def _autogen_reason(song: dict) -> str:
     if not reasons and song.get("match_score",0) > 0: reasons.append("취향 요소와 부분 일치")
     return " · ".join(reasons) or "분위기와 조화로운 곡"
 
-def _build_grouped_payload(recs: list[dict], favorite_song_ids: list[int] = None, user_preference: dict = None) -> list[dict]:
-    """그룹화된 추천곡 payload 생성 (동적+병합+중복 제거)"""
+def _fill_taglines(groups: list[dict], user_preference: dict = None) -> list[dict]:
+    """"_tagline_job"이 남아 있는 그룹들의 태그라인을 한 번에(동시에) 생성해 채웁니다."""
+    pending = [g for g in groups if "_tagline_job" in g]
+    taglines = _make_taglines([g.pop("_tagline_job") for g in pending], user_preference)
+    for group, tagline in zip(pending, taglines):
+        group["tagline"] = tagline
+    return groups
+
+async def _fill_taglines_async(groups: list[dict], user_preference: dict = None) -> list[dict]:
+    """_fill_taglines의 비동기 버전"""
+    pending = [g for g in groups if "_tagline_job" in g]
+    taglines = await _make_taglines_async([g.pop("_tagline_job") for g in pending], user_preference)
+    for group, tagline in zip(pending, taglines):
+        group["tagline"] = tagline
+    return groups
+
+def _build_grouped_payload(recs: list[dict], favorite_song_ids: list[int] = None, user_preference: dict = None,
+                           fill_taglines: bool = True) -> list[dict]:
+    """
+    그룹화된 추천곡 payload 생성 (동적+병합+중복 제거)
+    fill_taglines=False면 태그라인 대신 "_tagline_job"을 남겨 두고, 호출자가 _fill_taglines로 모아서 생성
+    """
     grouped = _group_songs_dynamic(recs)
     grouped = _merge_small_groups(grouped, min_size=3)
     grouped = _dedupe_groups(grouped)
@@ -201,6 +239,7 @@ def _build_grouped_payload(recs: list[dict], favorite_song_ids: list[int] = None
                 continue
             title_jp, title_kr, title_en, title_yomi, artist, artist_kr = _get_title_artist(s)
             norm_songs.append({
+                "song_id": s.get("song_id"),
                 "title_jp": title_jp,
                 "title_kr": title_kr,
                 "title_en": title_en,
@@ -211,12 +250,14 @@ def _build_grouped_payload(recs: list[dict], favorite_song_ids: list[int] = None
                 "ky_number": s.get("ky_number"),
             })
         if norm_songs:
-            tagline = _make_tagline(label, norm_songs, user_preference)
             payload.append({
                 "label": label,
                 "songs": norm_songs,
-                "tagline": tagline
+                "tagline": None,
+                "_tagline_job": (label, norm_songs, f"{label}의 매력적인 선곡 🎵")
             })
+    if fill_taglines:
+        _fill_taglines(payload, user_preference)
     return payload
 
 def _normalize_candidates_for_cache(candidates: list[dict]) -> list[dict]:
@@ -242,16 +283,57 @@ def _normalize_candidates_for_cache(candidates: list[dict]) -> list[dict]:
         })
     return normalized
 
-def recommend_songs(favorite_song_ids: list[int], cached_preference: dict = None) -> dict:
-    """메인 추천 함수"""
+def _prepare_candidates(candidate_songs: list[dict]) -> list[dict]:
+    for s in candidate_songs:
+        s["genre"], s["sub_genres"], s["mood"] = _genre_mood(s)
+        if not s.get("reason"): s["reason"] = _autogen_reason(s)
+    return candidate_songs
+
+def _resolve_ai_recommendations(ai_recommended: list[dict], candidate_songs: list[dict]) -> list[dict]:
+    """LLM 선곡을 후보 row와 매칭 (LLM 결과가 없으면 점수순 상위 20곡)"""
+    if ai_recommended:
+        return _match_ai_recommendations_with_db(ai_recommended, candidate_songs)
+    candidate_songs.sort(key=lambda x: x.get("match_score", 0), reverse=True)
+    return candidate_songs[:20]
+
+def _append_artist_groups(groups_payload: list[dict], artist_groups: dict) -> list[dict]:
+    for label, group_data in artist_groups.items():
+        groups_payload.append({
+            "label": label,
+            "songs": group_data["songs"],
+            "tagline": group_data["tagline"],
+            "_tagline_job": group_data["_tagline_job"]
+        })
+    return groups_payload
+
+def _preference_filters(user_preference: dict) -> dict:
+    return {
+        "preferred_genres": user_preference.get("preferred_genres") if user_preference else None,
+        "preferred_moods": user_preference.get("preferred_moods") if user_preference else None,
+    }
+
+def _resolve_preference(member_id: str | None, favorite_song_ids: list[int], cached_preference: dict = None,
+                        **resolve_kwargs) -> dict:
+    """전달된 취향이 없으면 취향 캐시 → 증분 갱신 → LLM 분석 순으로 구함 (core.preference_model)"""
+    if cached_preference:
+        return cached_preference
+    return resolve_preference(member_id, favorite_song_ids, **resolve_kwargs)
+
+async def _resolve_preference_async(member_id: str | None, favorite_song_ids: list[int], cached_preference: dict = None) -> dict:
+    """_resolve_preference의 비동기 버전"""
+    if cached_preference:
+        return cached_preference
+    return await resolve_preference_async(member_id, favorite_song_ids)
+
+def recommend_songs(favorite_song_ids: list[int], cached_preference: dict = None, candidate_songs: list[dict] = None,
+                    member_id: str = None) -> dict:
+    """
+    메인 추천 함수
+    candidate_songs: 미리 계산된 후보(recommend_songs_batch). 주어지면 cached_preference를 그대로 사용
+    member_id: 주어지면 취향 캐시를 조회/저장 (좋아요 분포가 크게 바뀌었을 때만 취향 분석 LLM 호출)
+    """
     if not favorite_song_ids:
-        candidate_songs = get_candidate_songs([], limit=100)
-        for s in candidate_songs:
-            pg, subs = _normalize_genre(s.get("genre",""))
-            s["genre"] = pg
-            s["sub_genres"] = subs
-            s["mood"] = _normalize_mood(s.get("mood",""))
-            if not s.get("reason"): s["reason"] = _autogen_reason(s)
+        candidate_songs = _prepare_candidates(get_candidate_songs([], limit=100))
         recommended = sample(candidate_songs, min(20, len(candidate_songs)))
         groups_payload = _build_grouped_payload(recommended, [])
         return {
@@ -259,47 +341,32 @@ def recommend_songs(favorite_song_ids: list[int], cached_preference: dict = None
             "candidates": _normalize_candidates_for_cache(candidate_songs)
         }
 
-    favorite_songs = get_favorite_songs_info(favorite_song_ids)
-    user_preference = cached_preference or _analyze_user_preference(favorite_songs)
-
-    candidate_songs = get_candidate_songs(
-        favorite_song_ids,
-        limit=100,
-        preferred_genres=user_preference.get("preferred_genres") if user_preference else None,
-        preferred_moods=user_preference.get("preferred_moods") if user_preference else None
-    )
+    if candidate_songs is None:
+        user_preference = _resolve_preference(member_id, favorite_song_ids, cached_preference)
+        candidate_songs = get_candidate_songs(favorite_song_ids, limit=100, **_preference_filters(user_preference))
+    else:
+        user_preference = cached_preference
     if not candidate_songs:
         return {"error": "추천할 노래를 찾지 못했습니다."}
 
-    for s in candidate_songs:
-        pg, subs = _normalize_genre(s.get("genre",""))
-        s["genre"] = pg
-        s["sub_genres"] = subs
-        s["mood"] = _normalize_mood(s.get("mood",""))
-        if not s.get("reason"): s["reason"] = _autogen_reason(s)
-
+    _prepare_candidates(candidate_songs)
     ai_recommended = _ai_recommend_songs(candidate_songs, user_preference, target_count=20)
-    if ai_recommended:
-        ai_recommended = _match_ai_recommendations_with_db(ai_recommended, candidate_songs)
-    else:
-        candidate_songs.sort(key=lambda x: x.get("match_score", 0), reverse=True)
-        ai_recommended = candidate_songs[:20]
+    ai_recommended = _resolve_ai_recommendations(ai_recommended, candidate_songs)
 
-    groups_payload = _build_grouped_payload(ai_recommended, favorite_song_ids, user_preference)
+    groups_payload = _build_grouped_payload(ai_recommended, favorite_song_ids, user_preference, fill_taglines=False)
     
     if user_preference:
         artist_groups = _build_artist_based_groups(
             user_preference, 
             exclude_song_ids=favorite_song_ids,
             per_artist=5,
-            max_artists=2
+            max_artists=2,
+            fill_taglines=False
         )
-        for label, group_data in artist_groups.items():
-            groups_payload.append({
-                "label": label,
-                "songs": group_data["songs"],
-                "tagline": group_data["tagline"]
-            })
+        _append_artist_groups(groups_payload, artist_groups)
+    
+    # 동적 그룹 + 아티스트 그룹 태그라인을 한 번에 동시 생성
+    _fill_taglines(groups_payload, user_preference)
 
     return {
         "groups": groups_payload,
@@ -308,10 +375,187 @@ def recommend_songs(favorite_song_ids: list[int], cached_preference: dict = None
         "favorite_song_ids": favorite_song_ids or []
     }
 
-def _build_artist_based_groups(user_preference: dict, exclude_song_ids: list[int], per_artist:int = 5, max_artists:int = 2) -> dict[str, list[dict]]:
+async def recommend_songs_async(favorite_song_ids: list[int], cached_preference: dict = None, member_id: str = None) -> dict:
+    """
+    recommend_songs의 비동기 버전 (FastAPI 라우트용)
+    - LLM 호출은 ainvoke, 태그라인 캐시는 비동기 Redis 사용
+    - 카탈로그 조회/채점(스냅샷 갱신 시 DB 접근 포함)은 스레드로 넘겨 이벤트 루프를 막지 않음
+    """
+    if not favorite_song_ids:
+        candidate_songs = _prepare_candidates(await asyncio.to_thread(get_candidate_songs, [], 100))
+        recommended = sample(candidate_songs, min(20, len(candidate_songs)))
+        groups_payload = _build_grouped_payload(recommended, [], fill_taglines=False)
+        await _fill_taglines_async(groups_payload)
+        return {
+            "groups": groups_payload,
+            "candidates": _normalize_candidates_for_cache(candidate_songs)
+        }
+
+    user_preference = await _resolve_preference_async(member_id, favorite_song_ids, cached_preference)
+    candidate_songs = await asyncio.to_thread(
+        get_candidate_songs, favorite_song_ids, 100, **_preference_filters(user_preference)
+    )
+    if not candidate_songs:
+        return {"error": "추천할 노래를 찾지 못했습니다."}
+
+    _prepare_candidates(candidate_songs)
+    ai_recommended = await _ai_recommend_songs_async(candidate_songs, user_preference, target_count=20)
+    ai_recommended = _resolve_ai_recommendations(ai_recommended, candidate_songs)
+
+    groups_payload = _build_grouped_payload(ai_recommended, favorite_song_ids, user_preference, fill_taglines=False)
+
+    if user_preference:
+        artist_groups = await asyncio.to_thread(
+            _build_artist_based_groups, user_preference, favorite_song_ids, 5, 2, False
+        )
+        _append_artist_groups(groups_payload, artist_groups)
+
+    await _fill_taglines_async(groups_payload, user_preference)
+
+    return {
+        "groups": groups_payload,
+        "candidates": _normalize_candidates_for_cache(candidate_songs),
+        "preference": user_preference,
+        "favorite_song_ids": favorite_song_ids or []
+    }
+
+async def _stream_groups(groups: list[dict], user_preference: dict = None, offset: int = 0):
+    """태그라인이 준비되는 순서대로 그룹 이벤트를 내보냅니다. index는 최종 그룹 순서(offset부터)"""
+    jobs = [g.pop("_tagline_job") for g in groups]
+    async for i, tagline in _iter_taglines_async(jobs, user_preference):
+        groups[i]["tagline"] = tagline
+        yield {"event": "group", "index": offset + i, "group": groups[i]}
+
+async def recommend_songs_stream(favorite_song_ids: list[int], cached_preference: dict = None, member_id: str = None):
+    """
+    recommend_songs_async를 단계별 이벤트로 나눠 내보내는 비동기 제너레이터 (/recommend/stream용)
+    - {"event": "candidates"}: 후보곡 채점 직후 (LLM 호출 전)
+    - {"event": "group"}: 동적 그룹마다 태그라인이 준비되는 즉시, 그다음 아티스트 그룹
+    - {"event": "done"}: 마지막. 그룹 순서는 각 group 이벤트의 index
+    실패 시 {"event": "error"}를 내보내고 끝냅니다.
+    """
+    if not favorite_song_ids:
+        candidate_songs = _prepare_candidates(await asyncio.to_thread(get_candidate_songs, [], 100))
+        yield {"event": "candidates", "candidates": _normalize_candidates_for_cache(candidate_songs)}
+        recommended = sample(candidate_songs, min(20, len(candidate_songs)))
+        groups_payload = _build_grouped_payload(recommended, [], fill_taglines=False)
+        async for event in _stream_groups(groups_payload):
+            yield event
+        yield {"event": "done", "favorite_song_ids": [], "group_count": len(groups_payload)}
+        return
+
+    user_preference = await _resolve_preference_async(member_id, favorite_song_ids, cached_preference)
+    candidate_songs = await asyncio.to_thread(
+        get_candidate_songs, favorite_song_ids, 100, **_preference_filters(user_preference)
+    )
+    if not candidate_songs:
+        yield {"event": "error", "detail": "추천할 노래를 찾지 못했습니다."}
+        return
+
+    _prepare_candidates(candidate_songs)
+    yield {"event": "candidates", "candidates": _normalize_candidates_for_cache(candidate_songs)}
+
+    # 아티스트 그룹 조회는 LLM 선곡과 동시에 진행
+    artist_task = None
+    if user_preference:
+        artist_task = asyncio.create_task(asyncio.to_thread(
+            _build_artist_based_groups, user_preference, favorite_song_ids, 5, 2, False
+        ))
+    try:
+        ai_recommended = await _ai_recommend_songs_async(candidate_songs, user_preference, target_count=20)
+        ai_recommended = _resolve_ai_recommendations(ai_recommended, candidate_songs)
+
+        groups_payload = _build_grouped_payload(ai_recommended, favorite_song_ids, user_preference, fill_taglines=False)
+        async for event in _stream_groups(groups_payload, user_preference):
+            yield event
+
+        artist_payload = _append_artist_groups([], await artist_task) if artist_task else []
+        async for event in _stream_groups(artist_payload, user_preference, offset=len(groups_payload)):
+            yield event
+    finally:
+        if artist_task and not artist_task.done():
+            artist_task.cancel()
+
+    yield {
+        "event": "done",
+        "favorite_song_ids": favorite_song_ids,
+        "group_count": len(groups_payload) + len(artist_payload),
+    }
+
+def _map_users(fn, items: list[tuple], max_concurrency: int) -> list:
+    """items마다 fn(*item)을 최대 max_concurrency개 스레드로 실행하고 입력 순서대로 결과를 반환 (fn은 예외를 직접 처리)"""
+    workers = max(1, min(max_concurrency, len(items)))
+    if workers == 1:
+        return [fn(*item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-user") as executor:
+        return list(executor.map(lambda item: fn(*item), items))
+
+def recommend_songs_batch(users: list[tuple[str, list[int], dict]], preference_entries: dict = None,
+                          pipe=None, max_concurrency: int = None) -> dict[str, dict]:
+    """
+    여러 사용자 추천을 한 번에 생성합니다. (야간 재생성/워밍용)
+    users: [(member_id, favorite_song_ids, cached_preference 또는 None), ...]
+    - 취향은 전달된 값이 없으면 취향 캐시 → 증분 갱신 → LLM 분석 순으로 구해 캐시에 저장
+      preference_entries: 미리 MGET한 취향 캐시 항목 {member_id: entry}, pipe: 취향 캐시 저장 명령을 쌓을 배처
+    - 후보곡 채점은 get_candidate_songs_batch로 전체 사용자를 행렬 연산 한 번에 처리
+    - 사용자별 취향 분석 / 선곡·태그라인 LLM 호출은 max_concurrency(BATCH_USER_CONCURRENCY)명씩 동시에 실행
+    반환: {member_id: recommend_songs 결과 (실패 시 {"error": ...})}
+    """
+    max_concurrency = max_concurrency or BATCH_USER_CONCURRENCY
+    results: dict[str, dict] = {}
+
+    def _preference(member_id: str, favorite_song_ids: list[int], cached_preference: dict):
+        try:
+            resolve_kwargs = {"pipe": pipe}
+            if preference_entries is not None:
+                resolve_kwargs["entry"] = preference_entries.get(member_id)
+            return _resolve_preference(member_id, favorite_song_ids, cached_preference, **resolve_kwargs), None
+        except Exception as e:
+            return None, e
+
+    liked = [user for user in users if user[1]]
+    scoring_users, scoring_inputs = [], []
+    for (member_id, favorite_song_ids, _), (preference, error) in zip(liked, _map_users(_preference, liked, max_concurrency)):
+        if error is not None:
+            results[member_id] = {"error": f"취향 분석 실패: {error}"}
+            continue
+        scoring_users.append((member_id, favorite_song_ids, preference))
+        scoring_inputs.append({
+            "favorite_song_ids": favorite_song_ids,
+            "preferred_genres": preference.get("preferred_genres") if preference else None,
+            "preferred_moods": preference.get("preferred_moods") if preference else None,
+        })
+
+    candidates_per_user = get_candidate_songs_batch(scoring_inputs, limit=100) if scoring_inputs else []
+    candidates_by_member = {
+        member_id: candidates
+        for (member_id, _, _), candidates in zip(scoring_users, candidates_per_user)
+    }
+    preference_by_member = {member_id: preference for member_id, _, preference in scoring_users}
+
+    def _recommend(member_id: str, favorite_song_ids: list[int]) -> dict:
+        try:
+            if member_id in candidates_by_member:
+                return recommend_songs(
+                    favorite_song_ids,
+                    preference_by_member[member_id],
+                    candidate_songs=candidates_by_member[member_id],
+                )
+            return recommend_songs(favorite_song_ids)
+        except Exception as e:
+            return {"error": str(e)}
+
+    pending = [(member_id, favorite_song_ids) for member_id, favorite_song_ids, _ in users if member_id not in results]
+    for (member_id, _), result in zip(pending, _map_users(_recommend, pending, max_concurrency)):
+        results[member_id] = result
+    return results
+
+def _build_artist_based_groups(user_preference: dict, exclude_song_ids: list[int], per_artist:int = 5, max_artists:int = 2,
+                               fill_taglines: bool = True) -> dict[str, list[dict]]:
     """
     취향분석 결과의 favorite_artists에서 상위 1~2명 선별 → 각 가수의 대표곡 모음 그룹 생성
     exclude_song_ids: 이미 선택/좋아요 등으로 제외할 곡 ID
+    fill_taglines=False면 태그라인은 비워 두고 "_tagline_job"만 담아 반환
     반환 형식: { "아티스트명 추천": [ {...song...}, ... ], ... }
     """
     if not user_preference:
@@ -334,16 +578,13 @@ def _build_artist_based_groups(user_preference: dict, exclude_song_ids: list[int
             continue
 
         label = f"{artist} 추천"
-        samples = songs[:3]
-        try:
-            tagline = _make_tagline(artist, samples, user_preference)
-        except Exception:
-            tagline = f"{artist} 인기곡 추천 🎤"
+        tagline_job = (artist, songs[:3], f"{artist} 인기곡 추천 🎤")
 
         normalized_songs = []
         for s in songs:
             title_jp, title_kr, title_en, title_yomi, artist, artist_kr = _get_title_artist(s)
             normalized_songs.append({
+                "song_id": s.get("song_id"),
                 "title_kr": title_kr,
                 "title_en": title_en,
                 "title_jp": title_jp,
@@ -358,7 +599,10 @@ def _build_artist_based_groups(user_preference: dict, exclude_song_ids: list[int
         
         groups[label] = {
             "songs": normalized_songs,
-            "tagline": tagline
+            "tagline": None,
+            "_tagline_job": tagline_job
         }
 
+    if fill_taglines:
+        _fill_taglines(list(groups.values()), user_preference)
     return groups
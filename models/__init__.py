@@ -1,4 +1,6 @@
-from .data_models import UserPreference, RecommendedSong, RecommendationResponse
+from .data_models import (
+    UserPreference, RecommendedSong, RecommendationResponse, CompactPick, CompactRecommendationResponse
+)
 from .api_models import (
     RecommendationRequest,
     FavoriteUpdate,
@@ -11,6 +13,8 @@ __all__ = [
     "UserPreference",
     "RecommendedSong", 
     "RecommendationResponse",
+    "CompactPick",
+    "CompactRecommendationResponse",
     # API models
     "RecommendationRequest",
     "FavoriteUpdate",
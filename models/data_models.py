@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 
 class UserPreference(BaseModel):
@@ -22,3 +22,21 @@ class RecommendedSong(BaseModel):
 
 class RecommendationResponse(BaseModel):
     recommended_songs: List[RecommendedSong] = Field(default_factory=list)
+
+class CompactPick(BaseModel):
+    """compact 선곡 응답의 한 항목: [번호, mood, genre] 배열 또는 같은 키의 객체"""
+    index: int
+    mood: Optional[str] = ""
+    genre: Optional[str] = ""
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_array(cls, v):
+        if isinstance(v, (list, tuple)):
+            return dict(zip(("index", "mood", "genre"), v))
+        if isinstance(v, dict) and "index" not in v and "id" in v:
+            return {**v, "index": v["id"]}
+        return v
+
+class CompactRecommendationResponse(BaseModel):
+    picks: List[CompactPick] = Field(default_factory=list)
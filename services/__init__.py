@@ -1,10 +1,18 @@
 from .database_service import (
     get_db_connection,
     get_candidate_songs,
+    get_candidate_songs_batch,
     get_favorite_songs_info,
     get_all_active_users_with_favorites,
+    iter_active_users_with_favorites,
+    iter_active_user_chunks,
     get_songs_by_artists
 )
+from .db_pool import get_pool, get_pool_stats
+from .catalog_service import (
+    get_catalog,
+    refresh_catalog
+)
 from .ai_service import (
     _analyze_user_preference,
     _ai_recommend_songs,
@@ -15,17 +23,40 @@ from .cache_service import (
     load_preference_cache,
     load_recommendation_cache,
     save_recommendation_cache,
+    load_recommendation_cache_async,
+    save_recommendation_cache_async,
     clear_user_cache,
-    get_cache_stats
+    get_cache_stats,
+    get_recommendation_cache_tier_stats
+)
+from .local_cache import (
+    LocalBytesCache,
+    get_local_cache,
+    publish_invalidation
+)
+from .cache_maintenance import (
+    scan_unlink,
+    clear_family,
+    rebuild_index,
+    rebuild_indexes_once,
+    prune_indexes
 )
 
 __all__ = [
     # Database services
     "get_db_connection",
     "get_candidate_songs", 
+    "get_candidate_songs_batch",
     "get_favorite_songs_info",
     "get_all_active_users_with_favorites",
+    "iter_active_users_with_favorites",
+    "iter_active_user_chunks",
     "get_songs_by_artists",
+    "get_pool",
+    "get_pool_stats",
+    # Catalog snapshot
+    "get_catalog",
+    "refresh_catalog",
     # AI services
     "_analyze_user_preference",
     "_ai_recommend_songs",
@@ -35,6 +66,19 @@ __all__ = [
     "load_preference_cache", 
     "load_recommendation_cache",
     "save_recommendation_cache",
+    "load_recommendation_cache_async",
+    "save_recommendation_cache_async",
     "clear_user_cache",
-    "get_cache_stats"
+    "get_cache_stats",
+    "get_recommendation_cache_tier_stats",
+    # Local cache tier
+    "LocalBytesCache",
+    "get_local_cache",
+    "publish_invalidation",
+    # Cache maintenance
+    "scan_unlink",
+    "clear_family",
+    "rebuild_index",
+    "rebuild_indexes_once",
+    "prune_indexes"
 ]
@@ -1,14 +1,26 @@
+import os
 import json
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
 from random import sample
-from langchain_openai import ChatOpenAI
-from config.settings import OPENAI_API_KEY
-from config.prompts import RECOMMEND_PROMPT, ANALYZE_PREFERENCE_PROMPT
+from config.prompts import RECOMMEND_PROMPT, RECOMMEND_COMPACT_PROMPT, ANALYZE_PREFERENCE_PROMPT
 from pydantic import ValidationError
-from models.data_models import UserPreference, RecommendationResponse
+from models.data_models import UserPreference, RecommendationResponse, CompactRecommendationResponse
+from services.llm_client import get_llm
+from services.tagline_cache import (
+    representative_songs, tagline_cache_key,
+    get_cached_tagline, store_tagline, get_cached_tagline_async, store_tagline_async
+)
 
 logger = logging.getLogger(__name__)
 
+# 한 요청에서 동시에 생성할 태그라인 수 / 전체 태그라인 생성 제한 시간
+TAGLINE_MAX_CONCURRENCY = int(os.getenv("TAGLINE_MAX_CONCURRENCY", "6"))
+TAGLINE_DEADLINE_SEC = float(os.getenv("TAGLINE_DEADLINE_SEC", "8"))
+# 후보곡 선곡 프롬프트 형식: full(전체 제목/아티스트를 되받아 매칭) | compact(번호만 되받아 바로 조회)
+RECOMMEND_PROMPT_MODE = os.getenv("RECOMMEND_PROMPT_MODE", "full")
+
 def _get_title_artist_for_tagline(song: dict) -> tuple[str, str]:
     title_kr = song.get("title_kr") or ""
     title_en = song.get("title_en") or ""
@@ -20,102 +32,177 @@ def _get_title_artist_for_tagline(song: dict) -> tuple[str, str]:
     artist_name = artist_kr.strip() or artist.strip() or "Unknown Artist"
     return title, artist_name
 
-def _analyze_user_preference(favorite_songs: list[dict]) -> dict:
-    if not favorite_songs:
-        return None
+def _strip_code_fence(content: str) -> str:
+    response = content.strip()
+    if "```" in response:
+        response = response.split("```")[1]
+    return response
+
+# --- 취향 분석 ---
 
+def _preference_inputs(favorite_songs: list[dict]) -> dict:
     favorites_text = "\n".join([
         f"- {song.get('title_kr', 'Unknown')}/{song.get('title_en', '')}/{song.get('title_yomi', '')} by {song.get('artist_kr', 'Unknown')}/{song.get('artist', '')} "
         f"(장르: {song.get('genre', 'Unknown')}, 분위기: {song.get('mood', 'Unknown')})"
         for song in favorite_songs
     ])
+    return {"favorites": favorites_text}
 
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.3,
-        max_tokens=500,
-        openai_api_key=OPENAI_API_KEY
-    )
+def _parse_preference(response) -> dict:
+    if not response or not response.content:
+        return None
 
-    analyze_chain = ANALYZE_PREFERENCE_PROMPT | llm
+    content = response.content
+    if content is None:
+        logger.warning("OpenAI API returned response with None content in _analyze_user_preference")
+        return None
     try:
-        response = analyze_chain.invoke({"favorites": favorites_text})
-        
-        if not response or not response.content:
-            return None
-            
-        content = response.content
-        if content is None:
-            logger.warning("OpenAI API returned response with None content in _analyze_user_preference")
-            return None
-        response = content.strip()
-        if "```" in response:
-            response = response.split("```")[1]
-        result = json.loads(response)
+        result = json.loads(_strip_code_fence(content))
         validated = UserPreference(**result)
         return validated.dict()
     except (json.JSONDecodeError, ValidationError) as e:
         logger.error(f"Failed to parse user preference analysis: {e}")
         return None
 
-def _ai_recommend_songs(candidate_songs: list[dict], user_preference: dict, target_count: int = 20) -> list[dict]:
-    if not candidate_songs:
-        return []
+def _preference_chain():
+    return ANALYZE_PREFERENCE_PROMPT | get_llm(model="gpt-4o-mini", temperature=0.3, max_tokens=500)
 
-    song_list_text = "\n".join([
-        f"{i+1}.{song.get('title_kr', 'Unknown')}/{song.get('title_en', '')}/{song.get('title_yomi', '')}-{song.get('artist_kr', 'Unknown')}/{song.get('artist', '')}({song.get('genre', 'Unknown')},{song.get('mood', 'Unknown')})"
-        for i, song in enumerate(candidate_songs)
-    ])
+def _analyze_user_preference(favorite_songs: list[dict]) -> dict:
+    if not favorite_songs:
+        return None
+    response = _preference_chain().invoke(_preference_inputs(favorite_songs))
+    return _parse_preference(response)
 
-    preference_text = "없음"
-    if user_preference:
-        preference_text = f"""
+async def _analyze_user_preference_async(favorite_songs: list[dict]) -> dict:
+    """_analyze_user_preference의 비동기 버전 (ainvoke)"""
+    if not favorite_songs:
+        return None
+    response = await _preference_chain().ainvoke(_preference_inputs(favorite_songs))
+    return _parse_preference(response)
+
+# --- 후보곡 중 AI 선곡 ---
+
+def _preference_text(user_preference: dict) -> str:
+    if not user_preference:
+        return "없음"
+    return f"""
         - 선호 장르: {', '.join(user_preference.get('preferred_genres', []))}
         - 선호 분위기: {', '.join(user_preference.get('preferred_moods', []))}
         - 전체 취향: {user_preference.get('overall_taste', '')}
         """
 
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.7,
-        max_tokens=2000,
-        openai_api_key=OPENAI_API_KEY
-    )
+def _recommend_inputs(candidate_songs: list[dict], user_preference: dict, target_count: int) -> dict:
+    song_list_text = "\n".join([
+        f"{i+1}.{song.get('title_kr', 'Unknown')}/{song.get('title_en', '')}/{song.get('title_yomi', '')}-{song.get('artist_kr', 'Unknown')}/{song.get('artist', '')}({song.get('genre', 'Unknown')},{song.get('mood', 'Unknown')})"
+        for i, song in enumerate(candidate_songs)
+    ])
 
-    recommend_chain = RECOMMEND_PROMPT | llm
+    allowed_genres = sorted({s.get('genre') for s in candidate_songs if s.get('genre')})
+    allowed_moods = sorted({s.get('mood') for s in candidate_songs if s.get('mood')})
+    return {
+        "user_preference": _preference_text(user_preference),
+        "song_list": song_list_text,
+        "target_count": target_count,
+        "allowed_genres": ", ".join(allowed_genres),
+        "allowed_moods": ", ".join(allowed_moods),
+    }
+
+def _compact_field(value) -> str:
+    # 구분자(|)와 줄바꿈이 곡 한 줄 형식을 깨지 않도록 정리
+    return (value or "").replace("|", "/").replace("\n", " ").strip()
+
+def _recommend_compact_inputs(candidate_songs: list[dict], user_preference: dict, target_count: int) -> dict:
+    lines = []
+    for i, song in enumerate(candidate_songs):
+        title, artist = _get_title_artist_for_tagline(song)
+        lines.append("|".join([
+            str(i + 1), _compact_field(title), _compact_field(artist),
+            _compact_field(song.get("genre")), _compact_field(song.get("mood"))
+        ]))
+    return {
+        "user_preference": _preference_text(user_preference),
+        "song_list": "\n".join(lines),
+        "target_count": target_count,
+    }
+
+def _fallback_recommendations(candidate_songs: list[dict], target_count: int) -> list[dict]:
+    return sample(candidate_songs, min(target_count, len(candidate_songs)))
+
+def _parse_recommendations(response, candidate_songs: list[dict], target_count: int) -> list[dict]:
+    if not response or not response.content:
+        return _fallback_recommendations(candidate_songs, target_count)
+
+    content = response.content
+    if content is None:
+        logger.warning("OpenAI API returned response with None content in _ai_recommend_songs")
+        return _fallback_recommendations(candidate_songs, target_count)
     try:
-        allowed_genres = sorted({s.get('genre') for s in candidate_songs if s.get('genre')})
-        allowed_moods = sorted({s.get('mood') for s in candidate_songs if s.get('mood')})
-
-        response = recommend_chain.invoke({
-            "user_preference": preference_text,
-            "song_list": song_list_text,
-            "target_count": target_count,
-            "allowed_genres": ", ".join(allowed_genres),
-            "allowed_moods": ", ".join(allowed_moods),
-        })
-        
-        if not response or not response.content:
-            return sample(candidate_songs, min(target_count, len(candidate_songs)))
-            
-        content = response.content
-        if content is None:
-            logger.warning("OpenAI API returned response with None content in _ai_recommend_songs")
-            return sample(candidate_songs, min(target_count, len(candidate_songs)))
-        response = content.strip()
-        if "```" in response:
-            response = response.split("```")[1]
-        result = json.loads(response)
+        result = json.loads(_strip_code_fence(content))
         validated = RecommendationResponse(**result)
         return [song.dict() for song in validated.recommended_songs]
     except (json.JSONDecodeError, ValidationError) as e:
         logger.error(f"Failed to parse AI recommendation response: {e}")
-        return sample(candidate_songs, min(target_count, len(candidate_songs)))
+        return _fallback_recommendations(candidate_songs, target_count)
+
+def _parse_compact_recommendations(response, candidate_songs: list[dict], target_count: int) -> list[dict]:
+    """
+    compact 응답 {"picks": [[번호, mood, genre], ...]}을 후보 row로 바꿉니다.
+    번호로 바로 조회하므로 song_id가 그대로 붙어 나가고, 범위 밖/중복 번호는 버립니다.
+    """
+    if not response or not response.content:
+        return _fallback_recommendations(candidate_songs, target_count)
+    try:
+        result = CompactRecommendationResponse(**json.loads(_strip_code_fence(response.content)))
+    except (json.JSONDecodeError, ValidationError, TypeError) as e:
+        logger.error(f"Failed to parse compact AI recommendation response: {e}")
+        return _fallback_recommendations(candidate_songs, target_count)
+
+    recs, seen = [], set()
+    for pick in result.picks:
+        if pick.index in seen or not 1 <= pick.index <= len(candidate_songs):
+            continue
+        seen.add(pick.index)
+        song = candidate_songs[pick.index - 1]
+        rec = song.copy()
+        rec["mood"] = pick.mood or song.get("mood", "")
+        rec["genre"] = pick.genre or song.get("genre", "")
+        rec["reason"] = ""
+        recs.append(rec)
+    return recs or _fallback_recommendations(candidate_songs, target_count)
+
+def _recommend_chain():
+    return RECOMMEND_PROMPT | get_llm(model="gpt-4o-mini", temperature=0.7, max_tokens=2000)
 
-def _make_tagline(label: str, songs: list[dict], user_preference: dict = None) -> str:
+def _recommend_compact_chain():
+    return RECOMMEND_COMPACT_PROMPT | get_llm(model="gpt-4o-mini", temperature=0.7, max_tokens=600)
+
+def _recommend_mode(mode: str = None):
+    """(chain, 입력 생성, 파서) 묶음. mode가 없으면 RECOMMEND_PROMPT_MODE"""
+    if (mode or RECOMMEND_PROMPT_MODE) == "compact":
+        return _recommend_compact_chain(), _recommend_compact_inputs, _parse_compact_recommendations
+    return _recommend_chain(), _recommend_inputs, _parse_recommendations
+
+def _ai_recommend_songs(candidate_songs: list[dict], user_preference: dict, target_count: int = 20,
+                        mode: str = None) -> list[dict]:
+    if not candidate_songs:
+        return []
+    chain, inputs, parse = _recommend_mode(mode)
+    response = chain.invoke(inputs(candidate_songs, user_preference, target_count))
+    return parse(response, candidate_songs, target_count)
+
+async def _ai_recommend_songs_async(candidate_songs: list[dict], user_preference: dict, target_count: int = 20,
+                                    mode: str = None) -> list[dict]:
+    """_ai_recommend_songs의 비동기 버전 (ainvoke)"""
+    if not candidate_songs:
+        return []
+    chain, inputs, parse = _recommend_mode(mode)
+    response = await chain.ainvoke(inputs(candidate_songs, user_preference, target_count))
+    return parse(response, candidate_songs, target_count)
+
+# --- 그룹 태그라인 ---
+
+def _tagline_prompt(label: str, reps: list[dict], user_preference: dict = None) -> str:
     from config.prompts import GROUP_TAGLINE_PROMPT
-    from random import sample as rsample
-    reps = rsample(songs, k=min(3, len(songs)))
     sample_txt = " / ".join(
         f"{_get_title_artist_for_tagline(s)[0]} - {_get_title_artist_for_tagline(s)[1]}" for s in reps
     )
@@ -126,31 +213,161 @@ def _make_tagline(label: str, songs: list[dict], user_preference: dict = None) -
         genres = ", ".join(user_preference.get("preferred_genres", []))
         pref_keywords = f"(취향: {moods} | {genres})"
 
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=1.0,
-        max_tokens=50,
-        openai_api_key=OPENAI_API_KEY
+    return GROUP_TAGLINE_PROMPT.format(
+        label=f"{label} {pref_keywords}",
+        sample_songs=sample_txt
     )
 
+def _parse_tagline(llm_response, label: str) -> str | None:
+    if not llm_response or not llm_response.content:
+        logger.warning(f"OpenAI API returned empty response for tagline generation (label: {label})")
+        return None
+    response = llm_response.content.strip()
+
+    tagline = response.strip('"').strip("'").strip()
+    if '\n' in tagline:
+        tagline = tagline.split('\n')[0].strip()
+
+    tagline = tagline.lstrip('- ').lstrip('• ').lstrip('* ').strip()
+
+    return tagline or None
+
+def _tagline_llm():
+    return get_llm(model="gpt-4o-mini", temperature=1.0, max_tokens=50)
+
+def _generate_tagline(label: str, reps: list[dict], user_preference: dict = None) -> str | None:
+    """LLM으로 태그라인 하나를 생성합니다. 실패/빈 응답이면 None."""
+    try:
+        return _parse_tagline(_tagline_llm().invoke(_tagline_prompt(label, reps, user_preference)), label)
+    except Exception as e:
+        logger.error(f"Failed to generate tagline for label '{label}': {e}")
+        return None
+
+async def _generate_tagline_async(label: str, reps: list[dict], user_preference: dict = None) -> str | None:
+    """_generate_tagline의 비동기 버전 (ainvoke)"""
     try:
-        prompt_text = GROUP_TAGLINE_PROMPT.format(
-            label=f"{label} {pref_keywords}",
-            sample_songs=sample_txt
-        )
-        llm_response = llm.invoke(prompt_text)
-        if not llm_response or not llm_response.content:
-            logger.warning(f"OpenAI API returned empty response for tagline generation (label: {label})")
-            return f"{label}의 매력적인 선곡 🎵"
-        response = llm_response.content.strip()
-        
-        tagline = response.strip('"').strip("'").strip()
-        if '\n' in tagline:
-            tagline = tagline.split('\n')[0].strip()
-        
-        tagline = tagline.lstrip('- ').lstrip('• ').lstrip('* ').strip()
-        
-        return tagline if tagline else f"{label}의 매력적인 선곡 🎵"
+        return _parse_tagline(await _tagline_llm().ainvoke(_tagline_prompt(label, reps, user_preference)), label)
     except Exception as e:
         logger.error(f"Failed to generate tagline for label '{label}': {e}")
-        return f"{label}의 매력적인 선곡 🎵"
\ No newline at end of file
+        return None
+
+def _make_tagline(label: str, songs: list[dict], user_preference: dict = None, fallback: str = None) -> str:
+    """
+    그룹 태그라인. (라벨, 취향 키워드, 대표곡) 기준으로 캐시된 변형이 충분하면 그중 하나를 쓰고,
+    아니면 LLM으로 새 변형을 만들어 캐시에 추가합니다. 실패 시 fallback 문구(캐시하지 않음).
+    """
+    fallback = fallback or f"{label}의 매력적인 선곡 🎵"
+    reps = representative_songs(songs)
+    key = tagline_cache_key(label, reps, user_preference)
+
+    cached = get_cached_tagline(key)
+    if cached:
+        return cached
+
+    tagline = _generate_tagline(label, reps, user_preference)
+    if not tagline:
+        return fallback
+    store_tagline(key, tagline)
+    return tagline
+
+async def _make_tagline_async(label: str, songs: list[dict], user_preference: dict = None, fallback: str = None) -> str:
+    """_make_tagline의 비동기 버전"""
+    fallback = fallback or f"{label}의 매력적인 선곡 🎵"
+    reps = representative_songs(songs)
+    key = tagline_cache_key(label, reps, user_preference)
+
+    cached = await get_cached_tagline_async(key)
+    if cached:
+        return cached
+
+    tagline = await _generate_tagline_async(label, reps, user_preference)
+    if not tagline:
+        return fallback
+    await store_tagline_async(key, tagline)
+    return tagline
+
+def _make_taglines(jobs: list[tuple[str, list[dict], str]], user_preference: dict = None,
+                   max_concurrency: int = None, deadline_sec: float = None) -> list[str]:
+    """
+    여러 그룹의 태그라인을 동시에 생성합니다.
+    jobs: [(label, songs, fallback), ...] — 제한 시간 안에 끝나지 않거나 실패한 그룹은 fallback 사용
+    반환: jobs 순서대로 태그라인
+    """
+    if not jobs:
+        return []
+    max_concurrency = max_concurrency or TAGLINE_MAX_CONCURRENCY
+    deadline_sec = TAGLINE_DEADLINE_SEC if deadline_sec is None else deadline_sec
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(jobs))), thread_name_prefix="tagline")
+    try:
+        futures = [executor.submit(_make_tagline, label, songs, user_preference, fallback)
+                   for label, songs, fallback in jobs]
+        wait(futures, timeout=deadline_sec)
+        taglines = []
+        for (label, _, fallback), future in zip(jobs, futures):
+            if not future.done():
+                logger.warning(f"Tagline generation missed the {deadline_sec:.1f}s deadline (label: {label})")
+                taglines.append(fallback)
+            elif future.exception() is not None:
+                logger.error(f"Failed to generate tagline for label '{label}': {future.exception()}")
+                taglines.append(fallback)
+            else:
+                taglines.append(future.result() or fallback)
+        return taglines
+    finally:
+        # 늦은 호출은 기다리지 않음 (아직 시작 전인 작업은 취소)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def _iter_taglines_async(jobs: list[tuple[str, list[dict], str]], user_preference: dict = None,
+                               max_concurrency: int = None, deadline_sec: float = None):
+    """
+    태그라인을 동시에 생성하면서 끝나는 순서대로 (jobs 인덱스, 태그라인)을 내보냅니다.
+    제한 시간이 지나면 남은 작업은 취소하고 fallback 문구를 내보냅니다. (중간에 소비를 멈춰도 남은 작업은 취소)
+    """
+    if not jobs:
+        return
+    semaphore = asyncio.Semaphore(max_concurrency or TAGLINE_MAX_CONCURRENCY)
+    deadline_sec = TAGLINE_DEADLINE_SEC if deadline_sec is None else deadline_sec
+
+    async def run(label: str, songs: list[dict], fallback: str) -> str:
+        async with semaphore:
+            return await _make_tagline_async(label, songs, user_preference, fallback)
+
+    tasks = {asyncio.create_task(run(label, songs, fallback)): i for i, (label, songs, fallback) in enumerate(jobs)}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_sec
+    pending = set(tasks)
+    try:
+        while pending:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                i = tasks[task]
+                label, _, fallback = jobs[i]
+                if task.exception() is not None:
+                    logger.error(f"Failed to generate tagline for label '{label}': {task.exception()}")
+                    yield i, fallback
+                else:
+                    yield i, task.result() or fallback
+        for task in pending:
+            label, _, fallback = jobs[tasks[task]]
+            if task.done() and task.exception() is None:
+                yield tasks[task], task.result() or fallback
+                continue
+            task.cancel()
+            logger.warning(f"Tagline generation missed the {deadline_sec:.1f}s deadline (label: {label})")
+            yield tasks[task], fallback
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+async def _make_taglines_async(jobs: list[tuple[str, list[dict], str]], user_preference: dict = None,
+                               max_concurrency: int = None, deadline_sec: float = None) -> list[str]:
+    """_make_taglines의 비동기 버전 (스레드 대신 세마포어로 동시 호출 수 제한)"""
+    taglines = [fallback for _, _, fallback in jobs]
+    async for i, tagline in _iter_taglines_async(jobs, user_preference, max_concurrency, deadline_sec):
+        taglines[i] = tagline
+    return taglines
@@ -0,0 +1,138 @@
+import json
+import os
+from typing import Any, Optional, Union
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+try:
+    import ormsgpack as _msgpack
+
+    def _msgpack_dumps(obj: Any) -> bytes:
+        return _msgpack.packb(obj)
+
+    def _msgpack_loads(raw: bytes) -> Any:
+        return _msgpack.unpackb(raw)
+except ImportError:
+    try:
+        import msgpack as _msgpack
+
+        def _msgpack_dumps(obj: Any) -> bytes:
+            return _msgpack.packb(obj, use_bin_type=True)
+
+        def _msgpack_loads(raw: bytes) -> Any:
+            return _msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    except ImportError:
+        _msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 캐시 값 인코딩: "{직렬화}[+zstd]" (json | orjson | msgpack). 의존성이 없으면 가능한 조합으로 내려감
+CACHE_CODEC = os.getenv("CACHE_CODEC", "msgpack+zstd")
+CACHE_ZSTD_LEVEL = int(os.getenv("CACHE_ZSTD_LEVEL", "3"))
+
+# 헤더: MAGIC(2) + 버전(1) + 형식(1). 형식 = 직렬화 ID | (압축이면 _ZSTD_FLAG)
+# 헤더가 없는 값은 이전 형식(json.dumps 텍스트)으로 읽습니다.
+_MAGIC = b"\xc7C"
+_VERSION = 1
+_ZSTD_FLAG = 0x80
+
+_JSON, _ORJSON, _MSGPACK = 1, 2, 3
+_SERIALIZER_IDS = {"json": _JSON, "orjson": _ORJSON, "msgpack": _MSGPACK}
+
+
+def _available(serializer_id: int) -> bool:
+    return serializer_id == _JSON or (serializer_id == _ORJSON and orjson is not None) \
+        or (serializer_id == _MSGPACK and _msgpack is not None)
+
+
+def _dumps(serializer_id: int, obj: Any) -> bytes:
+    if serializer_id == _ORJSON:
+        return orjson.dumps(obj)
+    if serializer_id == _MSGPACK:
+        return _msgpack_dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(serializer_id: int, raw: bytes) -> Any:
+    if serializer_id == _ORJSON:
+        return orjson.loads(raw)
+    if serializer_id == _MSGPACK:
+        return _msgpack_loads(raw)
+    return json.loads(raw)
+
+
+class CacheCodec:
+    """
+    버전 헤더가 붙은 캐시 값 코덱.
+    encode는 설정된 형식으로 쓰고, decode는 헤더를 보고 형식을 고르므로 설정을 바꿔도 기존 값은 그대로 읽힙니다.
+    """
+
+    def __init__(self, spec: str = None, zstd_level: int = None):
+        spec = (spec or CACHE_CODEC).lower()
+        name, _, compression = spec.partition("+")
+        serializer_id = _SERIALIZER_IDS.get(name, _JSON)
+        if not _available(serializer_id):
+            print(f"[CODEC] {name} not installed, falling back to json")
+            serializer_id = _JSON
+        compress = compression == "zstd"
+        if compress and zstandard is None:
+            print("[CODEC] zstandard not installed, storing uncompressed")
+            compress = False
+
+        self.serializer_id = serializer_id
+        self.compress = compress
+        self.zstd_level = CACHE_ZSTD_LEVEL if zstd_level is None else zstd_level
+        self.spec = next(k for k, v in _SERIALIZER_IDS.items() if v == serializer_id) + ("+zstd" if compress else "")
+        self._header = _MAGIC + bytes([_VERSION, serializer_id | (_ZSTD_FLAG if compress else 0)])
+
+    def encode(self, obj: Any) -> bytes:
+        body = _dumps(self.serializer_id, obj)
+        if self.compress:
+            # ZstdCompressor는 스레드 간 공유 불가 → 호출마다 생성 (생성 비용은 압축 대비 작음)
+            body = zstandard.ZstdCompressor(level=self.zstd_level).compress(body)
+        return self._header + body
+
+    @staticmethod
+    def decode(raw: Optional[Union[bytes, str]]) -> Any:
+        """헤더 있는 값 / 이전 JSON 텍스트(bytes 또는 str) 모두 읽습니다. 없으면 None"""
+        if raw is None:
+            return None
+        if isinstance(raw, str):
+            return json.loads(raw)
+        if not raw.startswith(_MAGIC):
+            return json.loads(raw.decode("utf-8"))
+
+        version, fmt = raw[2], raw[3]
+        if version != _VERSION:
+            raise ValueError(f"unsupported cache codec version: {version}")
+        body = raw[4:]
+        if fmt & _ZSTD_FLAG:
+            if zstandard is None:
+                raise ValueError("zstandard is required to read this cache entry")
+            body = zstandard.ZstdDecompressor().decompress(body)
+        serializer_id = fmt & ~_ZSTD_FLAG
+        if not _available(serializer_id):
+            raise ValueError(f"serializer {serializer_id} is required to read this cache entry")
+        return _loads(serializer_id, body)
+
+
+# 프로세스 기본 코덱 (CACHE_CODEC)
+default_codec = CacheCodec()
+
+
+def encode_cache_value(obj: Any) -> bytes:
+    return default_codec.encode(obj)
+
+
+def decode_cache_value(raw: Optional[Union[bytes, str]]) -> Any:
+    return CacheCodec.decode(raw)
@@ -0,0 +1,138 @@
+import os
+import time
+from typing import Dict, Iterable, List
+
+from dotenv import load_dotenv
+
+from config.redis import redis_client
+from services.local_cache import publish_invalidation, INVALIDATE_ALL
+
+load_dotenv()
+
+# SCAN 한 번에 훑는 키 수(힌트) / UNLINK 파이프라인 한 번에 보내는 키 수
+CACHE_SCAN_COUNT = int(os.getenv("CACHE_SCAN_COUNT", "1000"))
+CACHE_UNLINK_BATCH = int(os.getenv("CACHE_UNLINK_BATCH", "500"))
+
+# 캐시 종류별 키 패턴 (삭제/인덱스 재구성 때 SCAN으로 훑음)
+CACHE_FAMILIES: Dict[str, tuple] = {
+    "recommendation": ("recommend:*", "recommend_meta:*"),
+    "preference": ("preference:*", "pref:*"),
+}
+# 종류별 대표 키 접두사 (인덱스에 member_id를 올리는 키)
+_PRIMARY_PREFIX = {
+    "recommendation": "recommend:",
+    "preference": "preference:",
+}
+
+# 캐시 인덱스: cache_index:{family} sorted set, member = member_id, score = 만료 시각(epoch 초)
+# 만료 시각이 지난 항목은 세지 않으므로 TTL로 사라진 키 때문에 개수가 틀어지지 않음
+_INDEX_PREFIX = "cache_index:"
+# 인덱스 도입 전에 쓰인 키를 인덱스에 반영했다는 표시 (지우면 다음 정리 작업에서 다시 만듦)
+_INDEX_BUILT_KEY = f"{_INDEX_PREFIX}built"
+
+
+def _index_key(family: str) -> str:
+    return f"{_INDEX_PREFIX}{family}"
+
+
+def index_add(pipe, family: str, member_id: str, ttl_sec: int) -> None:
+    """캐시를 쓰는 파이프라인에 인덱스 갱신을 함께 넣습니다. (동기/비동기 파이프라인 모두 사용 가능)"""
+    pipe.zadd(_index_key(family), {str(member_id): time.time() + ttl_sec})
+
+
+def index_remove(pipe, family: str, *member_ids: str) -> None:
+    if member_ids:
+        pipe.zrem(_index_key(family), *[str(m) for m in member_ids])
+
+
+def indexed_count(family: str) -> int:
+    """만료되지 않은 캐시 항목 수 (ZCOUNT, 키스페이스를 훑지 않음)"""
+    return redis_client.zcount(_index_key(family), time.time(), "+inf")
+
+
+def prune_indexes() -> int:
+    """인덱스에서 이미 만료된 항목을 지웁니다. 지운 수를 반환."""
+    pipe = redis_client.pipeline()
+    for family in CACHE_FAMILIES:
+        pipe.zremrangebyscore(_index_key(family), "-inf", time.time())
+    return sum(pipe.execute())
+
+
+def _unlink_batch(keys: List[str]) -> int:
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.unlink(key)
+    return sum(pipe.execute())
+
+
+def scan_unlink(patterns: Iterable[str], batch_size: int = None) -> int:
+    """
+    패턴에 맞는 키를 SCAN으로 훑으며 batch_size개씩 파이프라인 UNLINK로 지웁니다. 지운 키 수를 반환.
+    (KEYS + 거대한 DELETE 한 번과 달리 Redis를 오래 막지 않고, 값 해제는 백그라운드에서 처리)
+    """
+    batch_size = batch_size or CACHE_UNLINK_BATCH
+    deleted = 0
+    batch: List[str] = []
+    for pattern in patterns:
+        for key in redis_client.scan_iter(match=pattern, count=CACHE_SCAN_COUNT):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += _unlink_batch(batch)
+                batch = []
+    if batch:
+        deleted += _unlink_batch(batch)
+    return deleted
+
+
+def clear_family(family: str) -> int:
+    """캐시 종류 하나를 통째로 지웁니다. (인덱스 포함) 지운 캐시 키 수를 반환."""
+    deleted = scan_unlink(CACHE_FAMILIES[family])
+    redis_client.unlink(_index_key(family))
+    # 모든 프로세스의 로컬 캐시도 비움
+    publish_invalidation(redis_client, family, INVALIDATE_ALL)
+    return deleted
+
+
+def rebuild_index(family: str) -> int:
+    """
+    SCAN + TTL 파이프라인으로 인덱스를 다시 만듭니다. (인덱스 도입 전에 쓰인 키 반영 / 운영 중 점검용)
+    인덱스에 올린 항목 수를 반환.
+    """
+    prefix = _PRIMARY_PREFIX[family]
+    index_key = _index_key(family)
+    redis_client.unlink(index_key)
+    indexed = 0
+    batch: List[str] = []
+
+    def _flush(keys: List[str]) -> int:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.ttl(key)
+        now = time.time()
+        entries = {key[len(prefix):]: now + ttl for key, ttl in zip(keys, pipe.execute()) if ttl and ttl > 0}
+        if entries:
+            redis_client.zadd(index_key, entries)
+        return len(entries)
+
+    for key in redis_client.scan_iter(match=f"{prefix}*", count=CACHE_SCAN_COUNT):
+        batch.append(key)
+        if len(batch) >= CACHE_UNLINK_BATCH:
+            indexed += _flush(batch)
+            batch = []
+    if batch:
+        indexed += _flush(batch)
+    return indexed
+
+
+def rebuild_indexes_once() -> Dict[str, int]:
+    """
+    모든 종류의 인덱스를 처음 한 번만 rebuild_index로 다시 만듭니다. 종류별로 올린 항목 수를 반환.
+    이미 만들었거나 다른 프로세스가 만드는 중이면 빈 dict (_INDEX_BUILT_KEY로 판단)
+    """
+    if not redis_client.set(_INDEX_BUILT_KEY, "1", nx=True):
+        return {}
+    try:
+        return {family: rebuild_index(family) for family in CACHE_FAMILIES}
+    except Exception:
+        redis_client.delete(_INDEX_BUILT_KEY)
+        raise
@@ -1,70 +1,394 @@
+import asyncio
 import json
+import threading
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from config.redis import redis_client, REDIS_TTL
+from config.redis import redis_client, redis_binary_client, get_async_redis_client, REDIS_TTL
+from utils.helpers import favorites_fingerprint, _get_title_artist, _genre_mood
+from services.catalog_service import current_catalog_fingerprint, get_catalog
+from services.cache_maintenance import index_add, index_remove, indexed_count
+from services.cache_codec import encode_cache_value, decode_cache_value
+from services.local_cache import get_local_cache, publish_invalidation
 
-def save_preference_cache(member_id: str, favorite_song_ids: List[int], preference: dict) -> None:
-    """사용자 취향 정보를 캐시에 저장합니다."""
+# 취향 캐시: preference:{member_id} 하나로 통일 (pref:{member_id}는 이전 형식, 읽기만 지원)
+PREFERENCE_KEY_PREFIX = "preference:"
+LEGACY_PREFERENCE_KEY_PREFIX = "pref:"
+# 추천 캐시 메타: 생성 당시 좋아요 지문 / 카탈로그 지문 (야간 재생성에서 바뀐 사용자만 고를 때 사용)
+RECOMMEND_META_PREFIX = "recommend_meta:"
+# recommend:{member_id} 값은 services.cache_codec으로 인코딩 (CACHE_CODEC, 이전 JSON 텍스트도 읽기 지원)
+# 항목 형식 2: 곡은 song_id + 사용자별 필드만 저장하고, 제목/가수/번호 등은 읽을 때 카탈로그 스냅샷에서 채움
+# ("format" 키가 없는 항목은 곡 정보를 통째로 담은 이전 형식 → 그대로 반환)
+RECOMMEND_ENTRY_FORMAT = 2
+# 후보곡에서 사용자마다 다른 필드 (저장 순서: [song_id, *_CANDIDATE_USER_FIELDS])
+_CANDIDATE_USER_FIELDS = ("recommendation_type", "matched_criteria", "match_score", "reason")
+# 그룹 곡에서 카탈로그로 다시 채울 수 있는 필드 (이 밖의 필드가 있으면 이전 형식으로 저장)
+_GROUP_SONG_FIELDS = frozenset((
+    "song_id", "title_jp", "title_kr", "title_en", "title_yomi", "artist", "artist_kr",
+    "genre", "mood", "tj_number", "ky_number",
+))
+# /recommend/cached 등 반복 조회용 프로세스 내 캐시 (recommend:{member_id} 값 bytes, 쓰기 시 pub/sub로 무효화)
+_recommend_local = get_local_cache("recommendation")
+_recommend_stats_lock = threading.Lock()
+_recommend_stats = {"redis_hits": 0, "redis_misses": 0, "errors": 0}
+
+def _preference_payload(favorite_song_ids: List[int], preference: dict, model: Optional[dict] = None) -> str:
+    payload = {
+        "favorite_song_ids": favorite_song_ids or [],
+        "favorites_fingerprint": favorites_fingerprint(favorite_song_ids),
+        "preference": preference or {},
+        "generated_date": datetime.now().strftime("%Y-%m-%d"),
+    }
+    if model:
+        # 증분 취향 모델 상태 (core.preference_model)
+        payload["model"] = model
+    return json.dumps(payload, ensure_ascii=False)
+
+def _parse_preference_entry(raw: Optional[str]) -> Optional[dict]:
+    return json.loads(raw) if raw else None
+
+def _validated_preference(entry: Optional[dict], favorite_song_ids: List[int]) -> Optional[dict]:
+    """캐시 항목의 좋아요 지문이 현재 좋아요 목록과 같을 때만 취향을 반환합니다."""
+    if not entry:
+        return None
+    fingerprint = entry.get("favorites_fingerprint") or favorites_fingerprint(entry.get("favorite_song_ids", []))
+    if fingerprint != favorites_fingerprint(favorite_song_ids):
+        return None
+    return entry.get("preference") or None
+
+def save_preference_cache(member_id: str, favorite_song_ids: List[int], preference: dict, model: Optional[dict] = None,
+                          pipe=None) -> None:
+    """
+    사용자 취향 정보를 캐시에 저장합니다. model: 증분 취향 모델 상태(집계/기준 집계)
+    pipe: 주어지면 명령만 쌓고 전송은 호출자가 함 (파이프라인 / RedisWriteBatcher)
+    """
     try:
-        today = datetime.now().strftime("%Y-%m-%d")
-        payload = {
-            "favorite_song_ids": favorite_song_ids or [],
-            "preference": preference or {},
-            "generated_date": today,
-        }
-        redis_client.setex(f"pref:{member_id}", REDIS_TTL, json.dumps(payload, ensure_ascii=False))
+        own = pipe is None
+        pipe = redis_client.pipeline() if own else pipe
+        pipe.setex(f"{PREFERENCE_KEY_PREFIX}{member_id}", REDIS_TTL, _preference_payload(favorite_song_ids, preference, model))
+        pipe.delete(f"{LEGACY_PREFERENCE_KEY_PREFIX}{member_id}")
+        index_add(pipe, "preference", member_id, REDIS_TTL)
+        if own:
+            pipe.execute()
     except Exception as e:
         print(f"[CACHE] save_preference_cache error: {e}")
 
 def load_preference_cache(member_id: str) -> Optional[dict]:
-    """사용자 취향 정보를 캐시에서 로드합니다."""
+    """사용자 취향 캐시 항목을 로드합니다. (이전 pref: 키도 조회)"""
     try:
-        raw = redis_client.get(f"pref:{member_id}")
+        raw = redis_client.get(f"{PREFERENCE_KEY_PREFIX}{member_id}")
         if not raw:
-            return None
-        return json.loads(raw)
+            raw = redis_client.get(f"{LEGACY_PREFERENCE_KEY_PREFIX}{member_id}")
+        return _parse_preference_entry(raw)
     except Exception as e:
         print(f"[CACHE] load_preference_cache error: {e}")
         return None
 
-def load_recommendation_cache(member_id: str) -> Optional[dict]:
-    """사용자 추천 결과를 캐시에서 로드합니다."""
+def load_preference_cache_many(member_ids: List[str]) -> Dict[str, Optional[dict]]:
+    """여러 사용자의 취향 캐시 항목을 MGET으로 한 번에 로드합니다. (없는 사용자만 이전 pref: 키를 한 번 더 MGET)"""
+    member_ids = list(member_ids)
+    if not member_ids:
+        return {}
+    try:
+        raws = dict(zip(member_ids, redis_client.mget([f"{PREFERENCE_KEY_PREFIX}{m}" for m in member_ids])))
+        missing = [m for m, raw in raws.items() if not raw]
+        if missing:
+            raws.update(zip(missing, redis_client.mget([f"{LEGACY_PREFERENCE_KEY_PREFIX}{m}" for m in missing])))
+        return {m: _parse_preference_entry(raw) for m, raw in raws.items()}
+    except Exception as e:
+        print(f"[CACHE] load_preference_cache_many error: {e}")
+        return {m: None for m in member_ids}
+
+def get_cached_preference(member_id: str, favorite_song_ids: List[int]) -> Optional[dict]:
+    """좋아요 목록이 그대로인 사용자의 캐시된 취향을 반환합니다. (없거나 바뀌었으면 None)"""
+    return _validated_preference(load_preference_cache(member_id), favorite_song_ids)
+
+async def save_preference_cache_async(member_id: str, favorite_song_ids: List[int], preference: dict, model: Optional[dict] = None) -> None:
+    """save_preference_cache의 비동기 버전"""
     try:
-        raw = redis_client.get(f"recommend:{member_id}")
+        pipe = get_async_redis_client().pipeline()
+        pipe.setex(f"{PREFERENCE_KEY_PREFIX}{member_id}", REDIS_TTL, _preference_payload(favorite_song_ids, preference, model))
+        pipe.delete(f"{LEGACY_PREFERENCE_KEY_PREFIX}{member_id}")
+        index_add(pipe, "preference", member_id, REDIS_TTL)
+        await pipe.execute()
+    except Exception as e:
+        print(f"[CACHE] save_preference_cache_async error: {e}")
+
+async def load_preference_cache_async(member_id: str) -> Optional[dict]:
+    """load_preference_cache의 비동기 버전"""
+    try:
+        client = get_async_redis_client()
+        raw = await client.get(f"{PREFERENCE_KEY_PREFIX}{member_id}")
         if not raw:
-            return None
-        return json.loads(raw)
+            raw = await client.get(f"{LEGACY_PREFERENCE_KEY_PREFIX}{member_id}")
+        return _parse_preference_entry(raw)
     except Exception as e:
+        print(f"[CACHE] load_preference_cache_async error: {e}")
+        return None
+
+async def get_cached_preference_async(member_id: str, favorite_song_ids: List[int]) -> Optional[dict]:
+    """get_cached_preference의 비동기 버전"""
+    return _validated_preference(await load_preference_cache_async(member_id), favorite_song_ids)
+
+def build_recommendation_cache_data(result: Dict[str, Any]) -> Dict[str, Any]:
+    """추천 결과(recommend_songs 반환값)를 recommend:{member_id} 캐시 형식으로 만듭니다."""
+    return {
+        "favorite_song_ids": result.get("favorite_song_ids", []),
+        "groups": result.get("groups", []),
+        "candidates": result.get("candidates", []),
+        "generated_date": datetime.now().strftime("%Y-%m-%d"),
+    }
+
+def _recommendation_meta(cache_data: Dict[str, Any]) -> str:
+    return json.dumps({
+        "favorites_fingerprint": favorites_fingerprint(cache_data.get("favorite_song_ids", [])),
+        "catalog_fingerprint": current_catalog_fingerprint(),
+        "generated_date": cache_data.get("generated_date"),
+    })
+
+def _compact_recommendation_entry(cache_data: Dict[str, Any]) -> Dict[str, Any]:
+    """캐시 항목에서 카탈로그로 다시 채울 수 있는 곡 정보를 빼고 song_id만 남깁니다."""
+    groups = cache_data.get("groups", [])
+    candidates = cache_data.get("candidates", [])
+    group_songs = [song for group in groups for song in group.get("songs", [])]
+    if any(song.get("song_id") is None for song in group_songs + candidates) \
+            or any(not _GROUP_SONG_FIELDS.issuperset(song) for song in group_songs):
+        # 다시 채울 수 없는 곡이 섞여 있으면 이전 형식 그대로 저장
+        return cache_data
+
+    compact_groups = []
+    for group in groups:
+        group_songs = group.get("songs", [])
+        compact = {k: v for k, v in group.items() if k != "songs"}
+        compact["song_ids"] = [song["song_id"] for song in group_songs]
+        # 가수 그룹의 곡에는 genre/mood가 함께 나감 (AI 그룹에는 없음)
+        compact["with_genre_mood"] = bool(group_songs) and "genre" in group_songs[0]
+        compact_groups.append(compact)
+
+    return {
+        "format": RECOMMEND_ENTRY_FORMAT,
+        "favorite_song_ids": cache_data.get("favorite_song_ids", []),
+        "groups": compact_groups,
+        "candidates": [[song["song_id"], *(song.get(f) for f in _CANDIDATE_USER_FIELDS)] for song in candidates],
+        "generated_date": cache_data.get("generated_date"),
+    }
+
+def _song_fields(row: dict) -> Dict[str, Any]:
+    title_jp, title_kr, title_en, title_yomi, artist, artist_kr = _get_title_artist(row)
+    return {
+        "song_id": row.get("song_id"),
+        "title_jp": title_jp,
+        "title_kr": title_kr,
+        "title_en": title_en,
+        "title_yomi": title_yomi,
+        "artist": artist,
+        "artist_kr": artist_kr,
+        "tj_number": row.get("tj_number"),
+        "ky_number": row.get("ky_number"),
+    }
+
+def _hydrate_recommendation_entry(entry: Optional[dict]) -> Optional[dict]:
+    """
+    형식 2 항목의 song_id를 현재 카탈로그 스냅샷의 곡 정보로 채워 이전과 같은 모양으로 돌려줍니다.
+    (카탈로그에서 빠진 곡은 제외, 곡 정보 수정은 재생성 없이 바로 반영)
+    """
+    if not entry or entry.get("format") != RECOMMEND_ENTRY_FORMAT:
+        return entry
+    catalog = get_catalog()
+
+    groups = []
+    for compact in entry.get("groups", []):
+        with_genre_mood = compact.get("with_genre_mood")
+        group = {k: v for k, v in compact.items() if k not in ("song_ids", "with_genre_mood")}
+        songs = []
+        for sid in compact.get("song_ids", []):
+            row = catalog.get(sid)
+            if row is None:
+                continue
+            song = _song_fields(row)
+            if with_genre_mood:
+                song["genre"] = row.get("genre") or ""
+                song["mood"] = row.get("mood") or ""
+            songs.append(song)
+        group["songs"] = songs
+        groups.append(group)
+
+    candidates = []
+    for sid, *user_fields in entry.get("candidates", []):
+        row = catalog.get(sid)
+        if row is None:
+            continue
+        song = _song_fields(row)
+        # 후보곡 genre/mood는 정규화 값 (_prepare_candidates와 같음)
+        song["genre"], _, song["mood"] = _genre_mood(row)
+        song.update(zip(_CANDIDATE_USER_FIELDS, user_fields))
+        candidates.append(song)
+
+    return {
+        "favorite_song_ids": entry.get("favorite_song_ids", []),
+        "groups": groups,
+        "candidates": candidates,
+        "generated_date": entry.get("generated_date"),
+    }
+
+def _count_recommend(name: str) -> None:
+    with _recommend_stats_lock:
+        _recommend_stats[name] += 1
+
+def _remember_recommendation(member_id: str, raw: Optional[bytes], version: int) -> Optional[bytes]:
+    """Redis에서 읽은 값을 로컬 캐시에 올리고 티어별 적중을 셉니다."""
+    if not raw:
+        _count_recommend("redis_misses")
+        return None
+    _count_recommend("redis_hits")
+    _recommend_local.put(str(member_id), raw, version)
+    return raw
+
+def load_recommendation_cache(member_id: str) -> Optional[dict]:
+    """사용자 추천 결과를 캐시에서 로드합니다. (프로세스 내 캐시 → Redis 순)"""
+    try:
+        raw = _recommend_local.get(str(member_id))
+        if raw is None:
+            version = _recommend_local.version()
+            raw = _remember_recommendation(member_id, redis_binary_client.get(f"recommend:{member_id}"), version)
+            if not raw:
+                return None
+        return _hydrate_recommendation_entry(decode_cache_value(raw))
+    except Exception as e:
+        _count_recommend("errors")
         print(f"[CACHE] load_recommendation_cache error: {e}")
         return None
 
-def save_recommendation_cache(member_id: str, cache_data: Dict[str, Any]) -> None:
-    """사용자 추천 결과를 캐시에 저장합니다."""
+def write_recommendation_cache(member_id: str, cache_data: Dict[str, Any], pipe=None) -> None:
+    """
+    추천 결과 + 메타를 함께 씁니다. (오류는 호출자에게 전달, Celery 재시도용)
+    pipe: 주어지면 명령만 쌓고 전송은 호출자가 함 (파이프라인 / RedisWriteBatcher)
+    """
+    own = pipe is None
+    pipe = redis_client.pipeline() if own else pipe
+    pipe.setex(f"recommend:{member_id}", REDIS_TTL, encode_cache_value(_compact_recommendation_entry(cache_data)))
+    pipe.setex(f"{RECOMMEND_META_PREFIX}{member_id}", REDIS_TTL, _recommendation_meta(cache_data))
+    index_add(pipe, "recommendation", member_id, REDIS_TTL)
+    # 다른 프로세스의 로컬 캐시 무효화 (쓰기와 같은 파이프라인, 쓰기 뒤에 전송)
+    publish_invalidation(pipe, "recommendation", member_id)
+    if own:
+        pipe.execute()
+        _recommend_local.invalidate(str(member_id))
+
+def save_recommendation_cache(member_id: str, cache_data: Dict[str, Any], pipe=None) -> bool:
+    """사용자 추천 결과를 캐시에 저장합니다. (기존 항목은 덮어씀) 성공 여부를 반환합니다. pipe는 write_recommendation_cache 참고"""
     try:
-        redis_client.setex(f"recommend:{member_id}", REDIS_TTL, json.dumps(cache_data, ensure_ascii=False))
+        write_recommendation_cache(member_id, cache_data, pipe)
+        return True
     except Exception as e:
         print(f"[CACHE] save_recommendation_cache error: {e}")
+        return False
+
+async def load_recommendation_cache_async(member_id: str) -> Optional[dict]:
+    """load_recommendation_cache의 비동기 버전 (이벤트 루프를 막지 않음)"""
+    try:
+        raw = _recommend_local.get(str(member_id))
+        if raw is None:
+            version = _recommend_local.version()
+            raw = await get_async_redis_client(decode_responses=False).get(f"recommend:{member_id}")
+            raw = _remember_recommendation(member_id, raw, version)
+            if not raw:
+                return None
+        # 스냅샷이 아직 적재되지 않은 프로세스면 get_catalog가 DB를 조회하므로 스레드에서 채움
+        return await asyncio.to_thread(_hydrate_recommendation_entry, decode_cache_value(raw))
+    except Exception as e:
+        _count_recommend("errors")
+        print(f"[CACHE] load_recommendation_cache_async error: {e}")
+        return None
+
+async def save_recommendation_cache_async(member_id: str, cache_data: Dict[str, Any]) -> None:
+    """save_recommendation_cache의 비동기 버전"""
+    try:
+        pipe = get_async_redis_client().pipeline()
+        pipe.setex(f"recommend:{member_id}", REDIS_TTL, encode_cache_value(_compact_recommendation_entry(cache_data)))
+        pipe.setex(f"{RECOMMEND_META_PREFIX}{member_id}", REDIS_TTL, _recommendation_meta(cache_data))
+        index_add(pipe, "recommendation", member_id, REDIS_TTL)
+        publish_invalidation(pipe, "recommendation", member_id)
+        await pipe.execute()
+        _recommend_local.invalidate(str(member_id))
+    except Exception as e:
+        print(f"[CACHE] save_recommendation_cache_async error: {e}")
+
+def find_stale_recommendations(users: List[tuple], catalog_fingerprint: Optional[str],
+                               refresh_before_sec: int = 0) -> List[tuple]:
+    """
+    users [(member_id, favorite_song_ids), ...] 중 추천을 다시 만들어야 하는 사용자만 반환합니다.
+    - 추천 캐시/메타가 없거나, 좋아요 지문 또는 카탈로그 지문이 다르면 stale
+    - 남은 TTL이 refresh_before_sec 이하면 곧 만료되므로 stale
+    메타는 MGET 한 번, TTL은 파이프라인 한 번으로 조회합니다.
+    """
+    if not users:
+        return []
+    metas = redis_client.mget([f"{RECOMMEND_META_PREFIX}{member_id}" for member_id, _ in users])
+    pipe = redis_client.pipeline()
+    for member_id, _ in users:
+        pipe.ttl(f"recommend:{member_id}")
+    ttls = pipe.execute()
+
+    stale = []
+    for (member_id, favorite_song_ids), raw, ttl in zip(users, metas, ttls):
+        try:
+            meta = json.loads(raw) if raw else None
+        except (TypeError, ValueError):
+            meta = None
+        if (
+            not meta
+            or ttl is None or ttl < 0 or ttl <= refresh_before_sec
+            or meta.get("favorites_fingerprint") != favorites_fingerprint(favorite_song_ids)
+            or not catalog_fingerprint or meta.get("catalog_fingerprint") != catalog_fingerprint
+        ):
+            stale.append((member_id, favorite_song_ids))
+    return stale
 
 def clear_user_cache(member_id: str, cache_type: str = "all") -> None:
     """사용자의 특정 캐시를 삭제합니다."""
     try:
+        pipe = redis_client.pipeline()
         if cache_type == "all" or cache_type == "preference":
-            redis_client.delete(f"pref:{member_id}")
+            pipe.unlink(f"{PREFERENCE_KEY_PREFIX}{member_id}", f"{LEGACY_PREFERENCE_KEY_PREFIX}{member_id}")
+            index_remove(pipe, "preference", member_id)
         if cache_type == "all" or cache_type == "recommendation":
-            redis_client.delete(f"recommend:{member_id}")
+            pipe.unlink(f"recommend:{member_id}", f"{RECOMMEND_META_PREFIX}{member_id}")
+            index_remove(pipe, "recommendation", member_id)
+            publish_invalidation(pipe, "recommendation", member_id)
+        pipe.execute()
+        _recommend_local.invalidate(str(member_id))
     except Exception as e:
         print(f"[CACHE] clear_user_cache error: {e}")
 
 def get_cache_stats() -> Dict[str, int]:
-    """캐시 통계 정보를 반환합니다."""
+    """캐시 통계 정보를 반환합니다. (캐시 인덱스 ZCOUNT, 키스페이스를 훑지 않음)"""
     try:
-        pref_keys = redis_client.keys("pref:*")
-        rec_keys = redis_client.keys("recommend:*")
+        pref_count = indexed_count("preference")
+        rec_count = indexed_count("recommendation")
         return {
-            "preference_cache_count": len(pref_keys),
-            "recommendation_cache_count": len(rec_keys),
-            "total_cache_count": len(pref_keys) + len(rec_keys)
+            "preference_cache_count": pref_count,
+            "recommendation_cache_count": rec_count,
+            "total_cache_count": pref_count + rec_count
         }
     except Exception as e:
         print(f"[CACHE] get_cache_stats error: {e}")
         return {"preference_cache_count": 0, "recommendation_cache_count": 0, "total_cache_count": 0}
+
+def get_recommendation_cache_tier_stats() -> Dict[str, Any]:
+    """추천 캐시 티어별 적중 지표 (이 프로세스 기준). local = 프로세스 내 캐시, redis = 로컬 미스 후 Redis 조회"""
+    with _recommend_stats_lock:
+        stats = dict(_recommend_stats)
+    local = _recommend_local.stats()
+    redis_lookups = stats["redis_hits"] + stats["redis_misses"]
+    lookups = local["hits"] + redis_lookups
+    return {
+        "local": local,
+        "redis": {
+            "hits": stats["redis_hits"],
+            "misses": stats["redis_misses"],
+            "hit_rate": round(stats["redis_hits"] / redis_lookups, 4) if redis_lookups else 0.0,
+        },
+        "lookups": lookups,
+        "hit_rate": round((local["hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0,
+        "errors": stats["errors"],
+    }
@@ -0,0 +1,260 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from services.database_service import get_db_connection, _has_column, _active_clause, invalidate_schema_cache
+from utils.helpers import _annotate_normalized
+
+load_dotenv()
+
+# 백그라운드 증분 갱신 주기 / 전체 재적재 주기(하드 삭제 반영용)
+CATALOG_REFRESH_SEC = int(os.getenv("CATALOG_REFRESH_SEC", "300"))
+CATALOG_FULL_RELOAD_SEC = int(os.getenv("CATALOG_FULL_RELOAD_SEC", "3600"))
+CATALOG_UPDATED_AT_COLUMN = os.getenv("CATALOG_UPDATED_AT_COLUMN", "updated_at")
+
+
+# 카탈로그 지문에 반영하는 필드 (바뀌면 선곡/채점/그룹이 달라질 수 있는 것들)
+# 노래방 번호처럼 표시에만 쓰이는 필드는 추천 캐시를 읽을 때 카탈로그에서 채우므로 제외
+_FINGERPRINT_FIELDS = (
+    "title_kr", "title_en", "title_jp", "title_yomi", "artist_kr", "artist",
+    "genre", "mood",
+)
+
+
+def _artist_key(name: Optional[str]) -> str:
+    # MySQL 기본 collation(대소문자/후행 공백 무시)과 최대한 비슷하게 비교
+    return (name or "").strip().casefold()
+
+
+class CatalogSnapshot:
+    """
+    song 테이블의 읽기 전용 스냅샷.
+    - songs: {song_id: row} (활성 곡만 포함, row는 절대 수정하지 않음)
+      row에는 적재 시점에 정규화 결과(_match_keys, _genre_mood)가 미리 계산되어 있음
+    - version: 내용이 바뀔 때마다 1씩 증가
+    - max_song_id / max_updated_at: 증분 갱신 워터마크
+    - fingerprint: 추천에 쓰이는 필드의 내용 해시 (version과 달리 프로세스가 달라도 같은 내용이면 같은 값)
+    """
+
+    def __init__(self, songs: Dict[int, dict], version: int,
+                 max_song_id: int, max_updated_at: Optional[datetime]):
+        self.songs = songs
+        self.version = version
+        self.max_song_id = max_song_id
+        self.max_updated_at = max_updated_at
+        self.loaded_at = time.time()
+        self._fingerprint: Optional[str] = None
+
+        by_artist: Dict[str, List[int]] = {}
+        for sid, row in songs.items():
+            keys = {_artist_key(row.get("artist_kr")), _artist_key(row.get("artist"))}
+            for key in keys:
+                if key:
+                    by_artist.setdefault(key, []).append(sid)
+        for ids in by_artist.values():
+            ids.sort(reverse=True)
+        self._by_artist = by_artist
+
+    def __len__(self) -> int:
+        return len(self.songs)
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            h = hashlib.sha1()
+            for sid in sorted(self.songs):
+                row = self.songs[sid]
+                h.update(repr((sid, *(row.get(f) for f in _FINGERPRINT_FIELDS))).encode("utf-8"))
+            self._fingerprint = h.hexdigest()[:16]
+        return self._fingerprint
+
+    def get(self, song_id: int) -> Optional[dict]:
+        return self.songs.get(song_id)
+
+    def rows(self, song_ids: Iterable[int]) -> List[dict]:
+        """요청한 순서대로 곡 row의 복사본을 반환합니다. (없는/비활성 곡은 제외)"""
+        result = []
+        for sid in song_ids:
+            row = self.songs.get(sid)
+            if row is not None:
+                result.append(dict(row))
+        return result
+
+    def artist_song_ids(self, name: str) -> List[int]:
+        """artist_kr 또는 artist가 name과 일치하는 곡 ID (song_id 내림차순)"""
+        return self._by_artist.get(_artist_key(name), [])
+
+    def artist_song_ids_like(self, name: str) -> List[int]:
+        """artist_kr 또는 artist에 name이 포함된 곡 ID (LIKE '%name%', song_id 내림차순)"""
+        needle = _artist_key(name)
+        if not needle:
+            return []
+        ids = set()
+        for key, song_ids in self._by_artist.items():
+            if needle in key:
+                ids.update(song_ids)
+        return sorted(ids, reverse=True)
+
+
+_lock = threading.Lock()
+_snapshot: Optional[CatalogSnapshot] = None
+_last_full_reload = 0.0
+
+
+def _is_active(row: dict, has_active: bool) -> bool:
+    return not has_active or bool(row.get("is_active"))
+
+
+def _fetch_song_rows(since_id: Optional[int] = None, since_updated: Optional[datetime] = None):
+    """song 테이블 전체 또는 워터마크 이후 변경분을 조회합니다."""
+    has_active = _has_column("song", "is_active")
+    has_updated = _has_column("song", CATALOG_UPDATED_AT_COLUMN)
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        if since_id is None:
+            # 전체 적재는 활성 곡만 (증분 조회는 비활성으로 바뀐 곡도 받아서 스냅샷에서 빼야 하므로 필터 없음)
+            cur.execute(f"SELECT * FROM song WHERE 1=1{_active_clause('song')}")
+        else:
+            where, params = "song_id > %s", [since_id]
+            if has_updated and since_updated is not None:
+                where += f" OR `{CATALOG_UPDATED_AT_COLUMN}` >= %s"
+                params.append(since_updated)
+            cur.execute(f"SELECT * FROM song WHERE {where}", tuple(params))
+        return cur.fetchall(), has_active, has_updated
+    finally:
+        cur.close()
+        conn.close()
+
+
+def _watermarks(rows: Iterable[dict], has_updated: bool,
+                max_song_id: int = 0, max_updated_at: Optional[datetime] = None):
+    for row in rows:
+        max_song_id = max(max_song_id, row.get("song_id") or 0)
+        ts = row.get(CATALOG_UPDATED_AT_COLUMN) if has_updated else None
+        if isinstance(ts, datetime) and (max_updated_at is None or ts > max_updated_at):
+            max_updated_at = ts
+    return max_song_id, max_updated_at
+
+
+def _full_load(version: int) -> CatalogSnapshot:
+    rows, has_active, has_updated = _fetch_song_rows()
+    songs = {r["song_id"]: _annotate_normalized(r) for r in rows if _is_active(r, has_active)}
+    max_song_id, max_updated_at = _watermarks(rows, has_updated)
+    return CatalogSnapshot(songs, version, max_song_id, max_updated_at)
+
+
+def _incremental_load(current: CatalogSnapshot) -> CatalogSnapshot:
+    rows, has_active, has_updated = _fetch_song_rows(current.max_song_id, current.max_updated_at)
+    if not rows:
+        return current
+
+    songs = dict(current.songs)
+    changed = False
+    for row in rows:
+        sid = row["song_id"]
+        if _is_active(row, has_active):
+            _annotate_normalized(row)
+            if songs.get(sid) != row:
+                songs[sid] = row
+                changed = True
+        elif songs.pop(sid, None) is not None:
+            changed = True
+
+    max_song_id, max_updated_at = _watermarks(rows, has_updated, current.max_song_id, current.max_updated_at)
+    if not changed:
+        current.max_song_id, current.max_updated_at = max_song_id, max_updated_at
+        return current
+    return CatalogSnapshot(songs, current.version + 1, max_song_id, max_updated_at)
+
+
+def _refresh_locked(full: bool = False) -> CatalogSnapshot:
+    global _snapshot, _last_full_reload
+    now = time.monotonic()
+    current = _snapshot
+    try:
+        if current is None or full or now - _last_full_reload >= CATALOG_FULL_RELOAD_SEC:
+            fresh = _full_load(current.version + 1 if current else 1)
+            if current is not None and fresh.songs == current.songs:
+                fresh.version = current.version
+            _last_full_reload = now
+        else:
+            fresh = _incremental_load(current)
+    except Exception as e:
+        if current is None:
+            raise
+        # 갱신 실패 시 기존 스냅샷으로 계속 서비스
+        print(f"[CATALOG] refresh error (serving v{current.version}): {e}")
+        fresh = current
+    _snapshot = fresh
+    return fresh
+
+
+def refresh_catalog(full: bool = False) -> CatalogSnapshot:
+    """스냅샷을 즉시 갱신합니다. full=True면 스키마 캐시도 비우고 전체 재적재(삭제된 곡, 컬럼 추가 반영)."""
+    if full:
+        invalidate_schema_cache("song")
+    with _lock:
+        return _refresh_locked(full)
+
+
+def _refresh_loop() -> None:
+    """CATALOG_REFRESH_SEC마다 증분 갱신 (CATALOG_FULL_RELOAD_SEC가 지났으면 전체 재적재) 후 스냅샷 교체"""
+    while True:
+        time.sleep(CATALOG_REFRESH_SEC)
+        try:
+            refresh_catalog()
+        except Exception as e:
+            print(f"[CATALOG] background refresh error: {e}")
+
+
+_refresher_pid: Optional[int] = None
+
+
+def _ensure_refresher() -> None:
+    """갱신 스레드를 프로세스마다 한 번 시작합니다. (fork된 워커에서는 첫 사용 시 다시 시작)"""
+    global _refresher_pid
+    pid = os.getpid()
+    if _refresher_pid == pid:
+        return
+    with _lock:
+        if _refresher_pid == pid:
+            return
+        _refresher_pid = pid
+        threading.Thread(target=_refresh_loop, name="catalog-refresh", daemon=True).start()
+
+
+def get_catalog() -> CatalogSnapshot:
+    """
+    프로세스 내 카탈로그 스냅샷을 반환합니다.
+    스냅샷이 없을 때만 동기로 적재하고, 이후 갱신은 백그라운드 스레드가 새 스냅샷으로 바꿔 끼우므로 요청 경로를 막지 않습니다.
+    """
+    _ensure_refresher()
+    snap = _snapshot
+    if snap is not None:
+        return snap
+    with _lock:
+        if _snapshot is not None:
+            return _snapshot
+        return _refresh_locked()
+
+
+def current_catalog_fingerprint() -> Optional[str]:
+    """이미 적재된 스냅샷의 지문. (적재 전이면 None, 적재/갱신을 일으키지 않음)"""
+    snap = _snapshot
+    return snap.fingerprint if snap is not None else None
+
+
+def warm_catalog() -> None:
+    """프로세스 시작 시 카탈로그를 미리 적재합니다."""
+    try:
+        snap = get_catalog()
+        print(f"[CATALOG] loaded v{snap.version}: {len(snap)} songs")
+    except Exception as e:
+        print(f"[CATALOG] warm error: {e}")
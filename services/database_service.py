@@ -1,31 +1,34 @@
-import os
 import pymysql
-from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 
-load_dotenv()
+from services.db_pool import get_pool
 
 def get_db_connection():
-    """DB 연결을 생성하고 반환합니다."""
-    return pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        port=int(os.getenv("DB_PORT")),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        db=os.getenv("DB_NAME"),
-        charset="utf8",
-        cursorclass=pymysql.cursors.DictCursor,
-    )
+    """
+    커넥션 풀에서 DB 연결을 대여합니다.
+    반환된 객체의 close()는 연결을 끊지 않고 풀에 반납합니다.
+    """
+    return get_pool().acquire()
 
-# --- 컬럼 존재 체크 → is_active 옵션 처리 ---
-def _has_column(cur, table: str, column: str) -> bool:
-    cur.execute(f"SHOW COLUMNS FROM `{table}` LIKE %s", (column,))
-    return cur.fetchone() is not None
+# --- 컬럼 존재 체크 → is_active 옵션 처리 (풀 단위 스키마 캐시 사용) ---
+def _has_column(table: str, column: str) -> bool:
+    return get_pool().schema.has_column(table, column)
 
-def _active_clause(cur, table: str = "song") -> str:
-    return " AND is_active = TRUE" if _has_column(cur, table, "is_active") else ""
+def _active_clause(table: str = "song", alias: Optional[str] = None) -> str:
+    return get_pool().schema.active_clause(table, alias)
 
-# --- 스코어 계산 ---
+def warm_schema_cache(tables: tuple[str, ...] = ("song",)) -> None:
+    """프로세스 시작 시 스키마 캐시를 채웁니다."""
+    try:
+        get_pool().schema.warm(tables)
+    except Exception as e:
+        print(f"[DB] warm_schema_cache error: {e}")
+
+def invalidate_schema_cache(table: Optional[str] = None) -> None:
+    """스키마 캐시를 비웁니다. (다음 조회 시 다시 SHOW COLUMNS 실행)"""
+    get_pool().schema.invalidate(table)
+
+# --- 스코어 계산 (기준 규칙; 실제 채점은 services.scoring_engine이 벡터화해서 수행) ---
 def _score_candidate(song: dict,
                      preferred_genres: Optional[list[str]],
                      preferred_moods: Optional[list[str]],
@@ -45,6 +48,22 @@ def _score_candidate(song: dict,
         score += 2
     return score
 
+def _matched_criteria(song: dict,
+                      preferred_genres: Optional[list[str]],
+                      preferred_moods: Optional[list[str]],
+                      like_genres: list[str],
+                      like_artists: list[str]) -> list[str]:
+    matched = []
+    if preferred_genres and song.get("genre") in preferred_genres:
+        matched.append("preferred_genre")
+    if preferred_moods and song.get("mood") in preferred_moods:
+        matched.append("preferred_mood")
+    if like_genres and song.get("genre") in like_genres:
+        matched.append("like_genre")
+    if like_artists and song.get("artist_kr") in like_artists:
+        matched.append("like_artist")
+    return matched
+
 def get_candidate_songs(
     favorite_song_ids: list[int],
     limit: int = 100,
@@ -54,177 +73,158 @@ def get_candidate_songs(
     """
     추천 후보 노래:
     - 좋아요 기반 장르/아티스트 & LLM의 preferred_genres/moods를 반영
-    - 전체 풀에서 가중치(match_score) 계산 후 상위 정렬 + 부족분 랜덤 보충
+    - 전체 풀(카탈로그 스냅샷)에서 가중치(match_score) 계산 후 상위 정렬 (동점은 랜덤)
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    try:
-        like_genres, like_artists = [], []
-
-        # 좋아요 곡 정보
-        if favorite_song_ids:
-            placeholders = ",".join(["%s"] * len(favorite_song_ids))
-            cur.execute(
-                f"SELECT * FROM song WHERE song_id IN ({placeholders}){_active_clause(cur)}",
-                tuple(favorite_song_ids),
-            )
-            fav_info = cur.fetchall()
-            like_genres = [s["genre"] for s in fav_info if s.get("genre")]
-            like_artists = [s["artist_kr"] for s in fav_info if s.get("artist_kr")]
-
-        # 전체 풀 조회
-        if favorite_song_ids:
-            placeholders = ",".join(["%s"] * len(favorite_song_ids))
-            cur.execute(
-                f"SELECT * FROM song WHERE 1=1{_active_clause(cur)} AND song_id NOT IN ({placeholders})",
-                tuple(favorite_song_ids),
-            )
-        else:
-            cur.execute(f"SELECT * FROM song WHERE 1=1{_active_clause(cur)}")
-        pool = cur.fetchall()
-
-        # 스코어 및 근거 기록
-        from random import shuffle
-        shuffle(pool)
-        for s in pool:
-            s["recommendation_type"] = "pool"
-            s["matched_criteria"] = []
-            s["match_score"] = _score_candidate(s, preferred_genres, preferred_moods, like_genres, like_artists)
-            if preferred_genres and s.get("genre") in preferred_genres:
-                s["matched_criteria"].append("preferred_genre")
-            if preferred_moods and s.get("mood") in preferred_moods:
-                s["matched_criteria"].append("preferred_mood")
-            if like_genres and s.get("genre") in like_genres:
-                s["matched_criteria"].append("like_genre")
-            if like_artists and s.get("artist_kr") in like_artists:
-                s["matched_criteria"].append("like_artist")
-
-        pool.sort(key=lambda x: x.get("match_score", 0), reverse=True)
-
-        # 상위 limit + 부족분 보충
-        top = pool[:limit]
-        if len(top) < limit:
-            remain = [s for s in pool if s not in top]
-            shuffle(remain)
-            top.extend(remain[: max(0, limit - len(top))])
-
-        for s in top:
-            if s.get("recommendation_type") == "pool":
-                s["recommendation_type"] = "scored" if s.get("match_score", 0) > 0 else "random"
-
-        return top[:limit]
+    from services.catalog_service import get_catalog
+    from services.scoring_engine import score_candidates
+
+    catalog = get_catalog()
+
+    # 좋아요 곡 정보
+    fav_info = catalog.rows(favorite_song_ids or [])
+    like_genres = [s["genre"] for s in fav_info if s.get("genre")]
+    like_artists = [s["artist_kr"] for s in fav_info if s.get("artist_kr")]
+
+    # 점수 규칙은 _score_candidate / _matched_criteria와 동일 (벡터화 구현)
+    return score_candidates(
+        catalog,
+        favorite_song_ids or [],
+        limit,
+        preferred_genres,
+        preferred_moods,
+        like_genres,
+        like_artists,
+    )
 
-    finally:
-        cur.close()
-        conn.close()
+def get_candidate_songs_batch(users: list[dict], limit: int = 100) -> list[list[dict]]:
+    """
+    여러 사용자의 추천 후보를 한 번에 계산합니다. (야간 재생성/워밍용)
+    users: [{"favorite_song_ids": [...], "preferred_genres": [...], "preferred_moods": [...]}, ...]
+    반환: 사용자 순서대로 get_candidate_songs와 같은 형식의 후보 리스트
+    """
+    from services.catalog_service import get_catalog
+    from services.scoring_engine import score_candidates_batch
+
+    catalog = get_catalog()
+    prepared = []
+    for u in users:
+        favorite_song_ids = u.get("favorite_song_ids") or []
+        fav_info = catalog.rows(favorite_song_ids)
+        prepared.append({
+            "exclude_song_ids": favorite_song_ids,
+            "preferred_genres": u.get("preferred_genres"),
+            "preferred_moods": u.get("preferred_moods"),
+            "like_genres": [s["genre"] for s in fav_info if s.get("genre")],
+            "like_artists": [s["artist_kr"] for s in fav_info if s.get("artist_kr")],
+        })
+    return score_candidates_batch(catalog, prepared, limit)
 
 def get_favorite_songs_info(favorite_song_ids: list[int]) -> list[dict]:
     """사용자가 좋아하는 노래들의 상세 정보."""
     if not favorite_song_ids:
         return []
+    from services.catalog_service import get_catalog
+    return get_catalog().rows(favorite_song_ids)
+
+_ACTIVE_USER_LIKES_SQL = """
+    SELECT m.member_id, sl.song_id
+    FROM member m
+    LEFT JOIN song_like sl ON sl.member_id = m.member_id
+    WHERE EXISTS (
+        SELECT 1 FROM member_role_list mrl
+        WHERE mrl.id = m.member_id AND mrl.role = 'USER'
+    )
+    ORDER BY m.member_id
+"""
+
+def iter_active_users_with_favorites(chunk_size: int = 1000) -> Iterator[tuple[str, list[int]]]:
+    """
+    USER 역할의 활성 사용자별 좋아요 곡 IDs를 (member_id, [song_id, ...]) 형태로 순차 반환.
+    - 단일 쿼리 + 비버퍼 커서(SSDictCursor)로 chunk_size 행씩 읽어 메모리 사용량을 일정하게 유지
+    - 좋아요가 없는 사용자는 빈 리스트
+    스트리밍 중에는 커넥션을 점유하므로, 소비하는 쪽에서 LLM 호출처럼 오래 걸리는 작업을 끼워 넣지 말 것
+    (net_write_timeout). 오래 걸리는 처리는 iter_active_user_chunks로 모은 뒤 수행.
+    """
     conn = get_db_connection()
-    cur = conn.cursor()
+    cur = conn.cursor(pymysql.cursors.SSDictCursor)
     try:
-        placeholders = ",".join(["%s"] * len(favorite_song_ids))
-        cur.execute(
-            f"SELECT * FROM song WHERE song_id IN ({placeholders}){_active_clause(cur)}",
-            tuple(favorite_song_ids),
-        )
-        return cur.fetchall()
+        cur.execute(_ACTIVE_USER_LIKES_SQL)
+        current_id, song_ids = None, []
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            for r in rows:
+                if r["member_id"] != current_id:
+                    if current_id is not None:
+                        yield str(current_id), song_ids
+                    current_id, song_ids = r["member_id"], []
+                if r["song_id"] is not None:
+                    song_ids.append(r["song_id"])
+        if current_id is not None:
+            yield str(current_id), song_ids
     finally:
         cur.close()
         conn.close()
 
+def iter_active_user_chunks(chunk_size: int = 500) -> Iterator[list[tuple[str, list[int]]]]:
+    """iter_active_users_with_favorites 결과를 chunk_size명 단위 리스트로 묶어 반환."""
+    chunk: list[tuple[str, list[int]]] = []
+    for item in iter_active_users_with_favorites():
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 def get_all_active_users_with_favorites() -> dict[str, list[int]]:
     """
     USER 역할의 모든 활성 사용자와 좋아요 곡 IDs 반환: {member_id: [song_id, ...]}
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute("""
-            SELECT DISTINCT m.member_id
-            FROM member m
-            JOIN member_role_list mrl ON m.member_id = mrl.id
-            WHERE mrl.role = 'USER'
-        """)
-        users = cur.fetchall()
-
-        user_favs: dict[str, list[int]] = {}
-        for u in users:
-            mid = str(u["member_id"])
-            cur.execute("SELECT sl.song_id FROM song_like sl WHERE sl.member_id = %s", (u["member_id"],))
-            favs = cur.fetchall()
-            user_favs[mid] = [r["song_id"] for r in favs]
-        return user_favs
+        return dict(iter_active_users_with_favorites())
     except Exception as e:
         print(f"[DB] 사용자 조회 실패: {e}")
         return {}
-    finally:
-        cur.close()
-        conn.close()
+
+_ARTIST_SONG_COLUMNS = (
+    "song_id", "title_kr", "title_en", "title_jp", "title_yomi",
+    "artist_kr", "artist", "genre", "mood", "tj_number", "ky_number",
+)
 
 def get_songs_by_artists(artists: List[str], limit_per_artist: int = 5, exclude_song_ids: Optional[List[int]] = None) -> Dict[str, List[dict]]:
     """
     artists에 들어있는 가수명(한글/원문)을 기준으로 각 가수별로 곡을 최대 limit_per_artist개씩 반환.
-    - artist_kr, artist 둘 다 매칭 시도 (OR)
+    - artist_kr, artist 둘 다 매칭 시도 (OR), 부족하면 부분 일치(LIKE)로 보충
     - exclude_song_ids에 있는 곡은 제외
+    - 카탈로그 스냅샷(활성 곡만)에서 찾으므로 비활성 곡은 나오지 않음 (후보곡과 같은 기준)
     반환: { "아티스트명": [ {song row dict...}, ... ] }
     """
     if not artists:
         return {}
 
-    conn = get_db_connection()
-    cur = conn.cursor(pymysql.cursors.DictCursor)
     try:
-        results: Dict[str, List[dict]] = {}
-        exclude_song_ids = exclude_song_ids or []
+        from services.catalog_service import get_catalog
+        catalog = get_catalog()
+        exclude = set(exclude_song_ids or [])
+
+        def _pick(song_ids: List[int], limit: int) -> List[dict]:
+            picked = []
+            for sid in song_ids:
+                if len(picked) >= limit:
+                    break
+                if sid not in exclude:
+                    row = catalog.get(sid)
+                    picked.append({col: row.get(col) for col in _ARTIST_SONG_COLUMNS})
+            return picked
 
+        results: Dict[str, List[dict]] = {}
         for name in artists:
-            rows: List[dict] = []
-
-            cur.execute(
-                """
-                SELECT s.song_id, s.title_kr, s.title_en, s.title_jp, s.title_yomi,
-                       s.artist_kr, s.artist, s.genre, s.mood,
-                       s.tj_number, s.ky_number
-                FROM song s
-                WHERE (s.artist_kr = %s OR s.artist = %s)
-                {ex}
-                ORDER BY s.song_id DESC
-                LIMIT %s
-                """.format(
-                    ex="AND s.song_id NOT IN ({})".format(
-                        ",".join(["%s"] * len(exclude_song_ids))
-                    ) if exclude_song_ids else ""
-                ),
-                tuple(([name, name] + exclude_song_ids + [limit_per_artist]) if exclude_song_ids else (name, name, limit_per_artist)),
-            )
-            rows = cur.fetchall()
+            rows = _pick(catalog.artist_song_ids(name), limit_per_artist)
 
             if len(rows) < limit_per_artist:
-                remain = limit_per_artist - len(rows)
-                like_pat = f"%{name}%"
-                cur.execute(
-                    """
-                    SELECT s.song_id, s.title_kr, s.title_en, s.title_jp, s.title_yomi,
-                           s.artist_kr, s.artist, s.genre, s.mood,
-                           s.tj_number, s.ky_number
-                    FROM song s
-                    WHERE (s.artist_kr LIKE %s OR s.artist LIKE %s)
-                    {ex}
-                    ORDER BY s.song_id DESC
-                    LIMIT %s
-                    """.format(
-                        ex="AND s.song_id NOT IN ({})".format(
-                            ",".join(["%s"] * len(exclude_song_ids))
-                        ) if exclude_song_ids else ""
-                    ),
-                    tuple(([like_pat, like_pat] + exclude_song_ids + [remain]) if exclude_song_ids else (like_pat, like_pat, remain)),
-                )
-                like_rows = cur.fetchall()
-
+                like_rows = _pick(catalog.artist_song_ids_like(name), limit_per_artist - len(rows))
                 seen = {r["song_id"] for r in rows}
                 for r in like_rows:
                     if r["song_id"] not in seen:
@@ -236,6 +236,3 @@ def get_songs_by_artists(artists: List[str], limit_per_artist: int = 5, exclude_
     except Exception as e:
         print(f"[DB] get_songs_by_artists error: {e}")
         return {}
-    finally:
-        cur.close()
-        conn.close()
@@ -0,0 +1,263 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import pymysql
+from dotenv import load_dotenv
+
+from services.schema_cache import SchemaCache
+
+load_dotenv()
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE_SEC = int(os.getenv("DB_POOL_RECYCLE_SEC", "1800"))
+DB_POOL_PING_INTERVAL_SEC = int(os.getenv("DB_POOL_PING_INTERVAL_SEC", "30"))
+
+
+class PoolTimeout(Exception):
+    """풀에서 제한 시간 내에 커넥션을 얻지 못했을 때 발생합니다."""
+
+
+class _PoolEntry:
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    pymysql 커넥션 래퍼. close() 시 실제로 끊지 않고 풀에 반납합니다.
+    기존 `conn = get_db_connection(); ...; conn.close()` 패턴을 그대로 사용할 수 있습니다.
+    """
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._entry is None:
+            raise pymysql.err.InterfaceError("connection already returned to pool")
+        return getattr(self._entry.raw, name)
+
+    def close(self) -> None:
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    스레드 안전한 고정 크기 MySQL 커넥션 풀.
+    - maxsize: 동시에 열 수 있는 최대 커넥션 수
+    - recycle_sec: 생성 후 이 시간이 지난 커넥션은 폐기 후 재생성
+    - ping_interval_sec: 이 시간 이상 쉬었던 커넥션은 대여 전에 ping으로 상태 확인
+    프로세스별로 하나씩 생성되며(fork 이후 자동 재생성), API 프로세스와 Celery 워커가 같은 코드를 사용합니다.
+    """
+
+    def __init__(self, connect: Callable[[], "pymysql.connections.Connection"],
+                 maxsize: int = DB_POOL_SIZE,
+                 timeout: float = DB_POOL_TIMEOUT,
+                 recycle_sec: int = DB_POOL_RECYCLE_SEC,
+                 ping_interval_sec: int = DB_POOL_PING_INTERVAL_SEC):
+        self._connect = connect
+        self.maxsize = max(1, maxsize)
+        self.timeout = timeout
+        self.recycle_sec = recycle_sec
+        self.ping_interval_sec = ping_interval_sec
+
+        self._idle: deque[_PoolEntry] = deque()
+        self._cond = threading.Condition()
+        self._size = 0
+        self._in_use = 0
+
+        self._created = 0
+        self._recycled = 0
+        self._discarded = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        # 이 풀이 바라보는 DB의 스키마 정보 캐시
+        self.schema = SchemaCache(self)
+
+    def _open(self) -> _PoolEntry:
+        raw = self._connect()
+        with self._cond:
+            self._created += 1
+        return _PoolEntry(raw)
+
+    @staticmethod
+    def _close_raw(entry: _PoolEntry) -> None:
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def _checkout(self, entry: _PoolEntry) -> Optional[_PoolEntry]:
+        """재사용 전 recycle/health check. 사용할 수 없으면 None."""
+        now = time.monotonic()
+        if self.recycle_sec and now - entry.created_at >= self.recycle_sec:
+            self._close_raw(entry)
+            with self._cond:
+                self._recycled += 1
+            return None
+        if now - entry.last_used >= self.ping_interval_sec:
+            try:
+                entry.raw.ping(reconnect=False)
+            except Exception:
+                self._close_raw(entry)
+                with self._cond:
+                    self._discarded += 1
+                return None
+        return entry
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.maxsize:
+                    entry = None
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"DB 커넥션 대기 시간 초과 ({timeout:.1f}s, size={self.maxsize})")
+                waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            # 네트워크 I/O(ping/connect)는 락 밖에서 수행
+            if entry is not None:
+                entry = self._checkout(entry)
+            if entry is None:
+                entry = self._open()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        wait = time.monotonic() - start
+        with self._cond:
+            self._acquired += 1
+            if waited:
+                self._waits += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        return PooledConnection(self, entry)
+
+    def _release(self, entry: _PoolEntry) -> None:
+        healthy = bool(getattr(entry.raw, "open", False))
+        if healthy and not entry.raw.get_autocommit():
+            try:
+                # 다음 대여자가 이전 트랜잭션 상태를 보지 않도록 정리
+                entry.raw.rollback()
+            except Exception:
+                healthy = False
+        if not healthy:
+            self._close_raw(entry)
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            else:
+                self._size -= 1
+                self._discarded += 1
+            self._cond.notify()
+
+    def close(self) -> None:
+        """유휴 커넥션을 모두 닫습니다. (대여 중인 커넥션은 반납 시 풀에 돌아옵니다)"""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for entry in idle:
+            self._close_raw(entry)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_size": self.maxsize,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "created": self._created,
+                "recycled": self._recycled,
+                "discarded": self._discarded,
+                "acquired": self._acquired,
+                "waited": self._waits,
+                "timeouts": self._timeouts,
+                "wait_avg_ms": round(self._wait_total / self._acquired * 1000, 3) if self._acquired else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+def _connect_mysql():
+    return pymysql.connect(
+        host=os.getenv("DB_HOST"),
+        port=int(os.getenv("DB_PORT")),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        db=os.getenv("DB_NAME"),
+        charset="utf8",
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=True,
+    )
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """현재 프로세스의 커넥션 풀을 반환합니다. (Celery prefork 등 fork 이후엔 새로 생성)"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            # 부모 프로세스의 소켓은 공유하지 않고 버림
+            _pool = ConnectionPool(_connect_mysql)
+            _pool_pid = pid
+        return _pool
+
+
+def get_pool_stats() -> dict:
+    """커넥션 풀 사용 지표(대기 시간, 사용 중 개수, 생성/재생성 횟수 등)."""
+    return get_pool().stats()
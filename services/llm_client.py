@@ -0,0 +1,209 @@
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from config.settings import OPENAI_API_KEY
+
+load_dotenv()
+
+# openai | stub (stub: 네트워크 없이 그럴듯한 JSON/문구를 돌려주는 부하 테스트용 백엔드)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
+LLM_DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+# 프로세스 공용 keep-alive HTTP 커넥션 풀
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10"))
+LLM_HTTP_KEEPALIVE_EXPIRY_SEC = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_SEC", "60"))
+LLM_HTTP_TIMEOUT_SEC = float(os.getenv("LLM_HTTP_TIMEOUT_SEC", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# stub 백엔드의 인위적인 응답 지연 (실제 API 지연 흉내)
+LLM_STUB_LATENCY_MS = int(os.getenv("LLM_STUB_LATENCY_MS", "0"))
+
+_SONG_LINE_RE = re.compile(r"^\s*(\d+)\.(.*?)/(.*?)/(.*?)-(.*?)/(.*?)\((.*),(.*?)\)\s*$")
+_COMPACT_LINE_RE = re.compile(r"^(\d+)\|(.*)\|(.*)\|(.*)\|(.*)$")
+_TARGET_COUNT_RE = re.compile(r"다음 수를 정확히 선별:\s*(\d+)")
+_FAVORITE_LINE_RE = re.compile(r"^- (.*?)/.*? by (.*?)/.*?\(장르: (.*?), 분위기: (.*?)\)\s*$")
+
+
+class StubChatModel(BaseChatModel):
+    """
+    오프라인 부하 테스트용 채팅 모델.
+    프롬프트 종류(취향 분석/추천/태그라인)를 보고 각 파서가 받아들이는 형식의 응답을 만듭니다.
+    """
+
+    latency_ms: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    @staticmethod
+    def _prompt_text(messages: List[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    @staticmethod
+    def _analyze(prompt: str) -> str:
+        genres, moods, artists = [], [], []
+        for line in prompt.splitlines():
+            m = _FAVORITE_LINE_RE.match(line)
+            if m:
+                artists.append(m.group(2))
+                genres.append(m.group(3))
+                moods.append(m.group(4))
+
+        def top(values: List[str], n: int) -> List[str]:
+            counts: Dict[str, int] = {}
+            for v in values:
+                if v and v != "Unknown":
+                    counts[v] = counts.get(v, 0) + 1
+            return sorted(counts, key=lambda v: -counts[v])[:n]
+
+        return json.dumps({
+            "preferred_genres": top(genres, 3),
+            "preferred_moods": top(moods, 3),
+            "overall_taste": "stub 취향 요약",
+            "favorite_artists": top(artists, 5),
+        }, ensure_ascii=False)
+
+    @staticmethod
+    def _recommend(prompt: str) -> str:
+        songs = []
+        for line in prompt.splitlines():
+            m = _SONG_LINE_RE.match(line)
+            if m:
+                _, title_kr, title_en, title_yomi, artist_kr, artist, genre, mood = m.groups()
+                songs.append({
+                    "title": title_kr, "title_kr": title_kr, "title_en": title_en, "title_yomi": title_yomi,
+                    "artist": artist, "artist_kr": artist_kr, "genre": genre, "mood": mood,
+                    "reason": "stub 추천",
+                })
+        m = _TARGET_COUNT_RE.search(prompt)
+        target = int(m.group(1)) if m else 20
+        return json.dumps({"recommended_songs": random.sample(songs, min(target, len(songs)))}, ensure_ascii=False)
+
+    @staticmethod
+    def _recommend_compact(prompt: str) -> str:
+        picks = []
+        for line in prompt.splitlines():
+            m = _COMPACT_LINE_RE.match(line.strip())
+            if m:
+                index, _, _, genre, mood = m.groups()
+                picks.append([int(index), mood, genre])
+        m = _TARGET_COUNT_RE.search(prompt)
+        target = int(m.group(1)) if m else 20
+        return json.dumps({"picks": random.sample(picks, min(target, len(picks)))}, ensure_ascii=False)
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = self._prompt_text(messages)
+        if '"picks"' in prompt:
+            content = self._recommend_compact(prompt)
+        elif '"recommended_songs"' in prompt:
+            content = self._recommend(prompt)
+        elif '"preferred_genres"' in prompt:
+            content = self._analyze(prompt)
+        else:
+            content = f"stub 태그라인 #{random.randint(1, 999)} 🎤"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return self._respond(messages)
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_SEC,
+    )
+
+
+_lock = threading.Lock()
+_pid: Optional[int] = None
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_clients: Dict[Tuple[str, float, Optional[int]], BaseChatModel] = {}
+
+
+def _ensure_process_locked() -> None:
+    """fork 이후에는 부모의 소켓/클라이언트를 버리고 새로 만듭니다."""
+    global _pid, _http_client, _http_async_client
+    pid = os.getpid()
+    if _pid == pid:
+        return
+    _clients.clear()
+    _http_client = None
+    _http_async_client = None
+    _pid = pid
+
+
+def _build(model: str, temperature: float, max_tokens: Optional[int]) -> BaseChatModel:
+    global _http_client, _http_async_client
+    if LLM_BACKEND == "stub":
+        return StubChatModel(latency_ms=LLM_STUB_LATENCY_MS)
+
+    from langchain_openai import ChatOpenAI
+
+    if _http_client is None:
+        _http_client = httpx.Client(limits=_http_limits(), timeout=LLM_HTTP_TIMEOUT_SEC)
+    if _http_async_client is None:
+        _http_async_client = httpx.AsyncClient(limits=_http_limits(), timeout=LLM_HTTP_TIMEOUT_SEC)
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        openai_api_key=OPENAI_API_KEY,
+        max_retries=LLM_MAX_RETRIES,
+        http_client=_http_client,
+        http_async_client=_http_async_client,
+    )
+
+
+def get_llm(model: str = LLM_DEFAULT_MODEL, temperature: float = 0.7, max_tokens: Optional[int] = None) -> BaseChatModel:
+    """
+    (model, temperature, max_tokens)별로 프로세스당 하나씩 만든 채팅 모델을 반환합니다.
+    모든 OpenAI 클라이언트는 같은 keep-alive HTTP 커넥션 풀을 공유합니다.
+    """
+    key = (model, float(temperature), max_tokens)
+    if _pid == os.getpid():
+        llm = _clients.get(key)
+        if llm is not None:
+            return llm
+    with _lock:
+        _ensure_process_locked()
+        llm = _clients.get(key)
+        if llm is None:
+            llm = _build(model, temperature, max_tokens)
+            _clients[key] = llm
+        return llm
+
+
+def reset_llm_clients() -> None:
+    """등록된 클라이언트와 HTTP 커넥션 풀을 정리합니다. (설정 변경/테스트용)"""
+    global _http_client, _http_async_client
+    with _lock:
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+        # AsyncClient는 이벤트 루프 밖에서 닫을 수 없으므로 참조만 끊음
+        _http_async_client = None
+
@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+from config.redis import redis_client
+
+load_dotenv()
+
+# 프로세스 내 캐시 용량(bytes, 종류별) / 항목 보관 시간 (무효화 메시지를 놓쳤을 때 오래된 값이 남는 최대 시간)
+LOCAL_CACHE_MAX_BYTES = int(os.getenv("LOCAL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+LOCAL_CACHE_TTL_SEC = int(os.getenv("LOCAL_CACHE_TTL_SEC", "120"))
+# 무효화 구독이 끊겼을 때 다시 연결하기까지 대기 시간
+LOCAL_CACHE_RECONNECT_SEC = float(os.getenv("LOCAL_CACHE_RECONNECT_SEC", "1"))
+
+# 무효화 채널: cache_invalidate:{family}, 메시지 = member_id (INVALIDATE_ALL이면 전체)
+_CHANNEL_PREFIX = "cache_invalidate:"
+INVALIDATE_ALL = "*"
+
+
+def invalidation_channel(family: str) -> str:
+    return f"{_CHANNEL_PREFIX}{family}"
+
+
+def publish_invalidation(pipe, family: str, member_id: str) -> None:
+    """
+    캐시를 쓰는 파이프라인에 무효화 메시지를 함께 넣습니다. (쓰기 명령 뒤에 넣어야 다른 프로세스가 새 값을 읽음)
+    클라이언트 / 동기·비동기 파이프라인 / RedisWriteBatcher 모두 사용 가능
+    """
+    pipe.publish(invalidation_channel(family), str(member_id))
+
+
+class LocalBytesCache:
+    """
+    Redis 값(bytes)을 그대로 보관하는 용량(bytes) 제한 TTL LRU.
+    - 다른 프로세스가 값을 바꾸면 무효화 채널 메시지로 지워짐 (_InvalidationListener)
+    - 구독이 연결돼 있지 않으면 get은 항상 None (무효화를 받을 수 없으므로 Redis로 감)
+    - 조회 → Redis 읽기 → put 사이에 무효화가 끼면 put을 버림 (version으로 확인)
+    """
+
+    def __init__(self, family: str, max_bytes: int, ttl_sec: int):
+        self.family = family
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._version = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def version(self) -> int:
+        """put 전에 받아 두는 값. 그 사이 무효화가 있었으면 put이 무시됨"""
+        return self._version
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled or not _listener.ensure_connected():
+            return None
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self._stats["misses"] += 1
+                return None
+            if time.monotonic() >= item[1]:
+                self._drop(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self._stats["hits"] += 1
+            return item[0]
+
+    def put(self, key: str, value: bytes, version: int) -> None:
+        if not self.enabled or not value or len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            self._drop(key)
+            self._items[key] = (value, time.monotonic() + self.ttl_sec)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._items))
+                self._drop(oldest)
+                self._stats["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._bytes -= len(item[0])
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._version += 1
+            if key in self._items:
+                self._drop(key)
+                self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._stats["invalidations"] += len(self._items)
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._items)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["max_bytes"] = self.max_bytes
+        stats["ttl_sec"] = self.ttl_sec
+        stats["listener_connected"] = _listener.connected
+        return stats
+
+
+_caches: Dict[str, LocalBytesCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_local_cache(family: str) -> LocalBytesCache:
+    """캐시 종류별 프로세스 내 캐시 (처음 호출 시 생성)"""
+    with _caches_lock:
+        cache = _caches.get(family)
+        if cache is None:
+            cache = _caches[family] = LocalBytesCache(family, LOCAL_CACHE_MAX_BYTES, LOCAL_CACHE_TTL_SEC)
+        return cache
+
+
+def _clear_all() -> None:
+    for cache in list(_caches.values()):
+        cache.clear()
+
+
+class _InvalidationListener:
+    """
+    cache_invalidate:* 채널을 구독해 로컬 캐시를 지우는 백그라운드 스레드. (fork 후 첫 사용 시 시작)
+    연결/재연결 직후에는 그동안 놓친 메시지가 있을 수 있으므로 로컬 캐시를 전부 비웁니다.
+    """
+
+    def __init__(self):
+        self.connected = False
+        self._lock = threading.Lock()
+        self._thread_pid: Optional[int] = None
+
+    def ensure_connected(self) -> bool:
+        pid = os.getpid()
+        if self._thread_pid != pid:
+            with self._lock:
+                if self._thread_pid != pid:
+                    self._thread_pid = pid
+                    self.connected = False
+                    threading.Thread(target=self._run, name="local-cache-invalidation", daemon=True).start()
+        return self.connected
+
+    def _handle(self, message: dict) -> None:
+        channel, data = message.get("channel"), message.get("data")
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        cache = _caches.get(channel[len(_CHANNEL_PREFIX):]) if channel else None
+        if cache is None:
+            return
+        if data == INVALIDATE_ALL:
+            cache.clear()
+        else:
+            cache.invalidate(data)
+
+    def _run(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub()
+                pubsub.psubscribe(f"{_CHANNEL_PREFIX}*")
+                # 구독 확인을 받은 뒤부터의 메시지만 보장되므로 확인 후 비우고 사용 시작
+                confirmed = None
+                while confirmed is None or confirmed.get("type") != "psubscribe":
+                    confirmed = pubsub.get_message(timeout=LOCAL_CACHE_RECONNECT_SEC)
+                _clear_all()
+                self.connected = True
+                for message in pubsub.listen():
+                    if message.get("type") == "pmessage":
+                        self._handle(message)
+            except Exception as e:
+                print(f"[LOCAL_CACHE] invalidation listener error: {e}")
+            finally:
+                self.connected = False
+                _clear_all()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(LOCAL_CACHE_RECONNECT_SEC)
+
+
+_listener = _InvalidationListener()
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 버퍼에 이만큼 쌓이면 바로 전송 / 백그라운드 전송 주기
+REDIS_BATCH_MAX_COMMANDS = int(os.getenv("REDIS_BATCH_MAX_COMMANDS", "200"))
+REDIS_BATCH_FLUSH_MS = int(os.getenv("REDIS_BATCH_FLUSH_MS", "200"))
+
+
+class RedisWriteBatcher:
+    """
+    Redis 쓰기 명령을 모아 파이프라인(transaction=False) 한 번으로 보내는 write-behind 버퍼.
+    파이프라인처럼 batcher.setex(...), batcher.hset(...) 형태로 명령을 쌓을 수 있어
+    pipe를 받는 함수(cache_service.save_*, cache_maintenance.index_add 등)에 그대로 넘길 수 있습니다.
+    - max_commands개가 쌓이면 즉시 전송
+    - background=True면 flush_interval_ms마다 남은 명령을 전송 (fork 후 첫 사용 시 스레드 시작)
+    - with 블록을 벗어나거나 flush()를 호출하면 즉시 전송 (쓰기 확인이 필요한 곳에서 사용)
+    쓰기 전용입니다. 결과가 필요한 읽기 명령은 클라이언트로 직접 보내세요.
+    """
+
+    def __init__(self, client, max_commands: int = None, flush_interval_ms: int = None, background: bool = False):
+        self._client = client
+        self._max_commands = max_commands or REDIS_BATCH_MAX_COMMANDS
+        self._interval = (flush_interval_ms or REDIS_BATCH_FLUSH_MS) / 1000
+        self._background = background
+        self._buffer: List[Tuple[str, tuple, dict]] = []
+        self._lock = threading.Lock()
+        # 전송 순서 보장 (동시에 두 번 flush돼도 먼저 쌓인 명령이 먼저 나감)
+        self._flush_lock = threading.Lock()
+        self._thread_pid: Optional[int] = None
+        self.flushes = 0
+        self.commands = 0
+        self.errors = 0
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def _queue(*args: Any, **kwargs: Any) -> "RedisWriteBatcher":
+            self._add(name, args, kwargs)
+            return self
+        return _queue
+
+    def _add(self, name: str, args: tuple, kwargs: dict) -> None:
+        if self._background:
+            self._ensure_thread()
+        with self._lock:
+            self._buffer.append((name, args, kwargs))
+            full = len(self._buffer) >= self._max_commands
+        if full:
+            self.flush()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def flush(self) -> list:
+        """쌓인 명령을 파이프라인 한 번으로 보냅니다. 실패하면 예외를 그대로 올립니다. (명령은 버려짐)"""
+        with self._flush_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, []
+            if not buffer:
+                return []
+            pipe = self._client.pipeline(transaction=False)
+            for name, args, kwargs in buffer:
+                getattr(pipe, name)(*args, **kwargs)
+            try:
+                results = pipe.execute()
+            except Exception:
+                self.errors += 1
+                raise
+            self.flushes += 1
+            self.commands += len(buffer)
+            return results
+
+    # 파이프라인과 같은 이름으로도 호출 가능
+    execute = flush
+
+    def _ensure_thread(self) -> None:
+        pid = os.getpid()
+        if self._thread_pid == pid:
+            return
+        with self._lock:
+            if self._thread_pid == pid:
+                return
+            self._thread_pid = pid
+            threading.Thread(target=self._run, name="redis-write-batcher", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[REDIS_BATCH] background flush error: {e}")
+
+    def stats(self) -> dict:
+        return {"pending": len(self._buffer), "flushes": self.flushes, "commands": self.commands, "errors": self.errors}
+
+    def __enter__(self) -> "RedisWriteBatcher":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
@@ -1,169 +1,446 @@
 import os
-import redis
-import logging
 import json
+import logging
+import time
+import uuid
 from datetime import datetime
+import redis
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from pytz import timezone
 from dotenv import load_dotenv
-from services.database_service import get_all_active_users_with_favorites
+from services.database_service import get_all_active_users_with_favorites, iter_active_user_chunks
+from services.catalog_service import get_catalog
+from services.cache_service import (
+    _validated_preference, load_preference_cache_many, build_recommendation_cache_data, write_recommendation_cache,
+    find_stale_recommendations
+)
+from services.redis_batch import RedisWriteBatcher
+from services.cache_maintenance import clear_family, prune_indexes, rebuild_indexes_once
+from config.redis import redis_client
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-redis_client = redis.Redis(
-    host=os.getenv("REDIS_HOST"),
-    port=int(os.getenv("REDIS_PORT")),
-    password=os.getenv("REDIS_PASSWORD"), 
-    decode_responses=True,
-)
+
+# 후보 채점을 묶어서 처리하는 사용자 수 (체크포인트 단위)
+REGEN_BATCH_SIZE = int(os.getenv("REGEN_BATCH_SIZE", "32"))
+# 샤드 하나(Celery 작업 하나)가 맡는 사용자 수
+REGEN_SHARD_SIZE = int(os.getenv("REGEN_SHARD_SIZE", "256"))
+# 동시에 돌아가는 샤드 작업 수 (lane 수)
+REGEN_CONCURRENCY = int(os.getenv("REGEN_CONCURRENCY", "4"))
+# lane 작업이 살아 있다는 표시 (배치마다 갱신, 만료되면 그 lane의 샤드는 재개 대상)
+REGEN_LEASE_SEC = int(os.getenv("REGEN_LEASE_SEC", "900"))
+# 진행 상태(체크포인트) 보관 시간
+REGEN_STATE_TTL_SEC = int(os.getenv("REGEN_STATE_TTL_SEC", str(2 * 24 * 3600)))
+# 좋아요/카탈로그가 그대로이고 캐시가 곧 만료되지 않는 사용자는 건너뜀
+REGEN_SKIP_UNCHANGED = os.getenv("REGEN_SKIP_UNCHANGED", "true").lower() == "true"
+# 남은 TTL이 이보다 짧으면 바뀐 게 없어도 다시 생성 (만료로 캐시 미스가 나지 않도록)
+REGEN_REFRESH_BEFORE_EXPIRY_SEC = int(os.getenv("REGEN_REFRESH_BEFORE_EXPIRY_SEC", str(24 * 3600)))
+# 중단된 재생성을 이어서 돌리는 주기 (분)
+REGEN_RESUME_INTERVAL_MIN = int(os.getenv("REGEN_RESUME_INTERVAL_MIN", "30"))
+
+_KST = timezone("Asia/Seoul")
+
+# --- 진행 상태 키 ---
+# regen:{run_id}                  hash: status / user_count / skipped / shard_count / started_at / finished_at
+# regen:{run_id}:queue            list: 아직 처리할 샤드 번호
+# regen:{run_id}:shard:{n}        hash: status / lane / cursor / users / success / fail / elapsed_sec
+# regen:{run_id}:members:{n}      string(JSON): 샤드의 [[member_id, favorite_song_ids], ...]
+# regen:{run_id}:lane:{n}         string: lane lease, 값 = lane 작업의 token (만료 = lane 작업 중단)
+# regen:{run_id}:processing:{n}   list: lane이 큐에서 가져가 처리 중인 샤드 (LMOVE로 꺼내면서 옮기므로 샤드가 사라지지 않음)
+
+def _run_key(run_id: str) -> str:
+    return f"regen:{run_id}"
+
+def _queue_key(run_id: str) -> str:
+    return f"regen:{run_id}:queue"
+
+def _shard_key(run_id: str, shard: int) -> str:
+    return f"regen:{run_id}:shard:{shard}"
+
+def _members_key(run_id: str, shard: int) -> str:
+    return f"regen:{run_id}:members:{shard}"
+
+def _lane_key(run_id: str, lane: int) -> str:
+    return f"regen:{run_id}:lane:{lane}"
+
+def _processing_key(run_id: str, lane: int) -> str:
+    return f"regen:{run_id}:processing:{lane}"
+
+def _today_run_id() -> str:
+    return datetime.now(_KST).strftime("%Y%m%d")
+
+def _now() -> str:
+    return datetime.now(_KST).strftime("%Y-%m-%d %H:%M:%S")
+
+def _cached_preference(member_id: str, favorite_song_ids: list[int], entry: dict = None):
+    """즐겨찾기가 그대로인 사용자의 기존 취향 분석 결과를 반환합니다. (없거나 바뀌었으면 None)"""
+    preference = _validated_preference(entry, favorite_song_ids)
+    if preference:
+        logger.info(f"   💾 사용자 {member_id}: 기존 취향 분석 재사용")
+    else:
+        logger.info(f"   🆕 사용자 {member_id}: 취향 갱신 필요 (캐시 없음 또는 즐겨찾기 변경)")
+    return preference
+
+def _save_regenerated(member_id: str, favorite_song_ids: list[int], result, pipe) -> bool:
+    """
+    재생성 결과로 추천 캐시를 덮어쓰는 명령을 pipe에 쌓습니다. (삭제 후 재생성하지 않으므로 작업 중에도 이전 추천이 보임)
+    결과가 유효하면 True (실제 전송은 배치 끝의 flush)
+    """
+    if result is None:
+        logger.error(f"   ❌ 사용자 {member_id}: 추천 서비스가 None을 반환했습니다")
+        return False
+    if "error" in result:
+        logger.error(f"   ❌ 사용자 {member_id}: 추천 생성 실패 - {result.get('error')}")
+        return False
+
+    # /recommend, Celery 작업과 같은 캐시 형식
+    write_recommendation_cache(member_id, build_recommendation_cache_data(result), pipe)
+
+    groups_count = len(result.get('groups', []))
+    candidates_count = len(result.get('candidates', []))
+    logger.info(f"   ✅ 사용자 {member_id}: 추천 생성 (추천그룹: {groups_count}개, 후보곡: {candidates_count}개)")
+    return True
+
+def _regenerate_batch(batch_users: list[tuple[str, list[int]]]) -> tuple[int, int]:
+    """
+    사용자 배치 하나의 추천을 생성해 캐시에 씁니다. (성공 수, 실패 수)
+    취향 캐시는 MGET 한 번으로 미리 읽고, 취향/추천 캐시 쓰기는 RedisWriteBatcher로 모아 파이프라인으로 보냅니다.
+    체크포인트보다 먼저 flush하므로 체크포인트에 반영된 사용자는 캐시 쓰기까지 끝난 상태입니다.
+    """
+    from core.recommendation_service import recommend_songs_batch
+
+    entries = load_preference_cache_many([member_id for member_id, _ in batch_users])
+    users = [(member_id, favs, _cached_preference(member_id, favs, entries.get(member_id))) for member_id, favs in batch_users]
+    writer = RedisWriteBatcher(redis_client)
+    try:
+        results = recommend_songs_batch(users, preference_entries=entries, pipe=writer)
+    except Exception as e:
+        logger.error(f"   ❌ 배치 추천 생성 중 예외 발생 - {e}")
+        import traceback
+        logger.error(f"   🔍 상세 스택 트레이스: {traceback.format_exc()}")
+        return 0, len(users)
+
+    success = fail = 0
+    for member_id, favorite_song_ids, _ in users:
+        try:
+            if _save_regenerated(member_id, favorite_song_ids, results.get(member_id), writer):
+                success += 1
+            else:
+                fail += 1
+        except Exception as e:
+            logger.error(f"   ❌ 사용자 {member_id}: 처리 중 예외 발생 ({type(e).__name__}) - {e}")
+            fail += 1
+
+    try:
+        writer.flush()
+    except Exception as e:
+        logger.error(f"   ❌ 배치 캐시 저장 실패 ({writer.stats()['commands']}개 명령은 이미 전송됨) - {e}")
+        return 0, len(users)
+    return success, fail
+
+# --- 실행 생성 / 재개 ---
+
+def _create_run(run_id: str) -> bool:
+    """
+    다시 생성할 사용자만 골라 REGEN_SHARD_SIZE명씩 샤드로 나눠 저장하고 큐에 넣습니다.
+    좋아요 지문/카탈로그 지문이 추천 캐시 메타와 같고 곧 만료되지 않는 사용자는 건너뜁니다. (REGEN_SKIP_UNCHANGED)
+    이미 다른 프로세스가 만들고 있으면 False
+    """
+    if not redis_client.set(f"{_run_key(run_id)}:creating", "1", nx=True, ex=600):
+        return False
+    try:
+        redis_client.delete(_queue_key(run_id))
+        catalog_fingerprint = get_catalog().fingerprint if REGEN_SKIP_UNCHANGED else None
+        user_count = skipped = shard_count = 0
+        pending: list[tuple[str, list[int]]] = []
+
+        def _flush(shard_users: list[tuple[str, list[int]]]) -> None:
+            nonlocal shard_count
+            shard = shard_count
+            pipe = redis_client.pipeline()
+            pipe.setex(_members_key(run_id, shard), REGEN_STATE_TTL_SEC, json.dumps(shard_users))
+            pipe.delete(_shard_key(run_id, shard))
+            pipe.hset(_shard_key(run_id, shard), mapping={
+                "status": "pending", "cursor": 0, "users": len(shard_users), "success": 0, "fail": 0, "elapsed_sec": 0
+            })
+            pipe.expire(_shard_key(run_id, shard), REGEN_STATE_TTL_SEC)
+            pipe.rpush(_queue_key(run_id), shard)
+            pipe.execute()
+            shard_count += 1
+
+        # DB 스트리밍 중에는 LLM 호출 없이 변경 감지(MGET/TTL)와 샤드 저장만 (커넥션 점유 시간 최소화)
+        for chunk in iter_active_user_chunks(REGEN_SHARD_SIZE):
+            chunk = [(member_id, favs) for member_id, favs in chunk if favs]
+            user_count += len(chunk)
+            if REGEN_SKIP_UNCHANGED:
+                stale = find_stale_recommendations(chunk, catalog_fingerprint, REGEN_REFRESH_BEFORE_EXPIRY_SEC)
+                skipped += len(chunk) - len(stale)
+                chunk = stale
+            pending.extend(chunk)
+            while len(pending) >= REGEN_SHARD_SIZE:
+                _flush(pending[:REGEN_SHARD_SIZE])
+                pending = pending[REGEN_SHARD_SIZE:]
+        if pending:
+            _flush(pending)
+
+        pipe = redis_client.pipeline()
+        pipe.hset(_run_key(run_id), mapping={
+            "status": "running" if shard_count else "completed",
+            "user_count": user_count,
+            "skipped": skipped,
+            "shard_count": shard_count,
+            "started_at": _now(),
+        })
+        pipe.expire(_run_key(run_id), REGEN_STATE_TTL_SEC)
+        pipe.expire(_queue_key(run_id), REGEN_STATE_TTL_SEC)
+        pipe.execute()
+        logger.info(f"👥 좋아요가 있는 활성 사용자 {user_count}명 중 {skipped}명은 변경 없음(건너뜀) "
+                    f"→ {user_count - skipped}명, 샤드 {shard_count}개 (샤드당 최대 {REGEN_SHARD_SIZE}명)")
+        return True
+    finally:
+        redis_client.delete(f"{_run_key(run_id)}:creating")
+
+def _requeue_lane(run_id: str, lane: int) -> list[int]:
+    """lane lease가 없을 때만 그 lane의 처리 중 목록을 큐로 되돌립니다. (확인~이동 사이에 lane이 다시 시작되면 취소)"""
+    lane_key, processing_key = _lane_key(run_id, lane), _processing_key(run_id, lane)
+    try:
+        with redis_client.pipeline() as pipe:
+            pipe.watch(lane_key, processing_key)
+            shards = pipe.lrange(processing_key, 0, -1)
+            if pipe.exists(lane_key) or not shards:
+                pipe.unwatch()
+                return []
+            pipe.multi()
+            pipe.delete(processing_key)
+            pipe.rpush(_queue_key(run_id), *shards)
+            for shard in shards:
+                pipe.hset(_shard_key(run_id, int(shard)), "status", "pending")
+            pipe.execute()
+            return [int(shard) for shard in shards]
+    except redis.WatchError:
+        return []
+
+def requeue_stalled_shards(run_id: str) -> list[int]:
+    """
+    lease가 만료된(작업이 죽은) lane이 처리 중이던 샤드를 큐에 다시 넣습니다. 체크포인트(cursor)부터 이어서 처리됩니다.
+    lane이 살아 있는 샤드는 건드리지 않습니다.
+    """
+    shard_count = int(redis_client.hget(_run_key(run_id), "shard_count") or 0)
+    pipe = redis_client.pipeline()
+    for shard in range(shard_count):
+        pipe.hget(_shard_key(run_id, shard), "lane")
+    # 지금 설정의 lane + 이전에 샤드를 맡았던 lane (REGEN_CONCURRENCY가 줄었을 수 있음)
+    lanes = set(range(REGEN_CONCURRENCY)) | {int(lane) for lane in pipe.execute() if lane is not None}
+    requeued = []
+    for lane in sorted(lanes):
+        requeued.extend(_requeue_lane(run_id, lane))
+    return requeued
+
+def _dispatch_lanes(run_id: str) -> None:
+    from workers.tasks import task_regenerate_lane
+    for lane in range(REGEN_CONCURRENCY):
+        task_regenerate_lane.apply_async(kwargs={"run_id": run_id, "lane": lane})
+
+def start_regeneration(run_id: str = None, inline: bool = False) -> dict:
+    """
+    추천 캐시 재생성을 시작하거나, 이미 시작된 실행(run_id, 기본은 오늘 날짜)이 있으면 이어서 진행합니다.
+    - 사용자를 샤드로 나눠 Redis 큐에 넣고, REGEN_CONCURRENCY개의 lane 작업(Celery)이 샤드를 하나씩 가져가 처리
+    - 샤드 진행 상황은 배치마다 체크포인트로 저장되어 작업이 죽어도 그 지점부터 재개
+    inline=True면 Celery 없이 현재 프로세스에서 lane 하나로 처리합니다. (개발/테스트용)
+    """
+    run_id = run_id or _today_run_id()
+    status = redis_client.hget(_run_key(run_id), "status")
+    if status == "completed":
+        logger.info(f"📝 재생성 {run_id}: 이미 완료됨")
+        return {"run_id": run_id, "status": "completed"}
+
+    if status is None:
+        logger.info(f"🚀 재생성 {run_id}: 새 실행 생성")
+        if not _create_run(run_id):
+            logger.info(f"📝 재생성 {run_id}: 다른 프로세스가 생성 중")
+            return {"run_id": run_id, "status": "creating"}
+    else:
+        requeued = requeue_stalled_shards(run_id)
+        logger.info(f"🔁 재생성 {run_id}: 이어서 진행 (중단된 샤드 {len(requeued)}개 재등록)")
+
+    if inline:
+        run_lane(run_id, 0)
+    else:
+        _dispatch_lanes(run_id)
+    return {"run_id": run_id, "status": redis_client.hget(_run_key(run_id), "status") or "running"}
+
+# --- lane / 샤드 처리 ---
+
+def _with_lease(run_id: str, lane: int, token: str, queue_commands) -> bool:
+    """
+    lane lease가 아직 이 작업(token)의 것일 때만 queue_commands(pipe)가 쌓은 명령과 lease 갱신을 한 트랜잭션으로 실행합니다.
+    lease를 잃었으면(만료 후 다른 작업이 가져감) 아무것도 쓰지 않고 False
+    """
+    lane_key = _lane_key(run_id, lane)
+    try:
+        with redis_client.pipeline() as pipe:
+            pipe.watch(lane_key)
+            if pipe.get(lane_key) != token:
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            queue_commands(pipe)
+            pipe.expire(lane_key, REGEN_LEASE_SEC)
+            pipe.execute()
+            return True
+    except redis.WatchError:
+        return False
+
+def _release_lease(run_id: str, lane: int, token: str) -> None:
+    """내가 잡은 lease일 때만 해제 (만료 후 다른 작업이 잡은 lease는 건드리지 않음)"""
+    _with_lease(run_id, lane, token, lambda pipe: pipe.delete(_lane_key(run_id, lane)))
+
+def _regenerate_shard(run_id: str, shard: int, lane: int, token: str) -> bool:
+    """샤드 하나를 체크포인트부터 끝까지 처리합니다. 도중에 lease를 잃으면 체크포인트를 쓰지 않고 False"""
+    shard_key = _shard_key(run_id, shard)
+    raw = redis_client.get(_members_key(run_id, shard))
+    members = [(str(m), favs) for m, favs in json.loads(raw)] if raw else []
+    cursor = int(redis_client.hget(shard_key, "cursor") or 0)
+    if not _with_lease(run_id, lane, token, lambda pipe: pipe.hset(shard_key, mapping={"status": "running", "lane": lane})):
+        return False
+    if cursor:
+        logger.info(f"🔁 샤드 {shard}: {cursor}/{len(members)}명 지점부터 재개")
+
+    while cursor < len(members):
+        batch = [(m, favs) for m, favs in members[cursor:cursor + REGEN_BATCH_SIZE] if favs]
+        started = time.perf_counter()
+        success, fail = _regenerate_batch(batch) if batch else (0, 0)
+        cursor = min(cursor + REGEN_BATCH_SIZE, len(members))
+
+        elapsed = time.perf_counter() - started
+
+        # 체크포인트 + lease 갱신
+        def _checkpoint(pipe):
+            pipe.hset(shard_key, "cursor", cursor)
+            pipe.hincrby(shard_key, "success", success)
+            pipe.hincrby(shard_key, "fail", fail)
+            pipe.hincrbyfloat(shard_key, "elapsed_sec", elapsed)
+        if not _with_lease(run_id, lane, token, _checkpoint):
+            return False
+        logger.info(f"   📌 샤드 {shard}: {cursor}/{len(members)}명 처리 (성공 {success}, 실패 {fail})")
+
+    def _done(pipe):
+        pipe.hset(shard_key, "status", "done")
+        pipe.lrem(_processing_key(run_id, lane), 1, shard)
+    return _with_lease(run_id, lane, token, _done)
+
+def _claim_shard(run_id: str, lane: int):
+    """이 lane이 처리하다 남긴 샤드가 있으면 그것부터, 없으면 큐에서 꺼내 처리 중 목록으로 옮깁니다. (LMOVE 한 번이라 중간에 죽어도 샤드가 사라지지 않음)"""
+    processing_key = _processing_key(run_id, lane)
+    shard = redis_client.lindex(processing_key, 0)
+    if shard is None:
+        shard = redis_client.lmove(_queue_key(run_id), processing_key, "LEFT", "RIGHT")
+        redis_client.expire(processing_key, REGEN_STATE_TTL_SEC)
+    return shard
+
+def run_lane(run_id: str, lane: int, max_shards: int = None) -> int:
+    """
+    lane 하나: 큐에서 샤드를 꺼내 처리하는 일을 큐가 빌 때까지(또는 max_shards개) 반복합니다. 처리한 샤드 수를 반환.
+    같은 lane이 이미 돌고 있으면(lease 보유 중) 바로 끝내고, 처리 도중 lease를 잃으면(만료) 그 자리에서 멈춥니다.
+    """
+    token = uuid.uuid4().hex
+    if not redis_client.set(_lane_key(run_id, lane), token, nx=True, ex=REGEN_LEASE_SEC):
+        logger.info(f"📝 재생성 {run_id}: lane {lane}이(가) 이미 실행 중")
+        return 0
+    processed = 0
+    try:
+        while max_shards is None or processed < max_shards:
+            shard = _claim_shard(run_id, lane)
+            if shard is None:
+                break
+            if not _regenerate_shard(run_id, int(shard), lane, token):
+                logger.warning(f"⚠️ 재생성 {run_id}: lane {lane}의 lease가 만료되어 샤드 {shard} 처리를 중단합니다")
+                return processed
+            processed += 1
+    finally:
+        _release_lease(run_id, lane, token)
+    _finish_if_done(run_id)
+    return processed
+
+def has_pending_shards(run_id: str) -> bool:
+    return bool(redis_client.llen(_queue_key(run_id)))
+
+def _finish_if_done(run_id: str) -> None:
+    shard_count = int(redis_client.hget(_run_key(run_id), "shard_count") or 0)
+    pipe = redis_client.pipeline()
+    for shard in range(shard_count):
+        pipe.hget(_shard_key(run_id, shard), "status")
+    if any(status != "done" for status in pipe.execute()):
+        return
+    # 마지막 lane 하나만 완료 처리/리포트
+    if redis_client.hsetnx(_run_key(run_id), "finished_at", _now()):
+        redis_client.hset(_run_key(run_id), "status", "completed")
+        log_regeneration_report(run_id)
+
+def regeneration_report(run_id: str = None) -> dict:
+    """재생성 실행의 진행 상태와 샤드별 처리량(명/초)을 반환합니다."""
+    run_id = run_id or _today_run_id()
+    run = redis_client.hgetall(_run_key(run_id))
+    shards = []
+    for shard in range(int(run.get("shard_count", 0))):
+        state = redis_client.hgetall(_shard_key(run_id, shard))
+        elapsed = float(state.get("elapsed_sec", 0))
+        processed = int(state.get("cursor", 0))
+        shards.append({
+            "shard": shard,
+            "lane": int(state["lane"]) if state.get("lane") else None,
+            "status": state.get("status", "pending"),
+            "users": int(state.get("users", 0)),
+            "processed": processed,
+            "success": int(state.get("success", 0)),
+            "fail": int(state.get("fail", 0)),
+            "elapsed_sec": round(elapsed, 1),
+            "users_per_sec": round(processed / elapsed, 2) if elapsed else 0.0,
+        })
+    return {"run_id": run_id, **run, "shards": shards}
+
+def log_regeneration_report(run_id: str) -> None:
+    report = regeneration_report(run_id)
+    shards = report["shards"]
+    success = sum(s["success"] for s in shards)
+    fail = sum(s["fail"] for s in shards)
+    logger.info(f"📋 재생성 {run_id} 완료 - 성공: {success}명, 실패: {fail}명, 변경 없음(건너뜀): {report.get('skipped', 0)}명 "
+                f"({report.get('started_at')} ~ {report.get('finished_at')})")
+    for s in shards:
+        logger.info(f"   📊 샤드 {s['shard']} (lane {s['lane']}): {s['processed']}명, 성공 {s['success']} / 실패 {s['fail']}, "
+                    f"{s['elapsed_sec']}초, {s['users_per_sec']}명/초")
 
 def regenerate_all_recommendations():
     """
-    매일 새벽 3시에 실행되는 추천 캐시 삭제 및 재생성 함수
+    매일 새벽 3시에 실행되는 추천 캐시 재생성 함수
+    API 프로세스에서는 샤드를 만들어 Celery lane 작업에 넘기기만 합니다. (기존 캐시는 지우지 않고 덮어씀)
     """
-    start_time = datetime.now()
-    logger.info("🚀 Redis 추천+취향 캐시 재생성 작업 시작")
-    logger.info(f"⏰ 작업 시작 시간: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    
     try:
-        # 1단계: 추천 캐시 삭제
-        logger.info("📋 1단계: 기존 추천 캐시 삭제 중...")
-        recommend_keys = redis_client.keys("recommend:*")
-        
-        if recommend_keys:
-            deleted_count = redis_client.delete(*recommend_keys)
-            logger.info(f"🗑️ 추천 캐시 삭제 완료: {deleted_count}개 키 삭제")
-        else:
-            logger.info("📝 삭제할 추천 캐시가 없습니다")
-        
-        # 2단계: 취향 캐시 확인
-        logger.info("📋 2단계: 기존 취향 캐시 확인 중...")
-        preference_keys = redis_client.keys("preference:*")
-        logger.info(f"💾 취향 캐시 유지: {len(preference_keys)}개 (최대 7일간 재사용)")
-        
-        # 3단계: 활성 사용자 수집
-        logger.info("📋 3단계: DB에서 활성 사용자 정보 수집 중...")
-        user_favorites = get_all_active_users_with_favorites()
-        
-        if not user_favorites:
-            logger.warning("⚠️ DB에서 활성 사용자를 찾을 수 없습니다")
-            return
-        
-        logger.info(f"👥 {len(user_favorites)}명의 활성 사용자 발견")
-        
-        # 4단계: 추천 생성 시작
-        logger.info("📋 4단계: 사용자별 추천 생성 시작")
-        logger.info(f"🎵 {len(user_favorites)}명의 사용자를 위한 새로운 추천 생성 중...")
-        
-        success_count = 0
-        fail_count = 0
-        
-        for i, (member_id, favorite_song_ids) in enumerate(user_favorites.items(), 1):
-            try:
-                logger.info(f"👤 [{i}/{len(user_favorites)}] 사용자 {member_id} 처리 시작 (좋아요: {len(favorite_song_ids)}개)")
-                
-                # 취향 캐시 확인
-                cached_preference = None
-                pref_key = f"preference:{member_id}"
-                cached_pref_data = redis_client.get(pref_key)
-                
-                if cached_pref_data:
-                    try:
-                        pref_data = json.loads(cached_pref_data)
-                        cached_favorites = pref_data.get("favorite_song_ids", [])
-                        if set(cached_favorites) == set(favorite_song_ids):
-                            cached_preference = pref_data.get("preference")
-                            logger.info(f"   💾 사용자 {member_id}: 기존 취향 분석 재사용")
-                        else:
-                            redis_client.delete(pref_key)
-                            logger.info(f"   🔄 사용자 {member_id}: 즐겨찾기 변경으로 취향 재분석 필요")
-                    except Exception as e:
-                        logger.warning(f"   ⚠️ 사용자 {member_id}: 취향 캐시 파싱 오류 - {e}")
-                        pass
-                else:
-                    logger.info(f"   🆕 사용자 {member_id}: 신규 취향 분석 필요")
-                
-                # AI 추천 생성
-                logger.info(f"   🤖 사용자 {member_id}: AI 추천 생성 중...")
-                from core.recommendation_service import recommend_songs
-                result = recommend_songs(favorite_song_ids, cached_preference)
-                
-                if result is None:
-                    logger.error(f"   ❌ 사용자 {member_id}: 추천 서비스가 None을 반환했습니다")
-                    fail_count += 1
-                    continue
-                    
-                if "error" not in result:
-                    logger.info(f"   ✅ 사용자 {member_id}: AI 추천 생성 성공")
-                    
-                    CACHE_TTL = 60 * 60 * 24 * 7
-                    
-                    # 취향 캐시 저장
-                    if "preference" in result:
-                        logger.info(f"   💾 사용자 {member_id}: 취향 분석 결과 캐시 저장 중...")
-                        pref_key = f"preference:{member_id}"
-                        today = datetime.now().strftime("%Y-%m-%d")
-                        pref_data = {
-                            "favorite_song_ids": favorite_song_ids,
-                            "preference": result["preference"],
-                            "generated_date": today
-                        }
-                        redis_client.setex(pref_key, CACHE_TTL, json.dumps(pref_data, ensure_ascii=False))
-                        logger.info(f"   💾 사용자 {member_id}: 취향 캐시 저장 완료")
-                    
-                    # 추천 캐시 저장
-                    logger.info(f"   💾 사용자 {member_id}: 추천 결과 캐시 저장 중...")
-                    cache_key = f"recommend:{member_id}"
-                    today = datetime.now().strftime("%Y-%m-%d")
-                    payload = {
-                        "favorites": favorite_song_ids, 
-                        "recommendations": {"groups": result["groups"]},
-                        "candidates": result["candidates"],
-                        "generated_date": today
-                    }
-                    redis_client.setex(cache_key, CACHE_TTL, json.dumps(payload, ensure_ascii=False))
-                    
-                    groups_count = len(result.get('groups', []))
-                    candidates_count = len(result.get('candidates', []))
-                    logger.info(f"   ✅ 사용자 {member_id}: 모든 처리 완료 (추천그룹: {groups_count}개, 후보곡: {candidates_count}개)")
-                    success_count += 1
-                else:
-                    logger.error(f"   ❌ 사용자 {member_id}: 추천 생성 실패 - {result.get('error')}")
-                    fail_count += 1
-                    
-            except Exception as e:
-                logger.error(f"   ❌ 사용자 {member_id}: 처리 중 예외 발생 - {e}")
-                logger.error(f"   📍 예외 유형: {type(e).__name__}")
-                import traceback
-                logger.error(f"   🔍 상세 스택 트레이스: {traceback.format_exc()}")
-                fail_count += 1
-        
-        # 5단계: 작업 완료 및 통계
-        end_time = datetime.now()
-        duration = end_time - start_time
-        logger.info("📋 5단계: 작업 완료 및 통계")
-        logger.info(f"✅ 추천+취향 재생성 완료 - 성공: {success_count}명, 실패: {fail_count}명")
-        logger.info(f"⏱️ 총 소요 시간: {duration.total_seconds():.1f}초")
-        logger.info(f"📊 평균 처리 시간: {duration.total_seconds() / len(user_favorites):.1f}초/명")
-        logger.info("🎉 Redis 캐시 갱신 작업 완료!")
-            
+        start_regeneration()
+    except Exception as e:
+        logger.error(f"❌ Redis 캐시 재생성 시작 중 오류 발생: {e}")
+        logger.error(f"⏰ 오류 발생 시간: {_now()}")
+
+def resume_regeneration():
+    """오늘 재생성이 시작됐는데 끝나지 않았으면 중단된 샤드를 다시 넣고 lane을 띄웁니다."""
+    try:
+        status = redis_client.hget(_run_key(_today_run_id()), "status")
+        if status == "running":
+            start_regeneration()
     except Exception as e:
-        logger.error(f"❌ Redis 캐시 갱신 중 전체 오류 발생: {e}")
-        logger.error(f"⏰ 오류 발생 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.error(f"❌ Redis 캐시 재생성 재개 중 오류 발생: {e}")
 
 def clear_recommendation_cache():
     """
-    추천 캐시만 삭제하는 함수
+    추천 캐시만 삭제하는 함수 (SCAN + 파이프라인 UNLINK)
     """
     try:
-        recommend_keys = redis_client.keys("recommend:*")
-        
-        if recommend_keys:
-            deleted_count = redis_client.delete(*recommend_keys)
+        deleted_count = clear_family("recommendation")
+        if deleted_count:
             logger.info(f"✅ Redis 추천 캐시 정리 완료: {deleted_count}개 키 삭제")
         else:
             logger.info("📝 삭제할 추천 캐시가 없습니다")
@@ -173,22 +450,32 @@ def clear_recommendation_cache():
 
 def clear_all_cache():
     """
-    모든 캐시 삭제하는 함수
+    모든 캐시 삭제하는 함수 (SCAN + 파이프라인 UNLINK)
     """
     try:
-        recommend_keys = redis_client.keys("recommend:*")
-        preference_keys = redis_client.keys("preference:*")
-        all_keys = recommend_keys + preference_keys
-        
-        if all_keys:
-            deleted_count = redis_client.delete(*all_keys)
-            logger.info(f"✅ Redis 전체 캐시 정리 완료: {deleted_count}개 키 삭제 (추천: {len(recommend_keys)}개, 취향: {len(preference_keys)}개)")
+        recommend_count = clear_family("recommendation")
+        preference_count = clear_family("preference")
+        deleted_count = recommend_count + preference_count
+        if deleted_count:
+            logger.info(f"✅ Redis 전체 캐시 정리 완료: {deleted_count}개 키 삭제 (추천: {recommend_count}개, 취향: {preference_count}개)")
         else:
             logger.info("📝 삭제할 캐시가 없습니다")
             
     except Exception as e:
         logger.error(f"❌ Redis 캐시 정리 중 오류 발생: {e}")
 
+def prune_cache_indexes():
+    """캐시 인덱스에서 만료된 항목 정리 (인덱스 도입 전에 쓰인 키가 있으면 처음 한 번 인덱스를 다시 만듦)"""
+    try:
+        rebuilt = rebuild_indexes_once()
+        if rebuilt:
+            logger.info(f"🧱 캐시 인덱스 재구성: {rebuilt}")
+        pruned = prune_indexes()
+        if pruned:
+            logger.info(f"🧹 캐시 인덱스 정리: 만료 항목 {pruned}개 제거")
+    except Exception as e:
+        logger.error(f"❌ 캐시 인덱스 정리 중 오류 발생: {e}")
+
 def start_scheduler():
     """
     스케줄러 시작 함수
@@ -202,6 +489,20 @@ def start_scheduler():
         name='Redis 추천+취향 캐시 재생성',
         replace_existing=True
     )
+    scheduler.add_job(
+        func=resume_regeneration,
+        trigger=CronTrigger(minute=f"*/{REGEN_RESUME_INTERVAL_MIN}", timezone=_KST),
+        id='resume_redis_regeneration',
+        name='Redis 추천 캐시 재생성 재개',
+        replace_existing=True
+    )
+    scheduler.add_job(
+        func=prune_cache_indexes,
+        trigger=CronTrigger(hour=4, minute=30, timezone=_KST),
+        id='prune_cache_indexes',
+        name='캐시 인덱스 만료 항목 정리',
+        replace_existing=True
+    )
     
     scheduler.start()
     logger.info("🕐 Redis 스케줄러가 시작되었습니다 (매일 새벽 3시 추천+취향 캐시 재생성)")
@@ -225,10 +526,10 @@ def test_cache_clear():
 
 def test_regenerate():
     """
-    캐시 재생성 함수 테스트 (개발용)
+    캐시 재생성 함수 테스트 (개발용, Celery 없이 현재 프로세스에서 처리)
     """
     logger.info("🧪 캐시 재생성 테스트 실행...")
-    regenerate_all_recommendations()
+    start_regeneration(inline=True)
 
 def test_user_fetch():
     """
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCHEMA_CACHE_TTL_SEC = int(os.getenv("SCHEMA_CACHE_TTL_SEC", "3600"))
+
+
+class SchemaCache:
+    """
+    커넥션 풀 단위의 테이블 컬럼 캐시.
+    - 테이블당 SHOW COLUMNS를 한 번만 실행하고 TTL 동안 재사용
+    - is_active 필터 같은 SQL 조각을 미리 만들어 두어 핫 쿼리에서 메타데이터 조회를 하지 않음
+    """
+
+    def __init__(self, pool, ttl_sec: int = SCHEMA_CACHE_TTL_SEC):
+        self._pool = pool
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._columns: Dict[str, Tuple[FrozenSet[str], float]] = {}
+        self._active_clauses: Dict[Tuple[str, Optional[str]], str] = {}
+
+    def _load(self, table: str) -> FrozenSet[str]:
+        conn = self._pool.acquire()
+        cur = conn.cursor()
+        try:
+            cur.execute(f"SHOW COLUMNS FROM `{table}`")
+            return frozenset(row["Field"] for row in cur.fetchall())
+        finally:
+            cur.close()
+            conn.close()
+
+    def columns(self, table: str) -> FrozenSet[str]:
+        cached = self._columns.get(table)
+        if cached and (not self.ttl_sec or time.monotonic() - cached[1] < self.ttl_sec):
+            return cached[0]
+
+        cols = self._load(table)
+        with self._lock:
+            self._columns[table] = (cols, time.monotonic())
+            # 컬럼 구성이 바뀌었을 수 있으므로 해당 테이블의 SQL 조각을 다시 생성
+            for key in [k for k in self._active_clauses if k[0] == table]:
+                del self._active_clauses[key]
+        return cols
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in self.columns(table)
+
+    def active_clause(self, table: str = "song", alias: Optional[str] = None) -> str:
+        """`AND is_active = TRUE` 조각 (컬럼이 없으면 빈 문자열)."""
+        cols = self.columns(table)
+        key = (table, alias)
+        clause = self._active_clauses.get(key)
+        if clause is None:
+            col = f"{alias}.is_active" if alias else "is_active"
+            clause = f" AND {col} = TRUE" if "is_active" in cols else ""
+            with self._lock:
+                self._active_clauses[key] = clause
+        return clause
+
+    def warm(self, tables: Iterable[str]) -> None:
+        for table in tables:
+            self.columns(table)
+            self.active_clause(table)
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """캐시를 비웁니다. (마이그레이션 직후 등 명시적 갱신용)"""
+        with self._lock:
+            if table is None:
+                self._columns.clear()
+                self._active_clauses.clear()
+            else:
+                self._columns.pop(table, None)
+                for key in [k for k in self._active_clauses if k[0] == table]:
+                    del self._active_clauses[key]
@@ -0,0 +1,251 @@
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.catalog_service import CatalogSnapshot
+
+# matched_criteria 비트 (리스트로 풀 때 이 순서를 유지)
+# 채점 테이블은 uint8 하나에 [하위 4비트: 점수 | 상위 4비트: 비트마스크]를 함께 담습니다.
+# 점수 합은 최대 7이라 상위 비트로 넘치지 않고, 컬럼별 비트는 겹치지 않아 덧셈 == OR 입니다.
+CRITERIA_BITS = (
+    (1, "preferred_genre"),
+    (2, "preferred_mood"),
+    (4, "like_genre"),
+    (8, "like_artist"),
+)
+
+
+def _intern(values: Iterable) -> Tuple[list, np.ndarray]:
+    """값을 정수 코드로 바꿉니다. vocab[code] == 원래 값 (None 포함, 원본 표기 그대로)"""
+    index: dict = {}
+    codes = [index.setdefault(v, len(index)) for v in values]
+    vocab = [None] * len(index)
+    for v, code in index.items():
+        vocab[code] = v
+    return vocab, np.asarray(codes, dtype=np.intp)
+
+
+class _Vocab:
+    """
+    한 컬럼(장르/분위기/아티스트)의 어휘.
+    - raw: 원본 값 → 코드 (matched_criteria 규칙: v in targets)
+    - stripped: (v or "").strip() → 코드 목록 (_score_candidate 규칙)
+    """
+
+    def __init__(self, values: list):
+        self.size = len(values)
+        self.raw = {v: code for code, v in enumerate(values)}
+        self.stripped: dict = {}
+        for code, v in enumerate(values):
+            self.stripped.setdefault((v or "").strip(), []).append(code)
+
+    def fill(self, out: np.ndarray, targets: Optional[list], strip: bool) -> np.ndarray:
+        """targets에 해당하는 코드 위치를 out(크기=size)에 True로 표시합니다."""
+        if not targets:
+            return out
+        for t in set(targets):
+            if strip:
+                codes = self.stripped.get(t)
+                if codes:
+                    out[codes] = True
+            else:
+                code = self.raw.get(t)
+                if code is not None:
+                    out[code] = True
+        return out
+
+    def lookup(self, targets: Optional[list], strip: bool) -> np.ndarray:
+        return self.fill(np.zeros(self.size, dtype=bool), targets, strip)
+
+    def lookup_matrix(self, targets_per_user: List[Optional[list]], strip: bool) -> np.ndarray:
+        out = np.zeros((len(targets_per_user), self.size), dtype=bool)
+        for u, targets in enumerate(targets_per_user):
+            self.fill(out[u], targets, strip)
+        return out
+
+
+class ScoringIndex:
+    """카탈로그 스냅샷의 컬럼형 표현 (장르/분위기/아티스트를 정수 코드 배열로 보관)."""
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.snapshot = snapshot
+        self.rows: List[dict] = list(snapshot.songs.values())
+        self.song_ids = np.fromiter((r["song_id"] for r in self.rows), dtype=np.int64, count=len(self.rows))
+        self.positions = {int(sid): i for i, sid in enumerate(self.song_ids)}
+        genre_values, self.genre_codes = _intern(r.get("genre") for r in self.rows)
+        mood_values, self.mood_codes = _intern(r.get("mood") for r in self.rows)
+        artist_values, self.artist_codes = _intern(r.get("artist_kr") for r in self.rows)
+        self.genres = _Vocab(genre_values)
+        self.moods = _Vocab(mood_values)
+        self.artists = _Vocab(artist_values)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def score_all(self,
+                  preferred_genres: Optional[list[str]],
+                  preferred_moods: Optional[list[str]],
+                  like_genres: list[str],
+                  like_artists: list[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """전체 곡의 (match_score, matched_criteria 비트마스크)를 한 번에 계산합니다."""
+        # 어휘(vocab) 크기만큼의 작은 테이블을 먼저 만들고, 곡 배열에는 gather 3번만 수행
+        genre_lut = (2 * self.genres.lookup(preferred_genres, True)
+                     + 2 * self.genres.lookup(like_genres, True)
+                     + (self.genres.lookup(preferred_genres, False) << 4)
+                     + (self.genres.lookup(like_genres, False) << 6)).astype(np.uint8)
+        mood_lut = (self.moods.lookup(preferred_moods, True)
+                    + (self.moods.lookup(preferred_moods, False) << 5)).astype(np.uint8)
+        artist_lut = (2 * self.artists.lookup(like_artists, True)
+                      + (self.artists.lookup(like_artists, False) << 7)).astype(np.uint8)
+
+        packed = (np.take(genre_lut, self.genre_codes)
+                  + np.take(mood_lut, self.mood_codes)
+                  + np.take(artist_lut, self.artist_codes))
+        return packed & 0x0F, packed >> 4
+
+    def score_all_batch(self, users: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        여러 사용자를 한 번에 채점합니다. 반환: (users × songs) 점수 행렬, 비트마스크 행렬.
+        users: [{"preferred_genres", "preferred_moods", "like_genres", "like_artists"}, ...]
+        """
+        pg = [u.get("preferred_genres") for u in users]
+        pm = [u.get("preferred_moods") for u in users]
+        lg = [u.get("like_genres") for u in users]
+        la = [u.get("like_artists") for u in users]
+
+        genre_lut = (2 * self.genres.lookup_matrix(pg, True)
+                     + 2 * self.genres.lookup_matrix(lg, True)
+                     + (self.genres.lookup_matrix(pg, False) << 4)
+                     + (self.genres.lookup_matrix(lg, False) << 6)).astype(np.uint8)
+        mood_lut = (self.moods.lookup_matrix(pm, True)
+                    + (self.moods.lookup_matrix(pm, False) << 5)).astype(np.uint8)
+        artist_lut = (2 * self.artists.lookup_matrix(la, True)
+                      + (self.artists.lookup_matrix(la, False) << 7)).astype(np.uint8)
+
+        packed = (np.take(genre_lut, self.genre_codes, axis=1)
+                  + np.take(mood_lut, self.mood_codes, axis=1)
+                  + np.take(artist_lut, self.artist_codes, axis=1))
+        return packed & 0x0F, packed >> 4
+
+    def exclusion_positions(self, song_ids: Iterable[int]) -> np.ndarray:
+        return np.fromiter((self.positions[sid] for sid in song_ids if sid in self.positions), dtype=np.int64)
+
+    def exclusion_mask(self, song_ids: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(len(self.rows), dtype=bool)
+        mask[self.exclusion_positions(song_ids)] = True
+        return mask
+
+    def build_rows(self, indices: Iterable[int], scores: np.ndarray, bits: np.ndarray) -> List[dict]:
+        """선택된 위치의 row 복사본에 match_score / matched_criteria / recommendation_type을 채웁니다."""
+        result = []
+        for i in indices:
+            score = int(scores[i])
+            mask = int(bits[i])
+            row = dict(self.rows[i])
+            row["match_score"] = score
+            row["matched_criteria"] = [name for bit, name in CRITERIA_BITS if mask & bit]
+            row["recommendation_type"] = "scored" if score > 0 else "random"
+            result.append(row)
+        return result
+
+
+def _top_k_row(scores: np.ndarray, excluded: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    점수 내림차순 상위 k개 위치 (동점은 무작위 순서).
+    점수는 0~7 정수뿐이므로 전체 정렬 대신 점수별 개수로 컷라인 점수를 찾고,
+    컷라인 위는 전부, 컷라인 점수에서는 필요한 만큼만 무작위로 뽑습니다.
+    기존 shuffle + 안정 정렬과 같은 분포입니다.
+    """
+    work = scores.astype(np.int16)
+    if len(excluded):
+        work[excluded] = -1
+    counts = np.bincount(work + 1, minlength=int(work.max(initial=0)) + 2)
+    k = min(k, len(work) - int(counts[0]))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    taken, cut = 0, 0
+    for level in range(len(counts) - 1, 0, -1):
+        if taken + counts[level] >= k:
+            cut = level - 1
+            break
+        taken += counts[level]
+
+    above = np.flatnonzero(work > cut)
+    above = above[rng.permutation(len(above))]
+    above = above[np.argsort(-work[above], kind="stable")]
+    ties = np.flatnonzero(work == cut)
+    picked = ties[rng.permutation(len(ties))[:k - len(above)]]
+    return np.concatenate([above, picked])
+
+
+def top_k_indices(scores: np.ndarray, excluded: np.ndarray, k: int,
+                  rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """점수 내림차순 상위 k개 위치. excluded는 제외할 곡의 bool 마스크."""
+    return _top_k_row(scores, np.flatnonzero(excluded), k, rng or np.random.default_rng())
+
+
+def top_k_indices_batch(scores: np.ndarray, excluded: List[np.ndarray], k: int,
+                        rng: Optional[np.random.Generator] = None) -> List[np.ndarray]:
+    """top_k_indices의 행렬 버전. excluded[u]는 사용자 u가 제외할 곡 위치 배열."""
+    rng = rng or np.random.default_rng()
+    return [_top_k_row(scores[u], excluded[u], k, rng) for u in range(scores.shape[0])]
+
+
+_index_lock = threading.Lock()
+_index: Optional[ScoringIndex] = None
+
+
+def get_scoring_index(snapshot: CatalogSnapshot) -> ScoringIndex:
+    """스냅샷별 ScoringIndex (스냅샷이 바뀔 때만 다시 생성)."""
+    global _index
+    idx = _index
+    if idx is not None and idx.snapshot is snapshot:
+        return idx
+    with _index_lock:
+        if _index is None or _index.snapshot is not snapshot:
+            _index = ScoringIndex(snapshot)
+        return _index
+
+
+def score_candidates(snapshot: CatalogSnapshot,
+                     exclude_song_ids: Iterable[int],
+                     limit: int,
+                     preferred_genres: Optional[list[str]],
+                     preferred_moods: Optional[list[str]],
+                     like_genres: list[str],
+                     like_artists: list[str]) -> List[dict]:
+    """카탈로그 전체를 벡터 연산으로 채점하고 상위 limit개 후보 row를 반환합니다."""
+    index = get_scoring_index(snapshot)
+    if not len(index):
+        return []
+    scores, bits = index.score_all(preferred_genres, preferred_moods, like_genres, like_artists)
+    top = top_k_indices(scores, index.exclusion_mask(exclude_song_ids), limit)
+    return index.build_rows(top, scores, bits)
+
+
+# 한 번에 채점할 최대 사용자 수 (users × songs 행렬 메모리 상한)
+BATCH_SCORING_CHUNK = 64
+
+
+def score_candidates_batch(snapshot: CatalogSnapshot,
+                           users: List[dict],
+                           limit: int) -> List[List[dict]]:
+    """
+    여러 사용자의 후보곡을 행렬 연산으로 한 번에 계산합니다.
+    users: [{"exclude_song_ids", "preferred_genres", "preferred_moods", "like_genres", "like_artists"}, ...]
+    반환: 사용자 순서대로 score_candidates와 같은 형식의 후보 row 리스트
+    """
+    index = get_scoring_index(snapshot)
+    if not len(index):
+        return [[] for _ in users]
+
+    results: List[List[dict]] = []
+    for start in range(0, len(users), BATCH_SCORING_CHUNK):
+        chunk = users[start:start + BATCH_SCORING_CHUNK]
+        scores, bits = index.score_all_batch(chunk)
+        excluded = [index.exclusion_positions(u.get("exclude_song_ids") or []) for u in chunk]
+        for u, top in enumerate(top_k_indices_batch(scores, excluded, limit)):
+            results.append(index.build_rows(top, scores[u], bits[u]))
+    return results
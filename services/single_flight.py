@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+import redis
+from dotenv import load_dotenv
+
+from config.redis import redis_client, get_async_redis_client
+from utils.helpers import favorites_fingerprint
+
+load_dotenv()
+
+# 리더가 계산을 끝내야 하는 최대 시간 (락 만료 → 다른 프로세스가 이어받음)
+SINGLE_FLIGHT_LOCK_TTL_MS = int(os.getenv("SINGLE_FLIGHT_LOCK_TTL_MS", "180000"))
+# 리더 결과를 다른 프로세스가 가져갈 수 있도록 보관하는 시간
+SINGLE_FLIGHT_RESULT_TTL_SEC = int(os.getenv("SINGLE_FLIGHT_RESULT_TTL_SEC", "60"))
+SINGLE_FLIGHT_POLL_MS = int(os.getenv("SINGLE_FLIGHT_POLL_MS", "200"))
+# 팔로워가 기다리는 최대 시간 (넘기면 직접 계산)
+SINGLE_FLIGHT_WAIT_SEC = float(os.getenv("SINGLE_FLIGHT_WAIT_SEC", "180"))
+
+_LOCK_PREFIX = "sf:lock:"
+_RESULT_PREFIX = "sf:result:"
+
+
+def recommendation_flight_key(member_id: str, favorite_song_ids: list[int]) -> str:
+    """같은 회원 + 같은 좋아요 목록이면 같은 키"""
+    return f"recommend:{member_id}:{favorites_fingerprint(favorite_song_ids)}"
+
+
+def _dumps(result: Any) -> str:
+    return json.dumps(result, ensure_ascii=False, default=str)
+
+
+# --- 동기 (Celery 워커 / 스레드) ---
+
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _release(lock_key: str, token: str) -> None:
+    """내가 잡은 락일 때만 해제 (만료 후 다른 리더가 잡은 락은 건드리지 않음)"""
+    try:
+        with redis_client.pipeline() as pipe:
+            pipe.watch(lock_key)
+            if pipe.get(lock_key) == token:
+                pipe.multi()
+                pipe.delete(lock_key)
+                pipe.execute()
+            else:
+                pipe.unwatch()
+    except redis.WatchError:
+        pass
+    except Exception as e:
+        print(f"[SINGLE_FLIGHT] release error: {e}")
+
+
+def _run_distributed(key: str, fn: Callable[[], Any]) -> Any:
+    lock_key, result_key = _LOCK_PREFIX + key, _RESULT_PREFIX + key
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_SEC
+    try:
+        while True:
+            raw = redis_client.get(result_key)
+            if raw is not None:
+                return json.loads(raw)
+
+            token = uuid.uuid4().hex
+            if redis_client.set(lock_key, token, nx=True, px=SINGLE_FLIGHT_LOCK_TTL_MS):
+                break
+
+            # 다른 프로세스가 계산 중: 결과가 올라오거나 락이 풀릴 때까지 대기
+            while redis_client.exists(lock_key):
+                if time.monotonic() >= deadline:
+                    print(f"[SINGLE_FLIGHT] wait timeout, computing locally: {key}")
+                    return fn()
+                time.sleep(SINGLE_FLIGHT_POLL_MS / 1000)
+    except redis.RedisError as e:
+        print(f"[SINGLE_FLIGHT] redis error, computing locally: {e}")
+        return fn()
+
+    try:
+        result = fn()
+        try:
+            redis_client.setex(result_key, SINGLE_FLIGHT_RESULT_TTL_SEC, _dumps(result))
+        except Exception as e:
+            print(f"[SINGLE_FLIGHT] publish error: {e}")
+        return result
+    finally:
+        _release(lock_key, token)
+
+
+def run_single_flight(key: str, fn: Callable[[], Any]) -> Any:
+    """
+    같은 key의 계산을 한 번만 실행하고 동시에 들어온 호출자들이 결과를 공유합니다.
+    - 프로세스 내: 먼저 온 스레드가 리더, 나머지는 같은 Future를 기다림
+    - 프로세스 간: Redis 락(SET NX PX) + 결과 키(sf:result:*)로 공유
+    fn의 결과는 JSON으로 직렬화 가능해야 합니다.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+    if not leader:
+        return future.result()
+
+    try:
+        result = _run_distributed(key, fn)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+# --- 비동기 (FastAPI) ---
+
+_async_inflight: Dict[Tuple[int, str], "asyncio.Task[Any]"] = {}
+
+
+async def _release_async(client, lock_key: str, token: str) -> None:
+    try:
+        async with client.pipeline() as pipe:
+            await pipe.watch(lock_key)
+            if await pipe.get(lock_key) == token:
+                pipe.multi()
+                pipe.delete(lock_key)
+                await pipe.execute()
+            else:
+                await pipe.unwatch()
+    except redis.WatchError:
+        pass
+    except Exception as e:
+        print(f"[SINGLE_FLIGHT] release error: {e}")
+
+
+async def _run_distributed_async(key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    client = get_async_redis_client()
+    lock_key, result_key = _LOCK_PREFIX + key, _RESULT_PREFIX + key
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_SEC
+    try:
+        while True:
+            raw = await client.get(result_key)
+            if raw is not None:
+                return json.loads(raw)
+
+            token = uuid.uuid4().hex
+            if await client.set(lock_key, token, nx=True, px=SINGLE_FLIGHT_LOCK_TTL_MS):
+                break
+
+            while await client.exists(lock_key):
+                if time.monotonic() >= deadline:
+                    print(f"[SINGLE_FLIGHT] wait timeout, computing locally: {key}")
+                    return await fn()
+                await asyncio.sleep(SINGLE_FLIGHT_POLL_MS / 1000)
+    except redis.RedisError as e:
+        print(f"[SINGLE_FLIGHT] redis error, computing locally: {e}")
+        return await fn()
+
+    try:
+        result = await fn()
+        try:
+            await client.setex(result_key, SINGLE_FLIGHT_RESULT_TTL_SEC, _dumps(result))
+        except Exception as e:
+            print(f"[SINGLE_FLIGHT] publish error: {e}")
+        return result
+    finally:
+        await _release_async(client, lock_key, token)
+
+
+def _forget_async(local_key: Tuple[int, str], task: "asyncio.Task[Any]") -> None:
+    if _async_inflight.get(local_key) is task:
+        del _async_inflight[local_key]
+    # 기다리는 호출자가 없을 때 "exception was never retrieved" 경고 방지
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_single_flight_async(key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    run_single_flight의 비동기 버전 (fn은 코루틴 함수)
+    계산은 첫 호출자와 분리된 task에서 돌고 모든 호출자는 shield로 기다립니다.
+    → 첫 호출자가 취소돼도(클라이언트 연결 끊김 등) 계산은 계속되고 같은 키를 기다리던 호출자는 결과를 받음
+    """
+    loop = asyncio.get_running_loop()
+    local_key = (id(loop), key)
+    task = _async_inflight.get(local_key)
+    if task is None:
+        task = loop.create_task(_run_distributed_async(key, fn))
+        _async_inflight[local_key] = task
+        task.add_done_callback(lambda t: _forget_async(local_key, t))
+    return await asyncio.shield(task)
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from config.redis import redis_client, get_async_redis_client
+from utils.helpers import _get_title_artist, _norm
+
+load_dotenv()
+
+# 키 하나당 보관할 태그라인 변형 수 (다 차기 전까지는 LLM으로 새 변형을 추가)
+TAGLINE_CACHE_VARIANTS = int(os.getenv("TAGLINE_CACHE_VARIANTS", "3"))
+TAGLINE_CACHE_TTL_SEC = int(os.getenv("TAGLINE_CACHE_TTL_SEC", str(60 * 60 * 24 * 7)))
+# 프로세스 내 LRU (Redis 왕복도 생략)
+TAGLINE_LOCAL_CACHE_SIZE = int(os.getenv("TAGLINE_LOCAL_CACHE_SIZE", "4096"))
+TAGLINE_LOCAL_CACHE_TTL_SEC = int(os.getenv("TAGLINE_LOCAL_CACHE_TTL_SEC", "600"))
+# 키에 포함할 대표곡 수
+TAGLINE_REPRESENTATIVES = 3
+
+_KEY_PREFIX = "tagline:"
+
+
+def _song_key(song: dict) -> str:
+    """대표곡 식별자: song_id, 없으면 정규화한 제목|아티스트"""
+    sid = song.get("song_id")
+    if sid is not None:
+        return str(sid)
+    title_jp, title_kr, title_en, _, artist, artist_kr = _get_title_artist(song)
+    return f"{_norm(title_kr or title_en or title_jp)}|{_norm(artist_kr or artist)}"
+
+
+def representative_songs(songs: List[dict], k: int = TAGLINE_REPRESENTATIVES) -> List[dict]:
+    """
+    그룹의 대표곡 k개를 결정적으로 고릅니다. (같은 그룹이면 사용자가 달라도 같은 키)
+    """
+    return sorted(songs, key=_song_key)[:k]
+
+
+def _preference_bucket(user_preference: Optional[dict]) -> str:
+    """태그라인 프롬프트에 들어가는 취향 키워드(분위기/장르)만 정규화해서 묶습니다."""
+    if not user_preference:
+        return ""
+    moods = sorted({_norm(m) for m in user_preference.get("preferred_moods") or [] if m})
+    genres = sorted({_norm(g) for g in user_preference.get("preferred_genres") or [] if g})
+    return f"{','.join(moods)}|{','.join(genres)}"
+
+
+def tagline_cache_key(label: str, representatives: List[dict], user_preference: Optional[dict] = None) -> str:
+    """정규화 라벨 + 취향 버킷 + 대표곡 ID로 만든 내용 기반 키"""
+    raw = "\x1f".join([
+        _norm(label),
+        _preference_bucket(user_preference),
+        ",".join(_song_key(s) for s in representatives),
+    ])
+    return _KEY_PREFIX + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _LocalVariants:
+    """변형 목록이 가득 찬 키만 보관하는 TTL LRU"""
+
+    def __init__(self, maxsize: int, ttl_sec: int):
+        self.maxsize = maxsize
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, tuple[List[str], float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if time.monotonic() >= item[1]:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key: str, variants: List[str]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = (variants, time.monotonic() + self.ttl_sec)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_local = _LocalVariants(TAGLINE_LOCAL_CACHE_SIZE, TAGLINE_LOCAL_CACHE_TTL_SEC)
+_stats_lock = threading.Lock()
+_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stored": 0, "errors": 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _pick(key: str, variants: Optional[List[str]]) -> Optional[str]:
+    if variants and len(variants) >= TAGLINE_CACHE_VARIANTS:
+        _local.put(key, variants)
+        _count("redis_hits")
+        return random.choice(variants)
+    _count("misses")
+    return None
+
+
+def _pick_local(key: str) -> Optional[str]:
+    variants = _local.get(key)
+    if variants:
+        _count("local_hits")
+        return random.choice(variants)
+    return None
+
+
+def get_cached_tagline(key: str) -> Optional[str]:
+    """
+    변형이 TAGLINE_CACHE_VARIANTS개 모두 모인 키면 그중 하나를 무작위로 반환합니다.
+    아직 덜 모였으면 None (호출자가 새 변형을 생성해 store_tagline으로 추가)
+    """
+    cached = _pick_local(key)
+    if cached:
+        return cached
+    try:
+        variants = redis_client.lrange(key, 0, TAGLINE_CACHE_VARIANTS - 1)
+    except Exception as e:
+        _count("errors")
+        print(f"[TAGLINE] cache read error: {e}")
+        return None
+    return _pick(key, variants)
+
+
+async def get_cached_tagline_async(key: str) -> Optional[str]:
+    """get_cached_tagline의 비동기 버전"""
+    cached = _pick_local(key)
+    if cached:
+        return cached
+    try:
+        variants = await get_async_redis_client().lrange(key, 0, TAGLINE_CACHE_VARIANTS - 1)
+    except Exception as e:
+        _count("errors")
+        print(f"[TAGLINE] cache read error: {e}")
+        return None
+    return _pick(key, variants)
+
+
+def _queue_store(pipe, key: str, tagline: str) -> None:
+    pipe.rpush(key, tagline)
+    pipe.ltrim(key, 0, TAGLINE_CACHE_VARIANTS - 1)
+    pipe.expire(key, TAGLINE_CACHE_TTL_SEC)
+
+
+def store_tagline(key: str, tagline: str) -> None:
+    """새 변형을 추가합니다. (fallback 문구는 저장하지 말 것)"""
+    if not tagline:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        _queue_store(pipe, key, tagline)
+        pipe.execute()
+        _count("stored")
+    except Exception as e:
+        _count("errors")
+        print(f"[TAGLINE] cache write error: {e}")
+
+
+async def store_tagline_async(key: str, tagline: str) -> None:
+    """store_tagline의 비동기 버전"""
+    if not tagline:
+        return
+    try:
+        pipe = get_async_redis_client().pipeline()
+        _queue_store(pipe, key, tagline)
+        await pipe.execute()
+        _count("stored")
+    except Exception as e:
+        _count("errors")
+        print(f"[TAGLINE] cache write error: {e}")
+
+
+def get_tagline_cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["local_hits"] + stats["redis_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["local_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+    stats["variants_per_key"] = TAGLINE_CACHE_VARIANTS
+    return stats
+
+
+def clear_local_tagline_cache() -> None:
+    _local.clear()
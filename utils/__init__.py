@@ -1,5 +1,17 @@
-from .helpers import _get_title_artist
+from .helpers import (
+    _get_title_artist,
+    _norm,
+    _normalize_genre,
+    _normalize_mood,
+    _annotate_normalized,
+    favorites_fingerprint
+)
 
 __all__ = [
-    "_get_title_artist"
+    "_get_title_artist",
+    "_norm",
+    "_normalize_genre",
+    "_normalize_mood",
+    "_annotate_normalized",
+    "favorites_fingerprint"
 ]
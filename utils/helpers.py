@@ -1,3 +1,20 @@
+import os
+import re
+import hashlib
+from functools import lru_cache
+
+PRIMARY_GENRES = {"J-pop","팝","록","발라드","힙합","인디 팝","일렉트로 팝"}
+MOOD_MAP = {"에너지":"신나는","강렬":"강렬","감성적":"서정적","잔잔":"잔잔"}
+_PAREN_RE = re.compile(r"\s*[\(\[（【].*?[\)\]）】]\s*")
+_NON_WORD_RE = re.compile(r"[^0-9a-z가-힣ぁ-ゔァ-ヴー一-龥\s]+")
+_SPACES_RE = re.compile(r"\s+")
+
+# LLM 출력처럼 카탈로그 밖에서 들어오는 문자열용 메모 크기
+NORM_CACHE_SIZE = int(os.getenv("NORM_CACHE_SIZE", "65536"))
+
+_TITLE_KEYS = ("title_kr", "title_en", "title_jp", "title_yomi")
+_ARTIST_KEYS = ("artist_kr", "artist")
+
 def _get_title_artist(song: dict) -> tuple[str, str, str, str, str, str]:
     """노래 딕셔너리에서 제목과 아티스트를 추출합니다."""
     title_jp = song.get("title_jp") or ""
@@ -7,3 +24,71 @@ def _get_title_artist(song: dict) -> tuple[str, str, str, str, str, str]:
     artist = song.get("artist") or ""
     artist_kr = song.get("artist_kr") or ""
     return title_jp.strip(), title_kr.strip(), title_en.strip(), title_yomi.strip(), artist.strip(), artist_kr.strip()
+
+
+def _safe_strip(value: str | None) -> str:
+    """Safely strip a string, handling None values"""
+    return (value or "").strip()
+
+@lru_cache(maxsize=NORM_CACHE_SIZE)
+def _norm_cached(s: str) -> str:
+    s = s.lower().strip()
+    s = _PAREN_RE.sub(" ", s)
+    s = _NON_WORD_RE.sub(" ", s)
+    s = _SPACES_RE.sub(" ", s).strip()
+    return s
+
+def _norm(s: str) -> str:
+    if not s: return ""
+    return _norm_cached(s)
+
+@lru_cache(maxsize=NORM_CACHE_SIZE)
+def _normalize_genre_cached(g: str) -> tuple[str, tuple[str, ...]]:
+    parts = tuple(p.strip() for p in g.split(",") if p.strip())
+    primary = next((p for p in parts if p in PRIMARY_GENRES), parts[0] if parts else "")
+    return primary, parts
+
+def _normalize_genre(g: str) -> tuple[str, list[str]]:
+    if not g: return "", []
+    primary, parts = _normalize_genre_cached(g)
+    return primary, list(parts)
+
+def _normalize_mood(m: str) -> str:
+    return MOOD_MAP.get(m, m or "")
+
+def _match_keys(song: dict) -> tuple:
+    """
+    매칭용 정규화 문자열 (곡 dict에 "_match_keys"로 캐시).
+    반환: (strip한 제목들, strip한 아티스트들, _norm 제목들, _norm 아티스트들)
+    """
+    keys = song.get("_match_keys")
+    if keys is None:
+        titles = tuple(_safe_strip(song.get(k)) for k in _TITLE_KEYS)
+        artists = tuple(_safe_strip(song.get(k)) for k in _ARTIST_KEYS)
+        keys = (titles, artists, tuple(_norm(t) for t in titles), tuple(_norm(a) for a in artists))
+        song["_match_keys"] = keys
+    return keys
+
+def _genre_mood(song: dict) -> tuple[str, list[str], str]:
+    """
+    (대표 장르, 세부 장르들, 정규화 분위기). 곡 dict에 "_genre_mood"로 캐시하며,
+    genre/mood 값이 캐시 당시와 다르면 다시 계산합니다.
+    """
+    genre, mood = song.get("genre", ""), song.get("mood", "")
+    cached = song.get("_genre_mood")
+    if cached is None or cached[0] != genre or cached[1] != mood:
+        primary, parts = _normalize_genre_cached(genre) if genre else ("", ())
+        cached = (genre, mood, primary, parts, _normalize_mood(mood))
+        song["_genre_mood"] = cached
+    return cached[2], list(cached[3]), cached[4]
+
+def _annotate_normalized(song: dict) -> dict:
+    """카탈로그 적재 시 곡 row에 정규화 결과를 미리 계산해 붙입니다."""
+    _match_keys(song)
+    _genre_mood(song)
+    return song
+
+def favorites_fingerprint(favorite_song_ids) -> str:
+    """좋아요 목록 지문 (순서/중복 무관). 캐시 키/무효화 판단용"""
+    ids = sorted({int(i) for i in favorite_song_ids or []})
+    return hashlib.sha1(",".join(map(str, ids)).encode("ascii")).hexdigest()[:16]
@@ -1,9 +1,21 @@
 from .celery_app import celery
-from .tasks import task_analyze_preference, task_generate_recommendations, task_warm_active_users
+from .tasks import (
+    task_analyze_preference,
+    task_generate_recommendations,
+    task_generate_recommendations_batch,
+    task_favorites_pipeline,
+    task_regenerate_lane,
+    task_warm_active_users,
+    schedule_favorites_pipeline
+)
 
 __all__ = [
     "celery",
     "task_analyze_preference",
     "task_generate_recommendations", 
-    "task_warm_active_users"
+    "task_generate_recommendations_batch",
+    "task_favorites_pipeline",
+    "task_regenerate_lane",
+    "task_warm_active_users",
+    "schedule_favorites_pipeline"
 ]
@@ -1,10 +1,12 @@
 import os
 from datetime import datetime, timezone
 from celery import Celery
-from celery.signals import task_prerun, task_postrun, task_failure
+from celery.signals import task_prerun, task_postrun, task_failure, worker_process_shutdown
 import redis
 import json
 
+from services.redis_batch import RedisWriteBatcher
+
 def _build_redis_url() -> str:
     """
     REDIS_URL이 없으면 REDIS_HOST/PORT/PASSWORD/DB로 조합해서 만듭니다.
@@ -56,6 +58,12 @@ celery.conf.update(
 rlog = redis.Redis.from_url(REDIS_URL, decode_responses=True)
 LOG_TTL = int(os.getenv("REDIS_LOG_TTL_SEC", str(7 * 24 * 3600)))
 LOG_STREAM = os.getenv("REDIS_LOG_STREAM", "a:celery:stream")
+# 작업 로그 쓰기는 작업마다 바로 보내지 않고 모아서 파이프라인으로 전송 (개수 또는 시간 기준)
+LOG_BATCH_SIZE = int(os.getenv("REDIS_LOG_BATCH_SIZE", "100"))
+LOG_FLUSH_MS = int(os.getenv("REDIS_LOG_FLUSH_MS", "500"))
+rlog_writer = RedisWriteBatcher(rlog, max_commands=LOG_BATCH_SIZE, flush_interval_ms=LOG_FLUSH_MS, background=True)
+# prerun에서 본 member_id (postrun에서 Redis를 다시 읽지 않도록, 같은 워커 프로세스에서 호출됨)
+_task_members: dict = {}
 
 def _now_iso():
     return datetime.now(timezone.utc).isoformat()
@@ -80,7 +88,8 @@ def _log_task_start(sender=None, task_id=None, args=None, kwargs=None, **extra):
     member_id = _extract_member_id(args or (), kwargs or {})
     task_name = sender.name if sender else extra.get("task").name
     base_key = f"a:celery:run:{task_id}"
-    rlog.hset(base_key, mapping={
+    _task_members[task_id] = member_id or ""
+    rlog_writer.hset(base_key, mapping={
         "task_id": task_id,
         "task": task_name,
         "member_id": member_id or "",
@@ -89,10 +98,10 @@ def _log_task_start(sender=None, task_id=None, args=None, kwargs=None, **extra):
         "args": _shorten(args or ()),
         "kwargs": _shorten(kwargs or {}),
     })
-    rlog.expire(base_key, LOG_TTL)
+    rlog_writer.expire(base_key, LOG_TTL)
 
     # 타임라인(Stream)
-    rlog.xadd(LOG_STREAM, {
+    rlog_writer.xadd(LOG_STREAM, {
         "event": "start",
         "task_id": task_id,
         "task": task_name,
@@ -102,7 +111,7 @@ def _log_task_start(sender=None, task_id=None, args=None, kwargs=None, **extra):
 
     # 사용자별 최근 상태(Key)
     if member_id:
-        rlog.setex(f"a:celery:user:{member_id}:last", LOG_TTL, json.dumps({
+        rlog_writer.setex(f"a:celery:user:{member_id}:last", LOG_TTL, json.dumps({
             "task_id": task_id, "task": task_name, "status": "STARTED", "ts": _now_iso()
         }, ensure_ascii=False))
 
@@ -111,17 +120,17 @@ def _log_task_done(sender=None, task_id=None, retval=None, state=None, **extra):
     task_name = sender.name if sender else ""
     base_key = f"a:celery:run:{task_id}"
     # 기존 hash 업데이트
-    rlog.hset(base_key, mapping={
+    rlog_writer.hset(base_key, mapping={
         "status": state or "SUCCESS",
         "ended_at": _now_iso(),
         "result": _shorten(retval),
     })
-    rlog.expire(base_key, LOG_TTL)
+    rlog_writer.expire(base_key, LOG_TTL)
 
     # 멤버ID 복원(없으면 공백)
-    member_id = rlog.hget(base_key, "member_id") or ""
+    member_id = _task_members.pop(task_id, "")
 
-    rlog.xadd(LOG_STREAM, {
+    rlog_writer.xadd(LOG_STREAM, {
         "event": "done",
         "task_id": task_id,
         "task": task_name,
@@ -135,13 +144,13 @@ def _log_task_fail(task_id=None, exception=None, traceback=None, sender=None, ar
     task_name = sender.name if sender else ""
     member_id = _extract_member_id(args or (), kwargs or {}) or ""
     base_key = f"a:celery:run:{task_id}"
-    rlog.hset(base_key, mapping={
+    rlog_writer.hset(base_key, mapping={
         "status": "FAILURE",
         "ended_at": _now_iso(),
         "error": _shorten(str(exception)),
     })
-    rlog.expire(base_key, LOG_TTL)
-    rlog.xadd(LOG_STREAM, {
+    rlog_writer.expire(base_key, LOG_TTL)
+    rlog_writer.xadd(LOG_STREAM, {
         "event": "fail",
         "task_id": task_id,
         "task": task_name,
@@ -149,3 +158,11 @@ def _log_task_fail(task_id=None, exception=None, traceback=None, sender=None, ar
         "error": _shorten(str(exception), 300),
         "ts": _now_iso(),
     }, maxlen=10_000, approximate=True)
+
+@worker_process_shutdown.connect
+def _flush_task_logs(**extra):
+    """워커 프로세스 종료 전에 남은 작업 로그 전송"""
+    try:
+        rlog_writer.flush()
+    except Exception as e:
+        print(f"[CELERY] task log flush error: {e}")
@@ -1,57 +1,148 @@
-import json, os, redis
-from datetime import datetime
+import json, os
+from contextlib import closing
+from itertools import islice
+from celery.exceptions import SoftTimeLimitExceeded
 from workers.celery_app import celery
-from core.recommendation_service import recommend_songs
-from services.database_service import get_all_active_users_with_favorites, get_favorite_songs_info
-from services.ai_service import _analyze_user_preference
+from config.redis import redis_client
+from core.recommendation_service import recommend_songs, recommend_songs_batch
+from services.database_service import iter_active_users_with_favorites
+from core.preference_model import resolve_preference
+from services.cache_service import build_recommendation_cache_data, write_recommendation_cache, load_preference_cache_many
+from services.redis_batch import RedisWriteBatcher
+from services.single_flight import run_single_flight, recommendation_flight_key
+from services.redis_scheduler import run_lane, has_pending_shards, requeue_stalled_shards
 
-redis_client = redis.Redis(
-    host=os.getenv("REDIS_HOST"),
-    port=int(os.getenv("REDIS_PORT")),
-    password=os.getenv("REDIS_PASSWORD"),
-    decode_responses=True,
-)
 
 REDIS_TTL = 60 * 60 * 24 * 7
+WARM_BATCH_SIZE = int(os.getenv("WARM_BATCH_SIZE", "16"))
+# 좋아요 변경이 연달아 들어오면 마지막 상태만 처리 (이 시간 동안 새 변경이 없을 때 실행)
+FAVORITES_DEBOUNCE_SEC = int(os.getenv("FAVORITES_DEBOUNCE_SEC", "5"))
+# 야간 재생성 샤드 하나를 처리하는 작업의 제한 시간
+REGEN_SHARD_TIME_LIMIT_SEC = int(os.getenv("REGEN_SHARD_TIME_LIMIT_SEC", "1800"))
+# 워밍 배치(WARM_BATCH_SIZE명) 작업의 제한 시간 - 배치 안에서 사용자별 LLM 호출이 이어지므로 기본 time limit(120s)보다 넉넉하게
+WARM_BATCH_TIME_LIMIT_SEC = int(os.getenv("WARM_BATCH_TIME_LIMIT_SEC", "1800"))
 
-def _cache_recommendations(member_id: str, favorite_song_ids: list[int], result: dict):
-    today = datetime.now().strftime("%Y-%m-%d")
-    payload = {
-        "favorite_song_ids": result.get("favorite_song_ids", []),
-        "groups": result.get("groups", []),
-        "candidates": result.get("candidates", []),
-        "generated_date": today,
-    }
-    redis_client.setex(f"recommend:{member_id}", REDIS_TTL, json.dumps(payload, ensure_ascii=False))
+def _cache_recommendations(member_id: str, favorite_song_ids: list[int], result: dict, pipe=None) -> dict:
+    payload = build_recommendation_cache_data(result)
+    write_recommendation_cache(member_id, payload, pipe)
+    return payload
 
 @celery.task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 3})
 def task_analyze_preference(self, member_id: str, favorite_song_ids: list[int]):
     if not favorite_song_ids:
         return None
-    fav_songs = get_favorite_songs_info(favorite_song_ids)
-    pref = _analyze_user_preference(fav_songs)
-    if pref:
-        try:
-            from services.cache_service import save_preference_cache
-            save_preference_cache(member_id, favorite_song_ids, pref)
-        except Exception:
-            pass
-    return pref
+    # 좋아요가 그대로면 캐시, 분포 변화가 작으면 증분 갱신, 그 외에만 LLM 분석
+    return resolve_preference(member_id, favorite_song_ids)
 
 @celery.task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 3})
 def task_generate_recommendations(self, member_id: str, favorite_song_ids: list[int]):
-    result = recommend_songs(favorite_song_ids)
-    if isinstance(result, dict) and "groups" in result:
-        _cache_recommendations(member_id, favorite_song_ids, result)
+    _generate_and_cache(member_id, favorite_song_ids)
     return True
 
+def _generate_and_cache(member_id: str, favorite_song_ids: list[int], preference: dict = None) -> dict:
+    """추천 생성 + 캐시 저장. /recommend 라우트와 같은 single-flight 키라 이미 계산 중이면 그 결과를 공유"""
+    def _compute() -> dict:
+        result = recommend_songs(favorite_song_ids, preference, member_id=member_id)
+        if isinstance(result, dict) and "groups" in result:
+            return _cache_recommendations(member_id, favorite_song_ids, result)
+        return build_recommendation_cache_data(result if isinstance(result, dict) else {})
+
+    return run_single_flight(recommendation_flight_key(member_id, favorite_song_ids), _compute)
+
+def _seq_key(member_id: str) -> str:
+    return f"favorites_seq:{member_id}"
+
+def _pending_key(member_id: str) -> str:
+    return f"favorites_pending:{member_id}"
+
+def schedule_favorites_pipeline(member_id: str, favorite_song_ids: list[int]) -> int:
+    """
+    좋아요 변경을 기록하고 FAVORITES_DEBOUNCE_SEC 뒤에 파이프라인을 예약합니다.
+    변경마다 순번을 올리고, 실행 시점에 순번이 바뀌어 있으면(더 최신 변경이 있으면) 그 작업은 건너뜁니다.
+    """
+    pipe = redis_client.pipeline()
+    pipe.set(_pending_key(member_id), json.dumps(favorite_song_ids or []), ex=REDIS_TTL)
+    pipe.incr(_seq_key(member_id))
+    pipe.expire(_seq_key(member_id), REDIS_TTL)
+    _, seq, _ = pipe.execute()
+    task_favorites_pipeline.apply_async((member_id, seq), countdown=FAVORITES_DEBOUNCE_SEC)
+    return seq
+
+def _is_latest(member_id: str, seq: int) -> bool:
+    current = redis_client.get(_seq_key(member_id))
+    return current is None or int(current) == seq
+
+@celery.task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 3})
+def task_favorites_pipeline(self, member_id: str, seq: int):
+    """
+    좋아요 변경 파이프라인: 취향 분석(1회) → 그 취향으로 추천 생성/캐시.
+    schedule_favorites_pipeline으로 예약되며, 더 최신 변경이 들어왔으면 건너뜁니다.
+    """
+    if not _is_latest(member_id, seq):
+        return {"status": "superseded", "seq": seq}
+    raw = redis_client.get(_pending_key(member_id))
+    favorite_song_ids = json.loads(raw) if raw else []
+    if not favorite_song_ids:
+        # 좋아요를 모두 취소한 경우: 이전 좋아요로 만든 캐시가 남지 않도록 기본 추천으로 덮어씀
+        _generate_and_cache(member_id, [], None)
+        return {"status": "empty", "seq": seq}
+
+    preference = task_analyze_preference.run(member_id, favorite_song_ids)
+
+    # 분석 중 새 변경이 들어왔으면 추천 생성은 다음 작업에 맡김
+    if not _is_latest(member_id, seq):
+        return {"status": "superseded", "seq": seq}
+    _generate_and_cache(member_id, favorite_song_ids, preference)
+    return {"status": "completed", "seq": seq}
+
+@celery.task(bind=True, soft_time_limit=WARM_BATCH_TIME_LIMIT_SEC, time_limit=WARM_BATCH_TIME_LIMIT_SEC + 100)
+def task_generate_recommendations_batch(self, members: list):
+    """members: [[member_id, favorite_song_ids], ...] — 후보 채점을 한 번에 처리"""
+    # 취향은 recommend_songs_batch가 취향 캐시에서 찾고, 새로 분석한 경우 저장까지 처리
+    # 취향 캐시는 MGET 한 번으로 미리 읽고, 취향/추천 캐시 쓰기는 파이프라인으로 모아서 전송
+    users = [(str(member_id), fav_ids, None) for member_id, fav_ids in members]
+    entries = load_preference_cache_many([member_id for member_id, _, _ in users])
+    with RedisWriteBatcher(redis_client) as writer:
+        results = recommend_songs_batch(users, preference_entries=entries, pipe=writer)
+        done = 0
+        for member_id, fav_ids, _ in users:
+            result = results.get(member_id)
+            if not isinstance(result, dict) or "groups" not in result:
+                continue
+            _cache_recommendations(member_id, fav_ids, result, pipe=writer)
+            done += 1
+    return {"requested": len(users), "cached": done}
+
+@celery.task(bind=True, soft_time_limit=REGEN_SHARD_TIME_LIMIT_SEC, time_limit=REGEN_SHARD_TIME_LIMIT_SEC + 100)
+def task_regenerate_lane(self, run_id: str, lane: int):
+    """
+    야간 재생성 lane: 큐에서 샤드 하나를 처리하고, 남은 샤드가 있으면 같은 lane으로 다시 예약합니다.
+    (lane 수 = 동시에 도는 샤드 수, services.redis_scheduler.start_regeneration 참고)
+    """
+    try:
+        processed = run_lane(run_id, lane, max_shards=1)
+    except SoftTimeLimitExceeded:
+        # 체크포인트까지는 저장됨: 샤드를 큐에 되돌리고 이어서 처리
+        requeue_stalled_shards(run_id)
+        processed = 0
+    if has_pending_shards(run_id):
+        task_regenerate_lane.apply_async(kwargs={"run_id": run_id, "lane": lane})
+    return {"run_id": run_id, "lane": lane, "processed": processed}
+
 @celery.task
 def task_warm_active_users(limit: int = 1000):
-    user_map = get_all_active_users_with_favorites()
-    count = 0
-    for member_id, fav_ids in user_map.items():
-        if count >= limit:
-            break
-        (task_analyze_preference.s(member_id, fav_ids) | task_generate_recommendations.s(member_id, fav_ids)).apply_async()
-        count += 1
-    return {"scheduled": count}
+    """활성 사용자 limit명을 스트리밍으로 읽으며 WARM_BATCH_SIZE명씩 바로 예약 (전체 목록을 메모리에 올리지 않음)"""
+    scheduled, batch = 0, []
+    try:
+        with closing(iter_active_users_with_favorites()) as users:
+            for member_id, favorite_song_ids in islice(users, limit):
+                batch.append([member_id, favorite_song_ids])
+                if len(batch) >= WARM_BATCH_SIZE:
+                    task_generate_recommendations_batch.delay(batch)
+                    scheduled, batch = scheduled + len(batch), []
+    except Exception as e:
+        print(f"[WARM] 사용자 조회 실패: {e}")
+    if batch:
+        task_generate_recommendations_batch.delay(batch)
+        scheduled += len(batch)
+    return {"scheduled": scheduled}